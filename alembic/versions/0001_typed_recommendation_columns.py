@@ -0,0 +1,99 @@
+"""typed recommendation columns and composite index
+
+Revision ID: 0001_typed_recommendation_columns
+Revises: 
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001_typed_recommendation_columns'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Temperature types in band order: the stored small integer is the position in this list.
+TEMPERATURE_TYPES = ["Hot", "Warm", "Cool", "Cold", "Freeze"]
+
+INDEX_NAME = "ix_items_temperature_waterproof"
+
+
+def upgrade() -> None:
+    # A new database has no items table yet (the app only creates missing tables on its first database access):
+    # create it with the typed columns.
+    if not sa.inspect(op.get_bind()).has_table("items"):
+        op.create_table(
+            "items",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("type", sa.String(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("suitable_temperature", sa.SmallInteger(), nullable=True),
+            sa.Column("is_waterproof", sa.Boolean(), nullable=False),
+        )
+        op.create_index(INDEX_NAME, "items", ["suitable_temperature", "is_waterproof"])
+        return
+
+    # Items without a temperature type are stored as NULL from now on.
+    with op.batch_alter_table("items") as batch_op:
+        batch_op.alter_column("suitable_temperature", existing_type=sa.String(), nullable=True)
+
+    # Convert the text values in place; values that are already numeric are left alone.
+    band_cases = " ".join(f"WHEN '{name}' THEN {band}" for band, name in enumerate(TEMPERATURE_TYPES))
+    op.execute(
+        f"UPDATE items SET suitable_temperature = CASE suitable_temperature {band_cases} "
+        "WHEN '' THEN NULL ELSE suitable_temperature END"
+    )
+    op.execute(
+        "UPDATE items SET is_waterproof = CASE is_waterproof "
+        "WHEN 'True' THEN 1 WHEN 'False' THEN 0 WHEN '' THEN 0 ELSE is_waterproof END"
+    )
+
+    with op.batch_alter_table("items") as batch_op:
+        batch_op.alter_column(
+            "suitable_temperature",
+            existing_type=sa.String(),
+            type_=sa.SmallInteger(),
+            existing_nullable=True,
+        )
+        batch_op.alter_column(
+            "is_waterproof",
+            existing_type=sa.String(),
+            type_=sa.Boolean(),
+            existing_nullable=False,
+        )
+
+    op.create_index(INDEX_NAME, "items", ["suitable_temperature", "is_waterproof"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX_NAME, table_name="items", if_exists=True)
+
+    # Convert the values back to text first, SQLite keeps them as they are until the column type changes.
+    band_cases = " ".join(f"WHEN {band} THEN '{name}'" for band, name in enumerate(TEMPERATURE_TYPES))
+    op.execute(
+        f"UPDATE items SET suitable_temperature = CASE suitable_temperature {band_cases} "
+        "ELSE '' END"
+    )
+    op.execute(
+        "UPDATE items SET is_waterproof = CASE is_waterproof "
+        "WHEN 1 THEN 'True' ELSE 'False' END"
+    )
+
+    with op.batch_alter_table("items") as batch_op:
+        batch_op.alter_column(
+            "suitable_temperature",
+            existing_type=sa.SmallInteger(),
+            type_=sa.String(),
+            nullable=False,
+        )
+        batch_op.alter_column(
+            "is_waterproof",
+            existing_type=sa.Boolean(),
+            type_=sa.String(),
+            nullable=False,
+        )
@@ -0,0 +1,55 @@
+"""per-user wardrobes
+
+Revision ID: 0002_per_user_wardrobes
+Revises: 0001_typed_recommendation_columns
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_per_user_wardrobes'
+down_revision: Union[str, None] = '0001_typed_recommendation_columns'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The existing items all belong to this wardrobe.
+LEGACY_WARDROBE_ID = "default"
+
+OLD_INDEX_NAME = "ix_items_temperature_waterproof"
+RECOMMENDATION_INDEX_NAME = "ix_items_wardrobe_temperature_waterproof"
+PAGING_INDEX_NAME = "ix_items_wardrobe_id"
+
+
+def upgrade() -> None:
+    # The app creates missing tables itself, so a new database may already have the column.
+    columns = [column["name"] for column in sa.inspect(op.get_bind()).get_columns("items")]
+    if "wardrobe_id" not in columns:
+        with op.batch_alter_table("items") as batch_op:
+            batch_op.add_column(
+                sa.Column("wardrobe_id", sa.String(), nullable=False, server_default=LEGACY_WARDROBE_ID)
+            )
+
+    # Every query is scoped to a wardrobe: the indexes lead with wardrobe_id.
+    op.drop_index(OLD_INDEX_NAME, table_name="items", if_exists=True)
+    op.create_index(
+        RECOMMENDATION_INDEX_NAME,
+        "items",
+        ["wardrobe_id", "suitable_temperature", "is_waterproof"],
+        if_not_exists=True,
+    )
+    op.create_index(PAGING_INDEX_NAME, "items", ["wardrobe_id", "id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index(PAGING_INDEX_NAME, table_name="items", if_exists=True)
+    op.drop_index(RECOMMENDATION_INDEX_NAME, table_name="items", if_exists=True)
+    op.create_index(OLD_INDEX_NAME, "items", ["suitable_temperature", "is_waterproof"], if_not_exists=True)
+
+    # All wardrobes are merged back into the one shared wardrobe.
+    with op.batch_alter_table("items") as batch_op:
+        batch_op.drop_column("wardrobe_id")
@@ -0,0 +1,62 @@
+"""wardrobe search index and sort indexes
+
+Revision ID: 0003_wardrobe_search_index
+Revises: 0002_per_user_wardrobes
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_wardrobe_search_index'
+down_revision: Union[str, None] = '0002_per_user_wardrobes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_TABLE = "items_fts"
+
+# The FTS5 table over the items and the triggers that keep it in sync (as in weather_assistant/wardrobe_search.py).
+# Note: batch_alter_table recreates the items table and drops these triggers; later migrations that use it
+# have to create them again.
+SEARCH_INDEX_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "wardrobe_id, name, type, content='items', content_rowid='id', prefix='2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert AFTER INSERT ON items BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}(rowid, wardrobe_id, name, type) VALUES (new.id, new.wardrobe_id, new.name, new.type); "
+    "END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete AFTER DELETE ON items BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, wardrobe_id, name, type) "
+    "VALUES ('delete', old.id, old.wardrobe_id, old.name, old.type); "
+    "END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update AFTER UPDATE OF wardrobe_id, name, type ON items BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, wardrobe_id, name, type) "
+    "VALUES ('delete', old.id, old.wardrobe_id, old.name, old.type); "
+    f"INSERT INTO {SEARCH_TABLE}(rowid, wardrobe_id, name, type) VALUES (new.id, new.wardrobe_id, new.name, new.type); "
+    "END",
+]
+
+
+def upgrade() -> None:
+    # The wardrobe table can be sorted by name and type within a wardrobe.
+    op.create_index("ix_items_wardrobe_name", "items", ["wardrobe_id", "name"], if_not_exists=True)
+    op.create_index("ix_items_wardrobe_type", "items", ["wardrobe_id", "type"], if_not_exists=True)
+
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for statement in SEARCH_INDEX_DDL:
+        op.execute(statement)
+    # Index the existing items.
+    op.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        for trigger in ("insert", "delete", "update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_{trigger}")
+        op.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+    op.drop_index("ix_items_wardrobe_type", table_name="items", if_exists=True)
+    op.drop_index("ix_items_wardrobe_name", table_name="items", if_exists=True)
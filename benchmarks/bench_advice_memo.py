@@ -0,0 +1,71 @@
+# Benchmark: clothing advice with the advice memo vs computing it on every lookup.
+# Fills a temporary wardrobe database, checks that the memoized advice equals the computed advice and
+# changes exactly when the wardrobe changes (exits non-zero otherwise), then times repeated lookups.
+# Run from the project root:  python benchmarks/bench_advice_memo.py [items per type] [lookups]
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+
+from weather_assistant.clothing import get_temperature_type
+
+CONDITIONS = ["clear", "clouds", "light rain", "snow"]
+
+
+def main(per_type: int, lookups: int):
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DB_URL"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        from weather_assistant import weather_assistant as wa
+
+        state = wa.State()
+        rng = random.Random(0)
+        for item_type in wa.clothing_types:
+            for number in range(per_type):
+                state.selected_type = item_type
+                state.selected_suitable_temperature = rng.choice(wa.temperature_types)
+                state.selected_is_waterproof = rng.choice(["True", "False"])
+                state.handle_add_submit({"name": f"{item_type} {number}"})
+        wardrobe_id = state.wardrobe_id
+
+        weather = [(rng.randrange(-10, 40), rng.choice(CONDITIONS)) for _ in range(lookups)]
+
+        # the memo gives the computed advice, and every wardrobe change bumps the version it is keyed on
+        for temperature, condition in weather[:50]:
+            expected = wa.get_wardrobe_advice(
+                wardrobe_id, get_temperature_type(temperature), wa.is_wet_condition(condition)
+            )
+            if expected is not None and wa.get_clothing_advice(wardrobe_id, temperature, condition) != expected:
+                sys.exit("memoized advice differs from the computed advice")
+        version = wa.advice_memo.version(wardrobe_id)
+        wa.get_clothing_advice(wardrobe_id, 15, "light rain")
+        state.delete_latest_item()
+        state.delete_latest_item()
+        after = wa.get_clothing_advice(wardrobe_id, 15, "light rain")
+        if wa.advice_memo.version(wardrobe_id) != version + 2 \
+                or after != wa.get_wardrobe_advice(wardrobe_id, "Cool", True):
+            sys.exit(f"advice was not invalidated by the wardrobe change: {after!r}")
+        print("memoized advice identical to the computed advice, invalidated by wardrobe changes")
+
+        start = time.perf_counter()
+        for temperature, condition in weather:
+            wa.get_wardrobe_advice(wardrobe_id, get_temperature_type(temperature), wa.is_wet_condition(condition))
+        computed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for temperature, condition in weather:
+            wa.get_clothing_advice(wardrobe_id, temperature, condition)
+        memoized = time.perf_counter() - start
+
+        print(f"{per_type} items per type, {lookups} lookups")
+        print(f"  computed every time {computed / lookups * 1e6:8.1f} µs/lookup")
+        print(f"  memoized            {memoized / lookups * 1e6:8.1f} µs/lookup ({wa.advice_memo.stats()})")
+        wa.dispose_engine()
+
+
+if __name__ == "__main__":
+    per_type = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    main(per_type, lookups)
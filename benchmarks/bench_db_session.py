@@ -0,0 +1,48 @@
+# Benchmark: one wardrobe page query through rx.session() (a new engine and connection per call)
+# and through the shared pooled engine (weather_assistant.database.get_session).
+# Runs against a temporary database.
+# Run from the project root:  python benchmarks/bench_db_session.py [queries]
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+
+import reflex as rx
+from sqlmodel import func, select
+
+
+def page_query(session, Items):
+    session.exec(select(func.count(Items.id))).one()
+    session.exec(select(Items).order_by(Items.id).limit(20)).all()
+
+
+def timed(label: str, queries: int, make_session, Items):
+    timings = []
+    for _ in range(queries):
+        start = time.perf_counter()
+        with make_session() as session:
+            page_query(session, Items)
+        timings.append(time.perf_counter() - start)
+    print(f"{label:>14}: median {statistics.median(timings) * 1e6:9.1f} µs, "
+          f"max {max(timings) * 1e6:9.1f} µs over {queries} queries")
+
+
+def main(queries: int):
+    # the app module defines the tables that the shared engine creates
+    from weather_assistant.weather_assistant import Items, dispose_engine, get_session
+
+    with get_session() as session:
+        page_query(session, Items)
+    timed("rx.session()", queries, rx.session, Items)
+    timed("shared engine", queries, get_session, Items)
+    dispose_engine()
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DB_URL"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        os.environ["WEATHER_ARCHIVE_DIR"] = ""
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
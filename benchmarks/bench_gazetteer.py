@@ -0,0 +1,92 @@
+# Benchmark: city name resolution and autocomplete in the gazetteer.
+# Times resolve() and complete() on the bundled gazetteer and on a generated one with many cities,
+# and checks the suggestions against a linear scan over all names (exits non-zero if they differ).
+# Also checks that fetch_weather sends known cities to the weather provider by their gazetteer id,
+# and unknown names (the bundled gazetteer only lists the large cities) as typed.
+# Run from the project root:  python benchmarks/bench_gazetteer.py [generated cities]
+import asyncio
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+os.environ["WEATHER_PROVIDER"] = "stub"
+os.environ["STUB_WEATHER_LATENCY"] = "0"
+os.environ["WEATHER_ARCHIVE_DIR"] = ""
+
+from weather_assistant.gazetteer import DEFAULT_GAZETTEER_PATH, City, Gazetteer, load_gazetteer, normalize_name
+
+
+def per_call(function, arguments) -> float:
+    start = time.perf_counter()
+    for argument in arguments:
+        function(argument)
+    return (time.perf_counter() - start) / len(arguments) * 1e6
+
+
+def check(gazetteer: Gazetteer, prefixes: list[str]):
+    keys = [normalize_name(city.name) for city in gazetteer.cities]
+    numbers = {city: number for number, city in enumerate(gazetteer.cities)}
+    for prefix in prefixes:
+        key = normalize_name(prefix)
+        expected = [number for number, name in enumerate(keys) if name.startswith(key)][:8]
+        found = [numbers[city] for city in gazetteer.complete(prefix)]
+        if found != expected:
+            sys.exit(f"suggestions for {prefix!r} differ from a linear scan: {found} != {expected}")
+
+
+def report(label: str, gazetteer: Gazetteer, names: list[str], prefixes: list[str]):
+    print(f"{label}: {len(gazetteer)} cities")
+    print(f"  resolve  {per_call(gazetteer.resolve, names):6.2f} µs/name")
+    for length in (1, 2, 3, 5):
+        typed = [prefix[:length] for prefix in prefixes]
+        print(f"  complete {per_call(gazetteer.complete, typed):6.2f} µs/prefix of {length} characters")
+
+
+async def resolved_before_request() -> bool:
+    from weather_assistant import weather_assistant as wa
+
+    calls = []
+    fetch = wa.weather_provider.fetch
+
+    async def counting_fetch(city):
+        calls.append(city)
+        return await fetch(city)
+
+    wa.weather_provider.fetch = counting_fetch
+    found = await wa.fetch_weather("sao paulo")
+    unknown = await wa.fetch_weather("Cambridge")
+    return found is not None and unknown is not None and calls == ["São Paulo,BR", "Cambridge"]
+
+
+def main(generated: int):
+    start = time.perf_counter()
+    bundled = load_gazetteer(DEFAULT_GAZETTEER_PATH)
+    print(f"loaded the bundled gazetteer in {(time.perf_counter() - start) * 1000:.1f} ms")
+    names = [city.name for city in bundled.cities] * 50
+    # (alternate names are left out of the check, the linear scan only looks at the names)
+    check(Gazetteer(bundled.cities), [name[:length] for name in names[:len(bundled)] for length in (1, 2, 4)])
+    report("bundled", bundled, names, names)
+
+    rng = random.Random(0)
+    cities = []
+    for number in range(generated):
+        name = "".join(rng.choices(string.ascii_lowercase, k=rng.randrange(4, 12))).capitalize()
+        cities.append(City(id=f"{name},XX", name=name, country="XX", population=rng.randrange(1000, 10_000_000)))
+    start = time.perf_counter()
+    large = Gazetteer(cities)
+    print(f"built a gazetteer of {generated} cities in {(time.perf_counter() - start) * 1000:.0f} ms")
+    names = [rng.choice(cities).name for _ in range(20_000)]
+    check(large, [name[:length] for name in names[:100] for length in (1, 2, 3)])
+    report("generated", large, names, names)
+
+    if not asyncio.run(resolved_before_request()):
+        sys.exit("fetch_weather did not resolve the names in the gazetteer before calling the provider")
+    print("known cities are requested by their gazetteer id, unknown names as typed")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,42 @@
+# Benchmark: import time and peak RSS of the app module, measured in a fresh interpreter.
+# Also reports whether pandas was loaded (the app no longer needs it; reflex only loads it when installed).
+# With --without-pandas the interpreter behaves as if pandas was not installed.
+# Run from the project root:  python benchmarks/bench_import.py [runs] [--without-pandas]
+import json
+import statistics
+import subprocess
+import sys
+
+BLOCK_PANDAS = "import sys; sys.modules['pandas'] = None\n"
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import weather_assistant.weather_assistant
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "pandas_loaded": sys.modules.get("pandas") is not None,
+}))
+"""
+
+
+def main(runs: int, without_pandas: bool):
+    probe = BLOCK_PANDAS + PROBE if without_pandas else PROBE
+    results = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    seconds = [result["seconds"] for result in results]
+    rss = [result["max_rss_mb"] for result in results]
+    print(f"import weather_assistant.weather_assistant over {runs} runs:")
+    print(f"  time: median {statistics.median(seconds) * 1000:.0f} ms, min {min(seconds) * 1000:.0f} ms")
+    print(f"  peak RSS: median {statistics.median(rss):.1f} MB")
+    print(f"  pandas loaded: {results[-1]['pandas_loaded']}")
+
+
+if __name__ == "__main__":
+    arguments = [argument for argument in sys.argv[1:] if not argument.startswith("--")]
+    main(int(arguments[0]) if arguments else 5, "--without-pandas" in sys.argv)
@@ -0,0 +1,92 @@
+# Benchmark: cold import time of the app module (what every worker and every script pays at startup).
+# Imports weather_assistant.weather_assistant in fresh interpreters under `python -X importtime` and reports
+# the total import time and the time spent in the modules of this package (their own code, without the
+# framework and libraries they import). Also checks that the import has no side effects: no database
+# file or engine, no rendered pages, no gazetteer loaded and no weather archive opened.
+# Exits non-zero if the package's own import time is above the budget.
+# Run from the project root:  python benchmarks/bench_import_time.py [runs] [budget in ms]
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PACKAGE = "weather_assistant"
+# median import time of the package's own modules, in ms (also checked by tests/test_import.py)
+BUDGET_MS = 150
+
+IMPORT = f"""
+import os, sys
+import {PACKAGE}.weather_assistant as wa
+from {PACKAGE} import database, gazetteer, weather_archive
+problems = []
+if database._engine is not None:
+    problems.append("the database engine was created")
+if os.path.exists(sys.argv[1]):
+    problems.append("the database file was created")
+if wa.app.pages:
+    problems.append(f"pages were rendered: {{list(wa.app.pages)}}")
+if gazetteer._gazetteer is not None:
+    problems.append("the gazetteer was loaded")
+if weather_archive._archive is not None or os.path.exists(sys.argv[2]):
+    problems.append("the weather archive was opened")
+if problems:
+    sys.exit("import side effects: " + ", ".join(problems))
+"""
+
+
+# Self and cumulative import times in µs per module, from the -X importtime report on stderr.
+def parse_importtime(report: str) -> dict[str, tuple[int, int]]:
+    times = {}
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def import_once(database_path: str) -> dict[str, tuple[int, int]]:
+    archive_directory = os.path.join(os.path.dirname(database_path), "weather_archive")
+    environment = {
+        **os.environ,
+        "DB_URL": f"sqlite:///{database_path}",
+        "WEATHER_ARCHIVE_DIR": archive_directory,
+        "PYTHONDONTWRITEBYTECODE": "1",
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT, database_path, archive_directory],
+        capture_output=True, text=True, env=environment,
+    )
+    if result.returncode != 0:
+        sys.exit(result.stderr.strip().splitlines()[-1])
+    return parse_importtime(result.stderr)
+
+
+def main(runs: int, budget_ms: float):
+    totals, own = [], []
+    modules: dict[str, list[int]] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for _ in range(runs):
+            times = import_once(os.path.join(directory, "import.db"))
+            totals.append(times[f"{PACKAGE}.weather_assistant"][1] / 1000)
+            package = {name: self_us for name, (self_us, _) in times.items() if name.split(".")[0] == PACKAGE}
+            own.append(sum(package.values()) / 1000)
+            for name, self_us in package.items():
+                modules.setdefault(name, []).append(self_us)
+
+    print(f"import {PACKAGE}.weather_assistant, median of {runs} runs")
+    print(f"  total (with Reflex and libraries) {statistics.median(totals):8.1f} ms")
+    print(f"  this package's own modules        {statistics.median(own):8.1f} ms (budget {budget_ms:.0f} ms)")
+    slowest = sorted(modules.items(), key=lambda item: -statistics.median(item[1]))[:5]
+    for name, self_us in slowest:
+        print(f"    {name:<40} {statistics.median(self_us) / 1000:6.1f} ms")
+    print("no import side effects")
+    if statistics.median(own) > budget_ms:
+        sys.exit(f"import time of the package {statistics.median(own):.1f} ms is above the budget of {budget_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    budget_ms = float(sys.argv[2]) if len(sys.argv) > 2 else BUDGET_MS
+    main(runs, budget_ms)
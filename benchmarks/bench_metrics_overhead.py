@@ -0,0 +1,90 @@
+# Benchmark: overhead of the latency instrumentation on the lookup pipeline.
+# Runs weather lookups through the State event handler (stub provider without latency, empty cache,
+# state delta and its metrics middleware) with the histograms turned on and off. The two modes alternate
+# from one lookup to the next (starting with the other mode every round), so that both see the same machine
+# noise; only the handler, the delta and the middleware are timed, not the construction of the State.
+# The overhead compares the mean lookup time of the two modes without the slowest 2% of each (outliers of
+# the machine): a median would leave out the delta size, which is only measured for 1 in 10 events.
+# Without any upstream latency this is the worst case; exits non-zero if the overhead is above the budget.
+# Runs against a temporary database.
+# Run from the project root:  python benchmarks/bench_metrics_overhead.py [lookups per round] [rounds] [budget in %]
+import asyncio
+import gc
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+
+os.environ["WEATHER_PROVIDER"] = "stub"
+os.environ["STUB_WEATHER_LATENCY"] = "0"
+# made-up city names: the gazetteer is turned off so that they are looked up
+os.environ["GAZETTEER_PATH"] = ""
+os.environ["WEATHER_ARCHIVE_DIR"] = ""
+
+from reflex.state import StateUpdate
+from reflex.event import Event
+
+OUTLIERS = 0.02
+
+
+# The mean without the slowest OUTLIERS of the values.
+def trimmed_mean(values: list[float]) -> float:
+    values = sorted(values)
+    return statistics.fmean(values[:max(1, int(len(values) * (1 - OUTLIERS)))])
+
+
+# One round of `count` lookups of new cities; adds the time of each lookup to timings[metrics enabled].
+async def lookups(wa, metrics, middleware, count: int, first: bool, timings: dict):
+    event = Event(token="bench", name="state.handle_key_press")
+    states = []
+    for i in range(count):
+        state = wa.State()
+        state.wardrobe_id = "bench"
+        state.cityname_input = f"City {i}"
+        states.append(state)
+    wa.weather_cache.clear()
+    gc.collect()
+    for i, state in enumerate(states):
+        enabled = first if i % 2 == 0 else not first
+        metrics.set_enabled(enabled)
+        start = time.perf_counter()
+        await state.handle_key_press("Enter")
+        await middleware.postprocess(wa.app, state, event, StateUpdate(delta=state.get_delta()))
+        timings[enabled].append(time.perf_counter() - start)
+
+
+async def main(count: int, rounds: int, budget: float):
+    from weather_assistant import metrics
+    from weather_assistant import weather_assistant as wa
+
+    middleware = wa.StateDeltaMetrics()
+    wa.load_recommendation_index("bench")
+    await lookups(wa, metrics, middleware, count, True, {True: [], False: []})
+
+    timings = {True: [], False: []}
+    for number in range(rounds):
+        await lookups(wa, metrics, middleware, count, number % 2 == 0, timings)
+    metrics.set_enabled(True)
+    wa.dispose_engine()
+
+    without_metrics = trimmed_mean(timings[False])
+    with_metrics = trimmed_mean(timings[True])
+    overhead = (with_metrics / without_metrics - 1) * 100
+    print(f"{rounds} rounds of {count} lookups, the modes alternating")
+    print(f"  without metrics {without_metrics * 1e6:8.1f} µs/lookup (median {statistics.median(timings[False]) * 1e6:.1f})")
+    print(f"  with metrics    {with_metrics * 1e6:8.1f} µs/lookup (median {statistics.median(timings[True]) * 1e6:.1f})")
+    print(f"  overhead {overhead:.2f}% (budget {budget}%)")
+    if overhead > budget:
+        sys.exit(f"instrumentation overhead {overhead:.2f}% is above the budget of {budget}%")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    budget = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DB_URL"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        asyncio.run(main(count, rounds, budget))
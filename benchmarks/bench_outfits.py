@@ -0,0 +1,88 @@
+# Benchmark: top-K outfits with the best-first search vs scoring the full Cartesian product.
+# Before timing, checks on random small wardrobes that both give the same top-K scores (exits non-zero otherwise).
+# Run from the project root:  python benchmarks/bench_outfits.py [items per type]
+import heapq
+import itertools
+import random
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from weather_assistant.outfits import OPTIONAL_TYPES, OUTFIT_SHAPES, item_score, top_outfits
+
+TYPES = ["Top", "Bottom", "Dress", "Shoes", "Accessory"]
+
+
+def random_wardrobe(per_type: int, rng: random.Random) -> list[dict]:
+    items = []
+    for item_type in TYPES:
+        for _ in range(rng.randrange(per_type + 1)):
+            items.append({
+                "id": len(items) + 1,
+                "name": f"{item_type} {len(items) + 1}",
+                "type": item_type,
+                "suitable_temperature": "Cool",
+                "is_waterproof": rng.choice(["True", "False"]),
+            })
+    return items
+
+
+# Score every combination and keep the k best.
+def brute_force(items: list[dict], is_wet: bool, k: int) -> list[float]:
+    scores = []
+    for shape in OUTFIT_SHAPES:
+        groups = []
+        for item_type in shape:
+            group = [item_score(item, is_wet) for item in items if item["type"] == item_type]
+            if item_type in OPTIONAL_TYPES:
+                group.append(0.0)
+            groups.append(group)
+        scores += [sum(combination) for combination in itertools.product(*groups)]
+    return heapq.nlargest(k, scores)
+
+
+def check(rounds: int = 500):
+    rng = random.Random(0)
+    for _ in range(rounds):
+        items = random_wardrobe(6, rng)
+        is_wet = rng.random() < 0.5
+        k = rng.randrange(1, 10)
+        expected = brute_force(items, is_wet, k)
+        got = [outfit.score for outfit in top_outfits(items, is_wet, k)]
+        if got != expected:
+            sys.exit(f"top_outfits scores {got} differ from the full product {expected}")
+    print(f"top_outfits identical to scoring the full product ({rounds} random wardrobes)")
+
+
+def main(per_type: int):
+    check()
+    rng = random.Random(1)
+    items = []
+    for item_type in TYPES:
+        for _ in range(per_type):
+            items.append({
+                "id": len(items) + 1,
+                "name": f"{item_type} {len(items) + 1}",
+                "type": item_type,
+                "suitable_temperature": "Cool",
+                "is_waterproof": rng.choice(["True", "False"]),
+            })
+
+    start = time.perf_counter()
+    outfits = top_outfits(items, True, 3)
+    elapsed = time.perf_counter() - start
+    print(f"{per_type} items per type, top 3 outfits: {elapsed * 1000:.2f} ms (best score {outfits[0].score})")
+
+    if per_type <= 60:
+        start = time.perf_counter()
+        brute_force(items, True, 3)
+        elapsed = time.perf_counter() - start
+        print(f"{per_type} items per type, full product: {elapsed * 1000:.2f} ms")
+    else:
+        combinations = per_type * per_type * per_type * (per_type + 1) + per_type * per_type * (per_type + 1)
+        print(f"full product skipped ({combinations:,} combinations)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
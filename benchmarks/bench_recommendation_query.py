@@ -0,0 +1,107 @@
+# Benchmark: recommendation latency of one user as the Items table grows (10k rows up to [max rows]).
+# The table is filled with many wardrobes of WARDROBE_SIZE random items each. At every size, checks with
+# EXPLAIN QUERY PLAN that the queries are answered from the per-wardrobe indexes (exits non-zero otherwise)
+# and times the recommendation query and the load of a whole wardrobe into the recommendation index.
+# Run from the project root:  python benchmarks/bench_recommendation_query.py [max rows, default 1000000]
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+
+from sqlalchemy import insert, text
+from sqlmodel import Session, create_engine, select
+
+from weather_assistant.weather_assistant import (
+    Items,
+    clothing_types,
+    recommendations_statement,
+    temperature_types,
+)
+
+RECOMMENDATION_INDEX_NAME = "ix_items_wardrobe_temperature_waterproof"
+PAGING_INDEX_NAME = "ix_items_wardrobe_id"
+WARDROBE_SIZE = 50
+
+
+def wardrobe_id(number: int) -> str:
+    return f"wardrobe-{number}"
+
+
+# Add the rows start..rows to new wardrobes, interleaved like users adding items at the same time.
+def fill(engine, start: int, rows: int, chunk: int = 50_000):
+    rng = random.Random(start)
+    first_wardrobe = start // WARDROBE_SIZE
+    wardrobes = max(1, rows // WARDROBE_SIZE)
+    with engine.begin() as connection:
+        for first in range(start, rows, chunk):
+            connection.execute(insert(Items), [
+                {
+                    "wardrobe_id": wardrobe_id(rng.randrange(first_wardrobe, wardrobes)),
+                    "type": rng.choice(clothing_types),
+                    "name": f"item {i}",
+                    "suitable_temperature": rng.choice(temperature_types),
+                    "is_waterproof": rng.random() < 0.3,
+                }
+                for i in range(first, min(rows, first + chunk))
+            ])
+
+
+def query_plan(engine, statement) -> str:
+    compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as connection:
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def check_plans(engine):
+    plan = query_plan(engine, recommendations_statement(wardrobe_id(0), "Cool", True))
+    if RECOMMENDATION_INDEX_NAME not in plan:
+        sys.exit(f"recommendation query does not use {RECOMMENDATION_INDEX_NAME}:\n{plan}")
+    plan = query_plan(engine, select(Items).where(Items.wardrobe_id == wardrobe_id(0)).order_by(Items.id).limit(20))
+    if PAGING_INDEX_NAME not in plan:
+        sys.exit(f"wardrobe page query does not use {PAGING_INDEX_NAME}:\n{plan}")
+
+
+def measure(engine, rows: int, lookups: int = 200):
+    rng = random.Random(rows)
+    wardrobes = max(1, rows // WARDROBE_SIZE)
+    query_timings = []
+    load_timings = []
+    with Session(engine) as session:
+        for _ in range(lookups):
+            wardrobe = wardrobe_id(rng.randrange(wardrobes))
+            start = time.perf_counter()
+            session.exec(recommendations_statement(wardrobe, rng.choice(temperature_types), rng.random() < 0.3)).all()
+            query_timings.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            session.exec(select(Items).where(Items.wardrobe_id == wardrobe)).all()
+            load_timings.append(time.perf_counter() - start)
+    print(f"{rows:>10,} rows: recommendation query median {statistics.median(query_timings) * 1000:6.3f} ms, "
+          f"wardrobe load median {statistics.median(load_timings) * 1000:6.3f} ms "
+          f"(p99 {sorted(load_timings)[int(lookups * 0.99)] * 1000:6.3f} ms)")
+
+
+def main(max_rows: int):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Items.metadata.create_all(engine)
+        rows = 0
+        size = 10_000
+        while size <= max_rows:
+            fill(engine, rows, size)
+            rows = size
+            with engine.connect() as connection:
+                connection.execute(text("ANALYZE"))
+            check_plans(engine)
+            measure(engine, rows)
+            size *= 10
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,56 @@
+# Benchmark: scalar vs vectorized temperature classification and default clothing advice.
+# That the vectorized results are identical to the scalar functions is tested in tests/test_clothing.py.
+# Run from the project root:  python benchmarks/bench_vectorized_advice.py [size]
+import random
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from weather_assistant.clothing import (
+    TEMPERATURE_THRESHOLDS,
+    classify_temperatures,
+    default_clothing_advice,
+    get_default_clothing_advice,
+    get_temperature_type,
+)
+
+CONDITIONS = ["clear", "clouds", "rain", "light rain", "snow", "snow showers", "drizzle", "mist", ""]
+
+
+def random_inputs(size: int, rng: random.Random):
+    temperatures = [rng.uniform(-40, 50) for _ in range(size)]
+    # every threshold, and values just around it
+    for threshold in TEMPERATURE_THRESHOLDS:
+        temperatures += [threshold - 1e-9, threshold, threshold + 1e-9, int(threshold)]
+    temperatures += list(range(-30, 50))
+    conditions = [rng.choice(CONDITIONS) for _ in temperatures]
+    return temperatures, conditions
+
+
+def timed(label: str, size: int, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>32}: {size / elapsed:>14,.0f} values/s")
+
+
+def main(size: int):
+    temperatures, conditions = random_inputs(size, random.Random(1))
+    size = len(temperatures)
+    timed("scalar get_temperature_type", size, lambda: [get_temperature_type(t) for t in temperatures])
+    timed("classify_temperatures", size, lambda: classify_temperatures(temperatures))
+    timed("scalar default advice", size,
+          lambda: [get_default_clothing_advice(t, c) for t, c in zip(temperatures, conditions)])
+    timed("default_clothing_advice", size, lambda: default_clothing_advice(temperatures, conditions))
+
+    import numpy as np
+    temperature_array = np.asarray(temperatures)
+    code_array = np.asarray([CONDITIONS.index(condition) for condition in conditions])
+    timed("classify_temperatures (ndarray)", size, lambda: classify_temperatures(temperature_array))
+    timed("default_clothing_advice (codes)", size,
+          lambda: default_clothing_advice(temperature_array, code_array, CONDITIONS))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,46 @@
+# Benchmark: bulk wardrobe import and export throughput (rows/sec) on a temporary database.
+# Run from the project root:  python benchmarks/bench_wardrobe_import.py [rows]
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+
+from sqlmodel import create_engine
+
+from weather_assistant.wardrobe_io import WardrobeImporter, export_lines
+from weather_assistant.weather_assistant import Items, clothing_types, temperature_types
+
+
+def csv_lines(rows: int):
+    rng = random.Random(0)
+    yield "type,name,suitable_temperature,is_waterproof"
+    for i in range(rows):
+        yield f"{rng.choice(clothing_types)},item {i},{rng.choice(temperature_types)},{rng.random() < 0.3}"
+
+
+def main(rows: int):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Items.metadata.create_all(engine)
+
+        importer = WardrobeImporter("csv", clothing_types, temperature_types)
+        start = time.perf_counter()
+        result = importer.run(engine, Items, csv_lines(rows))
+        elapsed = time.perf_counter() - start
+        print(f"import: {result['inserted']} rows in {elapsed:.2f} s, "
+              f"{result['inserted'] / elapsed:,.0f} rows/s ({len(result['errors'])} errors)")
+
+        for file_format in ("csv", "jsonl"):
+            start = time.perf_counter()
+            size = sum(len(chunk) for chunk in export_lines(engine, Items, file_format))
+            elapsed = time.perf_counter() - start
+            print(f"export {file_format}: {rows} rows ({size / 1e6:.1f} MB) in {elapsed:.2f} s, "
+                  f"{rows / elapsed:,.0f} rows/s")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
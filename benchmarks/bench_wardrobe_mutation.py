@@ -0,0 +1,74 @@
+# Benchmark: latency of a single wardrobe mutation.
+# "before" is the old path (commit + a full compile of a new rx.App), "after" is the
+# incremental path (commit + State.fetch_data()).
+# Runs against a temporary database, and compiles into a temporary directory (the compiler writes .web/ there).
+# The compile leaves out the installation of the frontend packages: Reflex caches it, so in a running app
+# only the first compile installs them, not the compile after each mutation.
+# Run from the project root:  python benchmarks/bench_wardrobe_mutation.py
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+
+import reflex as rx
+
+ROUNDS = 5
+WARDROBE_ID = "bench"
+
+
+def add_item(wa, name):
+    with wa.get_session() as session:
+        session.add(wa.Items(wardrobe_id=WARDROBE_ID, type="Top", name=name, suitable_temperature="Warm", is_waterproof=False))
+        session.commit()
+
+
+def before(wa, i):
+    add_item(wa, f"bench-before-{i}")
+    app = rx.App()
+    app.compile_()
+
+
+def after(wa, state, i):
+    add_item(wa, f"bench-after-{i}")
+    state.fetch_data()
+
+
+def report(label, timings):
+    print(f"{label:>7}: median {statistics.median(timings) * 1000:9.2f} ms, "
+          f"max {max(timings) * 1000:9.2f} ms over {len(timings)} mutations")
+
+
+def main(wa):
+    state = wa.State()
+    state.wardrobe_id = WARDROBE_ID
+    results = {"before": [], "after": []}
+    for i in range(ROUNDS):
+        start = time.perf_counter()
+        before(wa, i)
+        results["before"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        after(wa, state, i)
+        results["after"].append(time.perf_counter() - start)
+
+    report("before", results["before"])
+    report("after", results["after"])
+    if state.item_count != 2 * ROUNDS:
+        sys.exit(f"the wardrobe shows {state.item_count} items after {2 * ROUNDS} mutations")
+    wa.dispose_engine()
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DB_URL"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        os.environ["WEATHER_ARCHIVE_DIR"] = ""
+
+        from weather_assistant import weather_assistant
+
+        os.chdir(directory)
+        os.mkdir(".web")
+        rx.App.get_frontend_packages = lambda app, imports: None
+        main(weather_assistant)
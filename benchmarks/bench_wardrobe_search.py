@@ -0,0 +1,83 @@
+# Benchmark: server-side wardrobe search, filter and sort on a large database.
+# Fills a temporary database with many wardrobes, then times the page queries of one wardrobe for every
+# keystroke of a search, with a filter and with each sort order. Checks the results against a plain
+# Python search over the same items (exits non-zero if they differ).
+# Run from the project root:  python benchmarks/bench_wardrobe_search.py [items in the wardrobe] [other items]
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+
+from sqlalchemy import insert
+from sqlmodel import func, select
+
+WORDS = ["blue", "red", "green", "black", "linen", "wool", "rain", "summer", "winter", "denim", "silk", "shirt",
+         "jeans", "boots", "sneakers", "scarf", "jacket", "coat", "dress", "skirt", "hat", "socks", "sweater"]
+
+
+def main(wardrobe_items: int, other_items: int):
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DB_URL"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        from weather_assistant import weather_assistant as wa
+
+        rng = random.Random(0)
+        rows = []
+        for i in range(wardrobe_items + other_items):
+            rows.append({
+                "wardrobe_id": "bench" if i < wardrobe_items else f"other-{i % 5000}",
+                "type": rng.choice(wa.clothing_types),
+                "name": " ".join(rng.sample(WORDS, 2)),
+                "suitable_temperature": rng.choice(wa.temperature_types),
+                "is_waterproof": rng.random() < 0.3,
+            })
+        # the items of all wardrobes are added in between each other
+        rng.shuffle(rows)
+        engine = wa.get_engine()
+        with engine.begin() as connection:
+            for start in range(0, len(rows), 50_000):
+                connection.execute(insert(wa.Items), rows[start:start + 50_000])
+        items = [row for row in rows if row["wardrobe_id"] == "bench"]
+
+        state = wa.State()
+        state.wardrobe_id = "bench"
+
+        def timed(label: str, change):
+            timings = []
+            for _ in range(20):
+                start = time.perf_counter()
+                change()
+                timings.append(time.perf_counter() - start)
+            print(f"{label:>36}: {statistics.median(timings) * 1000:7.2f} ms, {state.item_count:>6} matches")
+
+        for prefix in ["s", "sh", "shi", "shir", "shirt", "shirt b", "shirt bl"]:
+            timed(f"search {prefix!r}", lambda: state.set_search_query(prefix))
+            terms = prefix.split()
+            expected = sum(
+                1 for item in items
+                if all(any(word.startswith(term) for word in (item["name"] + " " + item["type"]).lower().split())
+                       for term in terms)
+            )
+            if state.item_count != expected:
+                sys.exit(f"search {prefix!r} found {state.item_count} items, expected {expected}")
+
+        state.set_search_query("")
+        timed("filter type=Top", lambda: state.set_filter_type("Top"))
+        state.set_filter_type("All")
+        for column in wa.WARDROBE_SORT_COLUMNS:
+            timed(f"sort by {column}", lambda: state.set_sort_column(column))
+            timed(f"sort by {column}, next page", state.next_page)
+
+        with wa.get_session() as session:
+            total = session.exec(select(func.count(wa.Items.id))).one()
+        print(f"{len(items)} items in the wardrobe, {total} items in the database")
+        wa.dispose_engine()
+
+
+if __name__ == "__main__":
+    wardrobe_items = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    other_items = int(sys.argv[2]) if len(sys.argv) > 2 else 500_000
+    main(wardrobe_items, other_items)
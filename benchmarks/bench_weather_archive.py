@@ -0,0 +1,138 @@
+# Benchmark: the weather archive (append, lookups, reopening) and the warm start of the weather cache.
+# Appends many weather responses with small segments so that the archive rotates and stays within its bound,
+# checks the lookups against the appended responses (also after reopening the archive with a torn last record),
+# checks that a restarted app serves archived cities from the cache without calling the provider, and that
+# the replay provider answers with the archived weather. Exits non-zero if a check fails.
+# Run from the project root:  python benchmarks/bench_weather_archive.py [responses] [cities]
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, ".")
+
+os.environ["WEATHER_PROVIDER"] = "stub"
+os.environ["STUB_WEATHER_LATENCY"] = "0"
+os.environ["GAZETTEER_PATH"] = ""
+
+from weather_assistant.providers import ReplayWeatherProvider, StubWeatherProvider
+from weather_assistant.weather_archive import SEGMENT_SUFFIX, WeatherArchive
+
+SEGMENT_BYTES = 256 << 10
+MAX_BYTES = 2 << 20
+
+
+def responses(count: int, cities: int):
+    rng = random.Random(0)
+    for number in range(count):
+        city = f"City {rng.randrange(cities)}"
+        payload = StubWeatherProvider.weather_payload(city)
+        payload["main"]["temp"] = round(payload["main"]["temp"] + rng.uniform(-3, 3), 2)
+        payload["dt"] = 1700000000 + number * 60
+        yield 1700000000.0 + number * 60, city, json.dumps(payload).encode()
+
+
+def check(archive: WeatherArchive, appended: list, label: str):
+    kept = list(archive.replay())
+    if [record[:2] for record in kept] != [record[:2] for record in appended[len(appended) - len(kept):]]:
+        sys.exit(f"{label}: the archive does not hold the latest responses in append order")
+    latest = {}
+    for fetched_at, city, payload in kept:
+        latest[city] = (fetched_at, payload)
+    for city, expected in latest.items():
+        if archive.latest(city) != expected:
+            sys.exit(f"{label}: latest response of {city} differs")
+    city = kept[-1][1]
+    start, end = kept[0][0], kept[-1][0]
+    expected = [(fetched_at, payload) for fetched_at, name, payload in kept if name == city and start <= fetched_at <= end]
+    if archive.history(city, start, end) != expected:
+        sys.exit(f"{label}: history of {city} differs")
+    return kept
+
+
+async def warm_start(directory: str, cities: list[str]):
+    os.environ["WEATHER_ARCHIVE_DIR"] = directory
+    from weather_assistant import weather_assistant as wa
+
+    first = [await wa.fetch_weather(city) for city in cities]
+
+    # restart: an empty cache and a freshly opened archive
+    wa.weather_cache.clear()
+    wa.close_weather_archive()
+    start = time.perf_counter()
+    warmed = wa.warm_weather_cache()
+    warm_seconds = time.perf_counter() - start
+
+    calls = []
+    fetch = wa.weather_provider.fetch
+
+    async def counting_fetch(city):
+        calls.append(city)
+        return await fetch(city)
+
+    wa.weather_provider.fetch = counting_fetch
+    second = [await wa.fetch_weather(city) for city in cities]
+    if warmed != len(cities) or calls or second != first:
+        sys.exit(f"warm start: {warmed} cities warmed, {len(calls)} provider calls after the restart")
+    print(f"warm start: {warmed} cities in {warm_seconds * 1000:.1f} ms, no provider calls after the restart")
+
+    replay = ReplayWeatherProvider(wa.get_weather_archive)
+    replayed = [await replay.fetch(city) for city in cities]
+    if replayed != first or await replay.fetch("Atlantis") is not None:
+        sys.exit("the replay provider does not answer with the archived weather")
+    print("replay provider answers with the archived weather")
+    wa.close_weather_archive()
+
+
+def main(count: int, cities: int):
+    with tempfile.TemporaryDirectory() as directory:
+        records = list(responses(count, cities))
+        raw_bytes = sum(len(payload) for _, _, payload in records)
+
+        archive = WeatherArchive(os.path.join(directory, "bench"), segment_bytes=SEGMENT_BYTES, max_bytes=MAX_BYTES)
+        start = time.perf_counter()
+        for fetched_at, city, payload in records:
+            archive.append(city, payload, fetched_at=fetched_at)
+        append_seconds = time.perf_counter() - start
+        stats = archive.stats()
+        if stats["bytes"] > MAX_BYTES + SEGMENT_BYTES:
+            sys.exit(f"the archive uses {stats['bytes']} bytes, above its bound")
+        kept = check(archive, records, "appended")
+
+        names = [city for _, city, _ in kept[-10000:]]
+        start = time.perf_counter()
+        for city in names:
+            archive.latest(city)
+        latest_seconds = time.perf_counter() - start
+        archive.close()
+
+        # a torn last record, as after a crash during an append
+        segments = sorted(name for name in os.listdir(os.path.join(directory, "bench")) if name.endswith(SEGMENT_SUFFIX))
+        with open(os.path.join(directory, "bench", segments[-1]), "ab") as file:
+            file.write(b"\x00" * 7)
+        start = time.perf_counter()
+        reopened = WeatherArchive(os.path.join(directory, "bench"), segment_bytes=SEGMENT_BYTES, max_bytes=MAX_BYTES)
+        reopen_seconds = time.perf_counter() - start
+        check(reopened, records, "reopened")
+        reopened.close()
+
+        plain = sum(len(zlib.compress(payload, 9)) for _, _, payload in records[:1000]) / 1000
+        print(f"{count} responses of {cities} cities, {stats['appended_payload_bytes'] / count:.0f} bytes each")
+        print(f"  append         {append_seconds / count * 1e6:8.1f} µs/response")
+        print(f"  latest         {latest_seconds / len(names) * 1e6:8.1f} µs/lookup")
+        print(f"  reopen         {reopen_seconds * 1000:8.1f} ms ({len(kept)} responses indexed)")
+        print(f"  on disk        {stats['appended_bytes'] / count:8.1f} bytes/response "
+              f"(zlib without the dictionary: {plain:.0f}, raw: {raw_bytes / count:.0f})")
+        print(f"  {stats['segments']} segments, {stats['bytes']} bytes, {stats['dropped_segments']} segments rotated out")
+
+        asyncio.run(warm_start(os.path.join(directory, "app"), [f"City {number}" for number in range(50)]))
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    cities = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    main(count, cities)
@@ -0,0 +1,62 @@
+# Benchmark: latency of concurrent weather lookups against the stub weather provider.
+# Every lookup is for a different city, so neither the cache nor single-flight can help.
+# By default the OpenWeatherMap provider talks to the local stub server (measuring the pooled async client);
+# the server runs in its own process, so it does not compete with the measured lookups for the event loop.
+# With --in-process the StubWeatherProvider answers without any network.
+# Run from the project root:  python benchmarks/bench_weather_fetch.py [lookups] [upstream delay in s] [--in-process]
+import asyncio
+import contextlib
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from benchmarks.stub_server import forecast_url, stub_server_process
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+# With url None, the lookups are answered in process by the StubWeatherProvider.
+async def main(lookups: int, delay: float, url: str = None):
+    # made-up city names: the gazetteer is turned off so that they are looked up
+    os.environ["GAZETTEER_PATH"] = ""
+    os.environ["WEATHER_ARCHIVE_DIR"] = ""
+    if url is None:
+        os.environ["WEATHER_PROVIDER"] = "stub"
+        os.environ["STUB_WEATHER_LATENCY"] = str(delay)
+    else:
+        os.environ["WEATHER_API_URL"] = url
+        os.environ["FORECAST_API_URL"] = forecast_url(url)
+    from weather_assistant import weather_assistant as wa
+
+    async def lookup(i):
+        start = time.perf_counter()
+        report = await wa.fetch_weather(f"City {i}")
+        assert report is not None
+        return time.perf_counter() - start
+
+    wa.weather_cache.clear()
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(lookup(i) for i in range(lookups)))
+    elapsed = time.perf_counter() - start
+    await wa.weather_client.aclose()
+
+    print(f"{lookups} concurrent lookups, provider {wa.weather_provider.name}"
+          f"{' (in process)' if url is None else ' (local HTTP)'}, upstream delay {delay * 1000:.0f} ms")
+    print(f"  total {elapsed * 1000:.1f} ms, {lookups / elapsed:.0f} lookups/s")
+    print(f"  p50 {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p99 {percentile(latencies, 99) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    arguments = [argument for argument in sys.argv[1:] if not argument.startswith("--")]
+    lookups = int(arguments[0]) if len(arguments) > 0 else 200
+    delay = float(arguments[1]) if len(arguments) > 1 else 0.05
+    in_process = "--in-process" in sys.argv
+    with contextlib.nullcontext() if in_process else stub_server_process(delay) as url:
+        asyncio.run(main(lookups, delay, url))
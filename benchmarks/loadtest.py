@@ -0,0 +1,226 @@
+# Load test: simulated browser sessions drive the State event handlers end to end, concurrently.
+# Every session has its own State and wardrobe and runs a fixed, seeded mix of weather lookups, clothing advice,
+# wardrobe browsing and wardrobe add/edit/delete against the offline stub weather provider, a temporary
+# SQLite database and a temporary weather archive. Async handlers run on the event loop as in Reflex; the synchronous database handlers run on
+# a thread pool, standing in for the concurrent events of several workers.
+# Reports throughput, p50/p95/p99 latency per handler and the database write contention (the time write
+# statements take, which includes waiting for the SQLite write lock, and "database is locked" errors).
+# Exits non-zero if any handler failed or if the p99 latency is above --max-p99.
+# Run from the project root:  python benchmarks/loadtest.py [--sessions 50] [--iterations 40] [--latency 0.05]
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, ".")
+
+# share of each handler in the mix of a session
+OPERATIONS = {
+    "lookup": 40,
+    "advice": 15,
+    "browse": 15,
+    "add": 15,
+    "edit": 10,
+    "delete": 5,
+}
+ITEMS_PER_WARDROBE = 20
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+# Write statement timings and lock errors, from SQLAlchemy engine events.
+class ContentionMonitor:
+    def __init__(self, engine):
+        self.write_seconds: list[float] = []
+        self.lock_errors = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        from sqlalchemy import event
+        event.listen(engine, "before_cursor_execute", self.before_execute)
+        event.listen(engine, "after_cursor_execute", self.after_execute)
+        event.listen(engine, "handle_error", self.handle_error)
+
+    def before_execute(self, connection, cursor, statement, parameters, context, executemany):
+        self._local.start = time.perf_counter()
+
+    def after_execute(self, connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip()[:6].upper() in ("INSERT", "UPDATE", "DELETE"):
+            with self._lock:
+                self.write_seconds.append(time.perf_counter() - self._local.start)
+
+    def handle_error(self, context):
+        if "locked" in str(context.original_exception):
+            with self._lock:
+                self.lock_errors += 1
+
+
+class LoadTest:
+    def __init__(self, wa, cities: list[str], threads: int):
+        self.wa = wa
+        self.cities = cities
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+        self.timings: dict[str, list[float]] = {name: [] for name in OPERATIONS}
+        self.errors: dict[str, list[str]] = {name: [] for name in OPERATIONS}
+
+    async def run_sync(self, handler, *arguments):
+        await asyncio.get_running_loop().run_in_executor(self.executor, handler, *arguments)
+
+    async def lookup(self, state, rng):
+        state.cityname_input = rng.choice(self.cities)
+        await state.handle_key_press("Enter")
+
+    async def advice(self, state, rng):
+        if state._weather is None:
+            return await self.lookup(state, rng)
+        await self.run_sync(state.set_clothing_advice)
+
+    async def browse(self, state, rng):
+        if rng.random() < 0.5:
+            await self.run_sync(state.next_page)
+        else:
+            await self.run_sync(state.set_search_query, rng.choice(["", "top", "sh", "item 1"]))
+
+    def choose_item(self, state, rng, prefix: str):
+        setattr(state, f"{prefix}_type", rng.choice(self.wa.clothing_types))
+        setattr(state, f"{prefix}_suitable_temperature", rng.choice(self.wa.temperature_types))
+        setattr(state, f"{prefix}_is_waterproof", rng.choice(["True", "False"]))
+
+    async def add(self, state, rng):
+        self.choose_item(state, rng, "selected")
+        await self.run_sync(state.handle_add_submit, {"name": f"item {rng.randrange(1000)}"})
+
+    async def edit(self, state, rng):
+        if not state.latest_item_id:
+            return await self.add(state, rng)
+        self.choose_item(state, rng, "reselected")
+        await self.run_sync(
+            state.handle_edit_submit, {"edit_id": str(state.latest_item_id), "edit_name": f"item {rng.randrange(1000)}"}
+        )
+
+    async def delete(self, state, rng):
+        await self.run_sync(state.delete_latest_item)
+
+    async def session(self, number: int, iterations: int, seed: int):
+        rng = random.Random(seed * 100_003 + number)
+        state = self.wa.State()
+        state.wardrobe_id = f"load-{number}"
+        await self.run_sync(state.fetch_data)
+        names = list(OPERATIONS)
+        for name in rng.choices(names, weights=[OPERATIONS[name] for name in names], k=iterations):
+            start = time.perf_counter()
+            try:
+                await getattr(self, name)(state, rng)
+            except Exception as error:
+                self.errors[name].append(f"{type(error).__name__}: {error}")
+                continue
+            self.timings[name].append(time.perf_counter() - start)
+
+
+# Every wardrobe starts with some items (not timed).
+def fill_wardrobes(wa, sessions: int, seed: int):
+    from sqlalchemy import insert
+    rng = random.Random(seed)
+    rows = [
+        {
+            "wardrobe_id": f"load-{number}",
+            "type": rng.choice(wa.clothing_types),
+            "name": f"item {i}",
+            "suitable_temperature": rng.choice(wa.temperature_types),
+            "is_waterproof": rng.random() < 0.3,
+        }
+        for number in range(sessions)
+        for i in range(ITEMS_PER_WARDROBE)
+    ]
+    with wa.get_engine().begin() as connection:
+        connection.execute(insert(wa.Items), rows)
+
+
+def report_latency(label: str, timings: list[float], errors: int):
+    if not timings:
+        print(f"  {label:<8} {0:>6} {errors:>7}")
+        return
+    print(
+        f"  {label:<8} {len(timings):>6} {errors:>7} "
+        f"{percentile(timings, 50) * 1000:9.2f} {percentile(timings, 95) * 1000:9.2f} "
+        f"{percentile(timings, 99) * 1000:9.2f} {max(timings) * 1000:9.2f}"
+    )
+
+
+async def main(arguments) -> int:
+    from weather_assistant.gazetteer import get_gazetteer
+    from weather_assistant import weather_assistant as wa
+
+    fill_wardrobes(wa, arguments.sessions, arguments.seed)
+    for number in range(arguments.sessions):
+        wa.load_recommendation_index(f"load-{number}")
+    monitor = ContentionMonitor(wa.get_engine())
+    gazetteer = get_gazetteer()
+    if gazetteer is not None:
+        cities = [city.name for city in gazetteer.cities[:arguments.cities]]
+    else:
+        cities = [f"City {number}" for number in range(arguments.cities)]
+    load_test = LoadTest(wa, cities, arguments.threads)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        load_test.session(number, arguments.iterations, arguments.seed) for number in range(arguments.sessions)
+    ])
+    elapsed = time.perf_counter() - start
+    load_test.executor.shutdown()
+
+    timings = [timing for name in OPERATIONS for timing in load_test.timings[name]]
+    errors = {name: messages for name, messages in load_test.errors.items() if messages}
+    error_count = sum(len(messages) for messages in errors.values())
+    print(f"{arguments.sessions} sessions x {arguments.iterations} events, {arguments.threads} database threads, "
+          f"{len(cities)} cities, stub latency {arguments.latency * 1000:.0f} ms, seed {arguments.seed}")
+    print(f"throughput {len(timings) / elapsed:8.1f} events/s ({len(timings)} events in {elapsed:.2f} s)")
+    print(f"  {'handler':<8} {'count':>6} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name in OPERATIONS:
+        report_latency(name, load_test.timings[name], len(load_test.errors[name]))
+    report_latency("all", timings, error_count)
+
+    writes = monitor.write_seconds
+    print(f"database: {len(writes)} write statements, {monitor.lock_errors} 'database is locked' errors")
+    if writes:
+        print(f"  write statement p50 {percentile(writes, 50) * 1000:.2f} ms, p99 {percentile(writes, 99) * 1000:.2f} ms, "
+              f"max {max(writes) * 1000:.2f} ms, {sum(writes):.2f} s in total")
+    print(f"weather cache {wa.weather_cache.stats()}")
+    print(f"weather archive {wa.get_weather_archive().stats()}")
+    wa.dispose_engine()
+    wa.close_weather_archive()
+
+    for name, messages in errors.items():
+        print(f"{name}: {len(messages)} errors, first: {messages[0]}")
+    if error_count:
+        return 1
+    if arguments.max_p99 is not None and percentile(timings, 99) * 1000 > arguments.max_p99:
+        print(f"p99 latency {percentile(timings, 99) * 1000:.2f} ms is above the budget of {arguments.max_p99:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test of the weather assistant event handlers.")
+    parser.add_argument("--sessions", type=int, default=50, help="concurrent simulated sessions")
+    parser.add_argument("--iterations", type=int, default=40, help="events per session")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub weather provider latency in seconds")
+    parser.add_argument("--threads", type=int, default=8, help="threads running the database handlers")
+    parser.add_argument("--cities", type=int, default=100, help="distinct cities looked up")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-p99", type=float, default=None, help="fail if the p99 latency is above this (ms)")
+    arguments = parser.parse_args()
+
+    os.environ["WEATHER_PROVIDER"] = "stub"
+    os.environ["STUB_WEATHER_LATENCY"] = str(arguments.latency)
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DB_URL"] = f"sqlite:///{os.path.join(directory, 'loadtest.db')}"
+        os.environ["WEATHER_ARCHIVE_DIR"] = os.path.join(directory, "weather_archive")
+        sys.exit(asyncio.run(main(arguments)))
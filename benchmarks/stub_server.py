@@ -0,0 +1,93 @@
+# A local stub of the OpenWeatherMap current-weather and forecast endpoints for offline benchmarks.
+# It serves the deterministic payloads of StubWeatherProvider over HTTP after `delay` seconds,
+# so the OpenWeatherMap provider can be load tested without the real API. Keep-alive connections are supported.
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import sys
+import time
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, ".")
+
+from weather_assistant.providers import StubWeatherProvider
+
+
+async def handle_connection(reader, writer, delay):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            # skip the headers
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+
+            target = urlsplit(request_line.split()[1].decode())
+            city = parse_qs(target.query).get("q", [""])[0]
+            if delay:
+                await asyncio.sleep(delay)
+
+            if not StubWeatherProvider.is_known(city):
+                status, body = "404 Not Found", {"cod": "404", "message": "city not found"}
+            elif target.path.endswith("/forecast"):
+                status, body = "200 OK", StubWeatherProvider.forecast_payload(city, int(time.time()))
+            else:
+                status, body = "200 OK", StubWeatherProvider.weather_payload(city)
+            content = json.dumps(body).encode()
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(content)}\r\nConnection: keep-alive\r\n\r\n".encode() + content
+            )
+            await writer.drain()
+    except (ConnectionResetError, BrokenPipeError):
+        pass
+    finally:
+        writer.close()
+
+
+# Start the stub server on a free local port and return (server, base_url).
+async def start_stub_server(delay: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+    server = await asyncio.start_server(lambda r, w: handle_connection(r, w, delay), host, port)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"http://{host}:{port}/data/2.5/weather"
+
+
+def serve_stub_server(delay: float, host: str, port: int, urls):
+    async def serve():
+        server, url = await start_stub_server(delay, host, port)
+        urls.put(url)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+# Run the stub server in a separate process and yield its base URL. A benchmark then measures its own client,
+# not the client and the server taking turns on one event loop.
+@contextlib.contextmanager
+def stub_server_process(delay: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+    urls = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve_stub_server, args=(delay, host, port, urls), daemon=True)
+    process.start()
+    try:
+        yield urls.get(timeout=30)
+    finally:
+        process.terminate()
+        process.join()
+
+
+# The forecast endpoint of a stub server started by start_stub_server.
+def forecast_url(weather_url: str) -> str:
+    return weather_url.rsplit("/", 1)[0] + "/forecast"
+
+
+if __name__ == "__main__":
+    async def main():
+        server, url = await start_stub_server()
+        print(f"Stub weather API listening on {url}")
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
@@ -1,6 +1,10 @@
 import reflex as rx
+from dotenv import load_dotenv
+
+# Read the API key and the settings from the .env file. Reflex loads this config before the app.
+load_dotenv()
 
 config = rx.Config(
     app_name="weather_assistant",
     db_url="sqlite:///reflex.db",
-)
\ No newline at end of file
+)
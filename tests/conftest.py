@@ -0,0 +1,41 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# The tests import the app package from the project root, like the benchmarks.
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+# The tests never use the database, the weather archive or the weather service of the developer.
+# (Set before the app is imported: Reflex reads DB_URL once, when the config is first loaded.)
+os.environ["DB_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='weather_assistant_tests_'), 'test.db')}"
+os.environ["WEATHER_ARCHIVE_DIR"] = ""
+os.environ["WEATHER_PROVIDER"] = "stub"
+os.environ["STUB_WEATHER_LATENCY"] = "0"
+
+
+# A clock for the classes that take one (TTLs): it stands still until the test moves `now`.
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+# Recorded weather service responses (tests/fixtures/openweathermap/<name>.json), as raw bytes.
+@pytest.fixture
+def recorded():
+    def load(name: str) -> bytes:
+        return (FIXTURES / "openweathermap" / f"{name}.json").read_bytes()
+    return load
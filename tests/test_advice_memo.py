@@ -0,0 +1,41 @@
+from weather_assistant.advice_memo import AdviceMemo
+from weather_assistant.weather_cache import MISSING
+
+
+def test_bump_invalidates():
+    memo = AdviceMemo()
+    version = memo.version("w")
+    memo.put("w", "Cool", True, version, "advice")
+    assert memo.get("w", "Cool", True, memo.version("w")) == "advice"
+    memo.bump("w")
+    assert memo.get("w", "Cool", True, memo.version("w")) is MISSING
+
+
+# Advice computed while the wardrobe changed is stored under the old version and never served.
+def test_advice_computed_before_a_change_is_not_served():
+    memo = AdviceMemo()
+    version = memo.version("w")
+    memo.bump("w")
+    memo.put("w", "Cool", True, version, "old advice")
+    assert memo.get("w", "Cool", True, memo.version("w")) is MISSING
+
+
+# Changes made through other workers do not bump this worker's versions: entries expire.
+def test_entries_expire(clock):
+    memo = AdviceMemo(ttl=30, clock=clock)
+    memo.put("w", "Cool", True, memo.version("w"), "advice")
+    clock.now += 29
+    assert memo.get("w", "Cool", True, memo.version("w")) == "advice"
+    clock.now += 1
+    assert memo.get("w", "Cool", True, memo.version("w")) is MISSING
+    assert memo.stats() == {"hits": 1, "misses": 1, "size": 0}
+
+
+def test_least_recently_used_entry_is_dropped():
+    memo = AdviceMemo(max_size=2)
+    for temperature_type in ("Cool", "Warm"):
+        memo.put("w", temperature_type, True, 0, temperature_type)
+    memo.get("w", "Cool", True, 0)
+    memo.put("w", "Hot", True, 0, "Hot")
+    assert memo.get("w", "Warm", True, 0) is MISSING
+    assert memo.get("w", "Cool", True, 0) == "Cool"
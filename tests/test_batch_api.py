@@ -0,0 +1,45 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from weather_assistant import weather_assistant as wa
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(wa.app.api)
+
+
+@pytest.mark.parametrize("body", [
+    {"cities": "Paris"},
+    {"cities": None},
+    {"cities": ["Paris", None]},
+    {"cities": ["Paris", 42]},
+    {"cities": ["Paris", "  "]},
+    {"city": ["Paris"]},
+    ["Paris"],
+])
+def test_invalid_cities_are_rejected(client, body):
+    response = client.post("/api/weather/batch", json=body)
+    assert response.status_code == 422, response.text
+
+
+def test_body_that_is_not_json(client):
+    response = client.post("/api/weather/batch", content=b"Paris")
+    assert response.status_code == 400
+
+
+def test_too_many_cities(client):
+    response = client.post("/api/weather/batch", json={"cities": ["Paris"] * (wa.MAX_BATCH_CITIES + 1)})
+    assert response.status_code == 400
+
+
+def test_one_line_per_city(client):
+    response = client.post("/api/weather/batch", json={"cities": ["Paris", "Unknown town", "Oslo"]})
+    assert response.status_code == 200
+    lines = sorted((json.loads(line) for line in response.text.splitlines()), key=lambda line: line["index"])
+    assert [(line["index"], line["city"], line["found"]) for line in lines] == [
+        (0, "Paris", True), (1, "Unknown town", False), (2, "Oslo", True),
+    ]
+    assert lines[0]["country"] == "XX" and lines[0]["clothing_advice"]
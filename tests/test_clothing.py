@@ -0,0 +1,67 @@
+import math
+import random
+import sys
+
+import pytest
+
+from weather_assistant.clothing import (
+    TEMPERATURE_THRESHOLDS,
+    classify_temperatures,
+    default_clothing_advice,
+    get_default_clothing_advice,
+    get_temperature_type,
+)
+
+CONDITIONS = ["clear", "clouds", "rain", "light rain", "snow", "snow showers", "drizzle", "mist", ""]
+
+
+# Random temperatures, every threshold and the values around it, whole degrees, and the special floats.
+def temperatures(rng: random.Random, size: int = 1000) -> list[float]:
+    values = [rng.uniform(-40, 50) for _ in range(size)]
+    for threshold in TEMPERATURE_THRESHOLDS:
+        values += [threshold - 1e-9, threshold, threshold + 1e-9, threshold + 0.5, threshold + 1, threshold + 1.5]
+    values += list(range(-30, 50)) + [-0.5, -0.0, math.nan, math.inf, -math.inf]
+    return values
+
+
+@pytest.fixture(params=["numpy", "without numpy"])
+def numpy_available(request, monkeypatch):
+    if request.param == "without numpy":
+        # the vectorized functions fall back to the scalar ones
+        monkeypatch.setitem(sys.modules, "numpy", None)
+    return request.param
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_vectorized_functions_match_the_scalar_functions(seed, numpy_available):
+    rng = random.Random(seed)
+    values = temperatures(rng)
+    conditions = [rng.choice(CONDITIONS) for _ in values]
+    expected_advice = [get_default_clothing_advice(t, c) for t, c in zip(values, conditions)]
+
+    assert list(classify_temperatures(values)) == [get_temperature_type(t) for t in values]
+    assert list(default_clothing_advice(values, conditions)) == expected_advice
+    codes = [CONDITIONS.index(condition) for condition in conditions]
+    assert list(default_clothing_advice(values, codes, CONDITIONS)) == expected_advice
+
+
+@pytest.mark.parametrize("temperature, temperature_type", [
+    (-5, "Freeze"), (0, "Freeze"), (0.9, "Freeze"), (-0.5, "Freeze"), (1, "Cold"), (10.9, "Cold"), (11, "Cool"),
+    (20.7, "Cool"), (21, "Warm"), (30.99, "Warm"), (31, "Hot"), (math.inf, "Hot"), (-math.inf, "Freeze"),
+    (math.nan, "Freeze"),
+])
+def test_temperature_bands(temperature, temperature_type):
+    assert get_temperature_type(temperature) == temperature_type
+    assert list(classify_temperatures([temperature])) == [temperature_type]
+
+
+# The app classifies the whole degrees it shows (int() of the temperature), the vectorized path must agree.
+def test_classified_like_the_displayed_temperature():
+    rng = random.Random(0)
+    values = [rng.uniform(-40, 50) for _ in range(1000)]
+    assert list(classify_temperatures(values)) == [get_temperature_type(int(t)) for t in values]
+
+
+def test_empty_input():
+    assert list(classify_temperatures([])) == []
+    assert list(default_clothing_advice([], [])) == []
@@ -0,0 +1,72 @@
+import dataclasses
+import json
+
+import pytest
+
+from weather_assistant.forecast_store import ForecastReading, ForecastStore
+from weather_assistant.providers import parse_openweathermap_forecast
+
+HOUR = 3600
+
+
+@pytest.fixture
+def london(recorded) -> list[ForecastReading]:
+    return parse_openweathermap_forecast(json.loads(recorded("forecast_london")))
+
+
+def test_ingest_and_range(london):
+    store = ForecastStore()
+    store.ingest("london", list(reversed(london)), now=london[0].timestamp)
+
+    assert store.range("london", 0, 2 ** 40) == london
+    assert store.range("london", london[1].timestamp, london[3].timestamp) == london[1:3]
+    assert store.range("london", london[1].timestamp + 1, london[2].timestamp) == []
+    assert store.range("paris", 0, 2 ** 40) == []
+    assert store.fetched_at("london") == london[0].timestamp
+    assert store.fetched_at("paris") == 0
+    assert len(store) == 4
+
+
+# The readings come back as they were ingested, not rounded to single precision.
+def test_values_are_exact(london):
+    store = ForecastStore()
+    store.ingest("london", london, now=london[0].timestamp)
+    assert [reading.temperature for reading in store.range("london", 0, 2 ** 40)] == [12.9, 11.2, 9.85, 8.4]
+    assert store.range("london", 0, 2 ** 40)[0].wind_speed == 5.3
+
+
+# A new forecast replaces the stored readings of its time span and keeps the others.
+def test_ingest_replaces_the_same_time_span(london):
+    store = ForecastStore()
+    store.ingest("london", london, now=london[0].timestamp)
+    update = [
+        dataclasses.replace(reading, temperature=reading.temperature + 1, weather_condition="snow")
+        for reading in london[1:3]
+    ]
+    store.ingest("london", update, now=london[1].timestamp)
+
+    assert store.range("london", 0, 2 ** 40) == [london[0], *update, london[3]]
+    assert store.fetched_at("london") == london[1].timestamp
+
+
+def test_ingest_extends_the_series(london):
+    store = ForecastStore()
+    store.ingest("london", london[:2], now=london[0].timestamp)
+    store.ingest("london", london[2:], now=london[0].timestamp)
+    assert store.range("london", 0, 2 ** 40) == london
+
+
+# Readings older than the retention are pruned on ingest, and cities without readings are dropped.
+def test_prune(london):
+    store = ForecastStore(retention=2 * HOUR)
+    store.ingest("london", london, now=london[0].timestamp)
+    store.ingest("paris", [dataclasses.replace(london[0], timestamp=london[0].timestamp - 10 * HOUR)],
+                 now=london[0].timestamp)
+    assert store.range("paris", 0, 2 ** 40) == []
+
+    store.ingest("oslo", london[3:], now=london[2].timestamp + HOUR)
+    assert store.range("london", 0, 2 ** 40) == london[2:]
+
+    store.prune(london[3].timestamp + 1)
+    assert store.range("london", 0, 2 ** 40) == []
+    assert len(store) == 0
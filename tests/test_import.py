@@ -0,0 +1,73 @@
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PACKAGE = "weather_assistant"
+RUNS = 3
+# median import time of the package's own modules, in ms (benchmarks/bench_import_time.py reports the details)
+BUDGET_MS = 150
+
+# Imports the app and exits non-zero if that had side effects (argv: the database file, the archive directory).
+IMPORT = f"""
+import os, sys
+import {PACKAGE}.weather_assistant as wa
+from {PACKAGE} import database, gazetteer, weather_archive
+problems = []
+if database._engine is not None:
+    problems.append("the database engine was created")
+if os.path.exists(sys.argv[1]):
+    problems.append("the database file was created")
+if wa.app.pages:
+    problems.append(f"pages were rendered: {{list(wa.app.pages)}}")
+if gazetteer._gazetteer is not None:
+    problems.append("the gazetteer was loaded")
+if weather_archive._archive is not None or os.path.exists(sys.argv[2]):
+    problems.append("the weather archive was opened")
+if problems:
+    sys.exit("import side effects: " + ", ".join(problems))
+"""
+
+
+# Self and cumulative import times in µs per module, from the -X importtime report on stderr.
+def parse_importtime(report: str) -> dict[str, tuple[int, int]]:
+    times = {}
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+# Import the app in a fresh interpreter; returns the -X importtime report, fails on import side effects.
+def import_app(tmp_path) -> dict[str, tuple[int, int]]:
+    database_path = tmp_path / "import.db"
+    archive_directory = tmp_path / "weather_archive"
+    environment = {
+        **os.environ,
+        "DB_URL": f"sqlite:///{database_path}",
+        "WEATHER_ARCHIVE_DIR": str(archive_directory),
+        "PYTHONDONTWRITEBYTECODE": "1",
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT, str(database_path), str(archive_directory)],
+        capture_output=True, text=True, env=environment, cwd=ROOT,
+    )
+    assert result.returncode == 0, result.stderr.strip().splitlines()[-1]
+    return parse_importtime(result.stderr)
+
+
+def test_import_has_no_side_effects(tmp_path):
+    import_app(tmp_path)
+    assert os.listdir(tmp_path) == []
+
+
+def test_import_time_within_budget(tmp_path):
+    own = []
+    for _ in range(RUNS):
+        times = import_app(tmp_path)
+        own.append(sum(self_us for name, (self_us, _) in times.items() if name.split(".")[0] == PACKAGE) / 1000)
+    assert statistics.median(own) <= BUDGET_MS, f"the package's own modules take {statistics.median(own):.1f} ms to import"
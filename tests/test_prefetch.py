@@ -0,0 +1,52 @@
+import asyncio
+
+from weather_assistant.prefetch import PopularityTracker, PrefetchScheduler
+from weather_assistant.weather_cache import WeatherCache, weather_cache_key
+
+
+def scheduler(cache: WeatherCache, tracker: PopularityTracker, refreshed: list, **options) -> PrefetchScheduler:
+    async def refresh(key, city):
+        refreshed.append(city)
+
+    return PrefetchScheduler(tracker, cache, refresh, **options)
+
+
+def test_expiring_cities_are_refreshed():
+    cache = WeatherCache(ttl=600)
+    tracker = PopularityTracker()
+    for city, ttl in (("Paris", 30), ("Oslo", 500)):
+        cache.put(weather_cache_key(city), {"city": city}, ttl=ttl)
+        tracker.record(weather_cache_key(city), city)
+    tracker.record(weather_cache_key("Lima"), "Lima")
+    refreshed = []
+    asyncio.run(scheduler(cache, tracker, refreshed, refresh_ahead=90).run_once())
+    assert sorted(refreshed) == ["Lima", "Paris"]
+
+
+# A mistyped city is cached as not found (None) with a TTL below refresh_ahead: it is never prefetched.
+def test_cities_not_found_are_not_refreshed():
+    cache = WeatherCache(negative_ttl=60)
+    tracker = PopularityTracker()
+    key = weather_cache_key("Pariss")
+    cache.put(key, None)
+    for _ in range(5):
+        tracker.record(key, "Pariss")
+    refreshed = []
+    prefetch = scheduler(cache, tracker, refreshed, refresh_ahead=90)
+    for _ in range(10):
+        asyncio.run(prefetch.run_once())
+    assert refreshed == []
+    assert prefetch.stats()["calls_last_minute"] == 0
+
+
+def test_budget():
+    cache = WeatherCache()
+    tracker = PopularityTracker()
+    for number in range(10):
+        tracker.record(weather_cache_key(f"City {number}"), f"City {number}")
+    refreshed = []
+    prefetch = scheduler(cache, tracker, refreshed, budget_per_minute=4)
+    asyncio.run(prefetch.run_once())
+    asyncio.run(prefetch.run_once())
+    assert len(refreshed) == 4
+    assert prefetch.skipped_for_budget == 16
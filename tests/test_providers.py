@@ -0,0 +1,172 @@
+import asyncio
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+import pytest
+
+from weather_assistant.providers import (
+    OpenWeatherMapProvider,
+    ReplayWeatherProvider,
+    StubWeatherProvider,
+    WeatherProvider,
+    WeatherProviderError,
+    WeatherReport,
+    parse_openweathermap_forecast,
+    parse_openweathermap_weather,
+)
+from weather_assistant.weather_archive import WeatherArchive
+
+
+# Stands in for WeatherClient: answers every request with a recorded response, and keeps the requested URLs.
+class RecordedClient:
+    def __init__(self, status_code: int = 200, content: bytes = b"", error: Exception = None):
+        self.status_code = status_code
+        self.content = content
+        self.error = error
+        self.urls = []
+
+    async def get(self, url: str) -> httpx.Response:
+        self.urls.append(url)
+        if self.error is not None:
+            raise self.error
+        return httpx.Response(self.status_code, content=self.content, request=httpx.Request("GET", url))
+
+
+def provider(client: RecordedClient) -> OpenWeatherMapProvider:
+    return OpenWeatherMapProvider("test-key", client, weather_url="https://owm.test/weather", forecast_url="https://owm.test/forecast")
+
+
+def test_parse_weather(recorded):
+    report = parse_openweathermap_weather("London", json.loads(recorded("weather_london")))
+    assert report == WeatherReport(
+        city="London",
+        country="GB",
+        weather_condition="rain",
+        temperature=12.43,
+        temperature_min=11.12,
+        temperature_max=13.71,
+        humidity=86.0,
+        wind_speed=5.14,
+        sunrise=1760769392,
+        sunset=1760807157,
+        timezone_offset=3600,
+    )
+
+
+def test_parse_weather_negative_timezone(recorded):
+    report = parse_openweathermap_weather("São Paulo", json.loads(recorded("weather_sao_paulo")))
+    assert (report.country, report.weather_condition, report.timezone_offset) == ("BR", "clear", -10800)
+
+
+def test_parse_forecast(recorded):
+    readings = parse_openweathermap_forecast(json.loads(recorded("forecast_london")))
+    assert [reading.timestamp for reading in readings] == [1760799600, 1760810400, 1760821200, 1760832000]
+    assert [reading.weather_condition for reading in readings] == ["rain", "clouds", "clouds", "clear"]
+    assert readings[0].temperature == 12.9 and readings[0].humidity == 84.0 and readings[0].wind_speed == 5.3
+
+
+def test_fetch(recorded):
+    client = RecordedClient(content=recorded("weather_london"))
+    archived = []
+    weather_provider = provider(client)
+    weather_provider.on_payload = lambda city, payload: archived.append((city, payload))
+
+    report = asyncio.run(weather_provider.fetch("London,GB"))
+
+    assert report == parse_openweathermap_weather("London,GB", json.loads(recorded("weather_london")))
+    assert archived == [("London,GB", recorded("weather_london"))]
+    query = parse_qs(urlsplit(client.urls[0]).query)
+    assert query == {"q": ["London,GB"], "appid": ["test-key"], "units": ["metric"]}
+
+
+def test_fetch_forecast(recorded):
+    client = RecordedClient(content=recorded("forecast_london"))
+    readings = asyncio.run(provider(client).fetch_forecast("London,GB"))
+    assert readings == parse_openweathermap_forecast(json.loads(recorded("forecast_london")))
+    assert client.urls[0].startswith("https://owm.test/forecast?")
+
+
+def test_city_not_found(recorded):
+    client = RecordedClient(status_code=404, content=recorded("not_found"))
+    archived = []
+    weather_provider = provider(client)
+    weather_provider.on_payload = lambda city, payload: archived.append(city)
+    assert asyncio.run(weather_provider.fetch("Atlantis")) is None
+    assert asyncio.run(weather_provider.fetch_forecast("Atlantis")) is None
+    assert archived == []
+
+
+@pytest.mark.parametrize("client", [
+    RecordedClient(status_code=500, content=b"Internal Server Error"),
+    RecordedClient(status_code=429, content=b'{"cod":429}'),
+    RecordedClient(error=httpx.ConnectTimeout("timed out")),
+])
+def test_service_errors(client):
+    with pytest.raises(WeatherProviderError):
+        asyncio.run(provider(client).fetch("London"))
+    with pytest.raises(WeatherProviderError):
+        asyncio.run(provider(client).fetch_forecast("London"))
+
+
+@pytest.mark.parametrize("content", [b"<html>Bad Gateway</html>", b'{"cod":200}', b'{"weather":[],"main":{}}', b"[]"])
+def test_malformed_responses(content):
+    archived = []
+    weather_provider = provider(RecordedClient(content=content))
+    weather_provider.on_payload = lambda city, payload: archived.append(city)
+    with pytest.raises(WeatherProviderError):
+        asyncio.run(weather_provider.fetch("London"))
+    with pytest.raises(WeatherProviderError):
+        asyncio.run(weather_provider.fetch_forecast("London"))
+    assert archived == []
+
+
+def test_providers_implement_every_lookup():
+    with pytest.raises(TypeError):
+        WeatherProvider()
+
+    class CurrentWeatherOnly(WeatherProvider):
+        async def fetch(self, city):
+            return None
+
+    with pytest.raises(TypeError):
+        CurrentWeatherOnly()
+
+
+def test_stub_payloads_parse():
+    stub = StubWeatherProvider()
+    payloads = []
+    stub.on_payload = lambda city, payload: payloads.append(payload)
+    report = asyncio.run(stub.fetch("Paris"))
+    assert report == parse_openweathermap_weather("Paris", json.loads(payloads[0]))
+    assert asyncio.run(stub.fetch("Unknown City")) is None
+    assert len(asyncio.run(stub.fetch_forecast("Paris"))) == 40
+
+
+def test_replay(recorded, tmp_path):
+    archive = WeatherArchive(str(tmp_path / "archive"))
+    archive.append("London,GB", recorded("weather_london"), fetched_at=1760788800.0)
+    replay = ReplayWeatherProvider(lambda: archive)
+    try:
+        assert asyncio.run(replay.fetch("London,GB")) == parse_openweathermap_weather(
+            "London,GB", json.loads(recorded("weather_london"))
+        )
+        assert asyncio.run(replay.fetch("Paris,FR")) is None
+        with pytest.raises(WeatherProviderError):
+            asyncio.run(replay.fetch_forecast("London,GB"))
+    finally:
+        archive.close()
+
+
+def test_replay_malformed_payload(tmp_path):
+    archive = WeatherArchive(str(tmp_path / "archive"))
+    archive.append("London,GB", b'{"main":{}}', fetched_at=1760788800.0)
+    try:
+        with pytest.raises(WeatherProviderError):
+            asyncio.run(ReplayWeatherProvider(lambda: archive).fetch("London,GB"))
+    finally:
+        archive.close()
+
+
+def test_replay_without_archive():
+    assert asyncio.run(ReplayWeatherProvider(lambda: None).fetch("London,GB")) is None
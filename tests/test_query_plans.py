@@ -0,0 +1,95 @@
+import random
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, func, insert, text
+from sqlmodel import select
+
+from weather_assistant.weather_assistant import (
+    Items,
+    WARDROBE_SORT_COLUMNS,
+    clothing_types,
+    recommendations_statement,
+    temperature_types,
+    wardrobe_conditions,
+)
+
+ALEMBIC_DIRECTORY = Path(__file__).resolve().parent.parent / "alembic"
+WARDROBES = 20
+WARDROBE_SIZE = 50
+
+
+# A database created by the migrations (as with `reflex db migrate`), with some wardrobes and fresh statistics.
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    url = f"sqlite:///{tmp_path_factory.mktemp('query_plans') / 'migrated.db'}"
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIRECTORY))
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "head")
+
+    engine = create_engine(url)
+    rng = random.Random(0)
+    rows = [
+        {
+            "wardrobe_id": f"wardrobe-{number}",
+            "type": rng.choice(clothing_types),
+            "name": f"{rng.choice(['blue', 'red', 'warm', 'light'])} {rng.choice(['shirt', 'coat', 'boots'])} {i}",
+            "suitable_temperature": rng.choice(temperature_types),
+            "is_waterproof": rng.random() < 0.3,
+        }
+        for number in range(WARDROBES)
+        for i in range(WARDROBE_SIZE)
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(Items), rows)
+        connection.execute(text("ANALYZE"))
+    yield engine
+    engine.dispose()
+
+
+def query_plan(engine, statement) -> str:
+    compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as connection:
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def test_recommendations_use_the_recommendation_index(engine):
+    plan = query_plan(engine, recommendations_statement("wardrobe-3", "Cool", True))
+    assert "USING INDEX ix_items_wardrobe_temperature_waterproof" in plan, plan
+
+
+def test_wardrobe_page_uses_the_paging_index(engine):
+    conditions = wardrobe_conditions("wardrobe-3")
+    first_page = select(Items).where(*conditions).order_by(Items.id).limit(20)
+    next_page = select(Items).where(*conditions).where(Items.id > 120).order_by(Items.id).limit(20)
+    latest_item = select(func.max(Items.id)).where(Items.wardrobe_id == "wardrobe-3")
+    for statement in (first_page, next_page, latest_item):
+        plan = query_plan(engine, statement)
+        assert "ix_items_wardrobe_id" in plan, plan
+        assert "TEMP B-TREE" not in plan, plan
+
+
+@pytest.mark.parametrize("sort_column", ["name", "type"])
+def test_sorted_wardrobe_page_uses_the_sort_index(engine, sort_column):
+    statement = select(Items) \
+        .where(*wardrobe_conditions("wardrobe-3")) \
+        .order_by(WARDROBE_SORT_COLUMNS[sort_column].desc(), Items.id.desc()) \
+        .limit(20)
+    plan = query_plan(engine, statement)
+    assert f"ix_items_wardrobe_{sort_column}" in plan, plan
+    assert "TEMP B-TREE" not in plan, plan
+
+
+def test_item_count_stays_in_the_wardrobe(engine):
+    plan = query_plan(engine, select(func.count(Items.id)).where(*wardrobe_conditions("wardrobe-3", item_type="Top")))
+    assert "USING COVERING INDEX ix_items_wardrobe_type" in plan, plan
+
+
+def test_search_uses_the_search_index(engine):
+    plan = query_plan(engine, select(Items).where(*wardrobe_conditions("wardrobe-3", "shirt")).order_by(Items.id).limit(20))
+    assert "items_fts VIRTUAL TABLE INDEX" in plan, plan
+    assert "ix_items_wardrobe_id" in plan, plan
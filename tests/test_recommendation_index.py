@@ -0,0 +1,93 @@
+from weather_assistant.recommendation_index import RecommendationIndex
+
+
+def item(item_id: int, suitable_temperature: str = "Cool", is_waterproof: str = "True") -> dict:
+    return {"id": item_id, "name": f"item {item_id}", "type": "Top",
+            "suitable_temperature": suitable_temperature, "is_waterproof": is_waterproof}
+
+
+def names(items) -> list[str]:
+    return [found["name"] for found in items]
+
+
+def test_lookup_after_load():
+    index = RecommendationIndex()
+    assert index.get("w", "Cool", True) is None
+    index.load("w", [item(2), item(1), item(3, is_waterproof="False")], index.stamp())
+    assert names(index.get("w", "Cool", True)) == ["item 1", "item 2"]
+    assert names(index.get("w", "Cool", False)) == ["item 3"]
+    assert index.get("w", "Hot", True) == []
+
+
+def test_updates_of_a_loaded_wardrobe():
+    index = RecommendationIndex()
+    index.load("w", [item(1)], index.stamp())
+    index.upsert("w", item(2))
+    index.upsert("w", item(1, suitable_temperature="Warm"))
+    index.remove("w", 2)
+    assert index.get("w", "Cool", True) == []
+    assert names(index.get("w", "Warm", True)) == ["item 1"]
+
+
+# An item added while a load reads the database: the load may not have seen it and must not be kept.
+def test_load_that_raced_with_a_change_is_not_kept():
+    index = RecommendationIndex()
+    stamp = index.stamp()
+    snapshot = [item(1)]
+    index.upsert("w", item(2))
+    wardrobe = index.load("w", snapshot, stamp)
+    assert names(wardrobe.get("Cool", True)) == ["item 1"]
+    assert not index.loaded("w")
+
+    index.load("w", [item(1), item(2)], index.stamp())
+    assert names(index.get("w", "Cool", True)) == ["item 1", "item 2"]
+
+
+def test_changes_to_other_wardrobes_do_not_discard_a_load():
+    index = RecommendationIndex()
+    stamp = index.stamp()
+    index.upsert("other", item(5))
+    index.load("w", [item(1)], stamp)
+    assert index.loaded("w")
+
+
+def test_forgotten_changes_count_as_changed():
+    index = RecommendationIndex(max_wardrobes=2)
+    stamp = index.stamp()
+    for wardrobe_id in ("w", "a", "b"):
+        index.remove(wardrobe_id, 1)
+    index.load("w", [item(1)], stamp)
+    assert not index.loaded("w")
+
+
+def test_invalidate():
+    index = RecommendationIndex()
+    index.load("w", [item(1)], index.stamp())
+    index.load("v", [item(1)], index.stamp())
+    stamp = index.stamp()
+    index.invalidate("w")
+    assert not index.loaded("w") and index.loaded("v")
+    index.invalidate()
+    assert not index.loaded("v")
+    index.load("v", [item(1)], stamp)
+    assert not index.loaded("v")
+
+
+# Changes made through other workers are picked up when the wardrobe expires and is loaded again.
+def test_loads_expire(clock):
+    index = RecommendationIndex(ttl=30, clock=clock)
+    index.load("w", [item(1)], index.stamp())
+    clock.now += 29
+    assert index.loaded("w")
+    clock.now += 1
+    assert index.get("w", "Cool", True) is None
+    assert not index.loaded("w")
+
+
+def test_least_recently_used_wardrobe_is_dropped():
+    index = RecommendationIndex(max_wardrobes=2)
+    index.load("a", [item(1)], index.stamp())
+    index.load("b", [item(1)], index.stamp())
+    index.get("a", "Cool", True)
+    index.load("c", [item(1)], index.stamp())
+    assert index.loaded("a") and index.loaded("c") and not index.loaded("b")
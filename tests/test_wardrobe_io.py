@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from sqlmodel import create_engine
+
+from weather_assistant.wardrobe_io import MAX_ERRORS, WardrobeImporter, export_lines, iter_lines
+from weather_assistant.weather_assistant import Items, clothing_types, temperature_types
+
+NAMES = ["blue shirt", 'the "good" coat', "boots, brown", "scarf\nwith a line break", "hat\r\nwindows", "  "]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'wardrobe.db'}")
+    Items.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def importer(file_format: str = "csv", wardrobe_id: str = "imported") -> WardrobeImporter:
+    return WardrobeImporter(file_format, clothing_types, temperature_types, chunk_size=2, wardrobe_id=wardrobe_id)
+
+
+async def split(content: bytes, size: int) -> list[str]:
+    async def chunks():
+        for start in range(0, len(content), size):
+            yield content[start:start + size]
+    return [line async for line in iter_lines(chunks())]
+
+
+def wardrobe(engine, wardrobe_id: str) -> list[tuple]:
+    with engine.connect() as connection:
+        rows = connection.execute(
+            Items.__table__.select().where(Items.wardrobe_id == wardrobe_id).order_by(Items.id)
+        ).all()
+    return [(row.type, row.name, row.suitable_temperature, row.is_waterproof) for row in rows]
+
+
+@pytest.mark.parametrize("file_format", ["csv", "jsonl"])
+def test_export_and_import_round_trip(engine, file_format):
+    rows = [
+        {"wardrobe_id": "exported", "type": clothing_types[number % len(clothing_types)], "name": name,
+         "suitable_temperature": temperature_types[number % len(temperature_types)], "is_waterproof": number % 2 == 0}
+        for number, name in enumerate(NAMES[:-1])
+    ]
+    with engine.begin() as connection:
+        connection.execute(Items.__table__.insert(), rows)
+    content = "".join(export_lines(engine, Items, file_format, wardrobe_id="exported")).encode()
+
+    lines = asyncio.run(split(content, 7))
+    result = importer(file_format).run(engine, Items, lines)
+
+    assert result == {"inserted": len(rows), "errors": [], "error_count": 0}
+    assert wardrobe(engine, "imported") == wardrobe(engine, "exported")
+
+
+def test_errors_name_the_first_line_of_the_record(engine):
+    lines = [
+        "type,name,suitable_temperature,is_waterproof",
+        'Top,"two\nlines",Warm,no',
+        'Hat,"three\n\nlines",Warm,no',
+        "Top,,Warm,no",
+    ]
+    result = importer().run(engine, Items, "\n".join(lines).splitlines(keepends=True))
+    assert result["inserted"] == 1
+    assert [error.split(":")[0] for error in result["errors"]] == ["line 4", "line 7"]
+
+
+def test_unterminated_quote(engine):
+    lines = ["type,name,suitable_temperature,is_waterproof\n", "Top,shirt,Warm,no\n", 'Top,"shirt,Warm,no\n']
+    result = importer().run(engine, Items, lines)
+    assert result["inserted"] == 1
+    assert result["errors"] == ["line 3: unterminated quoted field"]
+
+
+def test_errors_are_capped(engine):
+    lines = ["type,name,suitable_temperature,is_waterproof"] + ["Top,,Warm,no"] * (MAX_ERRORS + 50)
+    result = importer().run(engine, Items, lines)
+    assert len(result["errors"]) == MAX_ERRORS
+    assert result["error_count"] == MAX_ERRORS + 50
+
+
+def test_iter_lines_keeps_line_endings():
+    content = "a,b\r\nc\n".encode("utf-8-sig") + b"last"
+    assert asyncio.run(split(content, 3)) == ["a,b\r\n", "c\n", "last"]
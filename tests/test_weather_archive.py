@@ -0,0 +1,154 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from weather_assistant import weather_archive
+from weather_assistant.providers import StubWeatherProvider
+from weather_assistant.weather_archive import SEGMENT_SUFFIX, WeatherArchive, fcntl
+from weather_assistant.weather_cache import normalize_city
+
+SEGMENT_BYTES = 4 << 10
+MAX_BYTES = 16 << 10
+
+PAYLOAD = json.dumps(StubWeatherProvider.weather_payload("Paris")).encode()
+
+
+def directory_bytes(directory) -> int:
+    return sum(path.stat().st_size for path in directory.iterdir() if path.name.endswith(SEGMENT_SUFFIX))
+
+
+def fill(archive: WeatherArchive, city: str, count: int):
+    for number in range(count):
+        assert archive.append(city, PAYLOAD, fetched_at=float(number))
+
+
+# Two workers sharing the archive directory (two archives in one process lock like two processes).
+@pytest.mark.skipif(fcntl is None, reason="needs file locks")
+def test_rotation_keeps_the_segment_of_another_worker(tmp_path):
+    second = WeatherArchive(str(tmp_path), segment_bytes=SEGMENT_BYTES, max_bytes=MAX_BYTES)
+    fill(second, "Oslo", 5)
+    # the first worker starts later, it indexes the segment the second one appends to
+    first = WeatherArchive(str(tmp_path), segment_bytes=SEGMENT_BYTES, max_bytes=MAX_BYTES)
+    try:
+        fill(first, "Paris", 2000)
+
+        assert os.path.exists(second._segments[-1].path)
+        assert second.latest("Oslo")[1] == PAYLOAD
+        assert directory_bytes(tmp_path) <= MAX_BYTES + 2 * SEGMENT_BYTES
+        fill(second, "Oslo", 5)
+        assert second.latest("Oslo")[1] == PAYLOAD
+    finally:
+        first.close()
+        second.close()
+
+
+# The bound is for the whole directory: the segments of a closed worker are deleted too.
+def test_bound_covers_the_segments_of_every_worker(tmp_path):
+    finished = WeatherArchive(str(tmp_path), segment_bytes=SEGMENT_BYTES, max_bytes=MAX_BYTES)
+    fill(finished, "Oslo", 200)
+    finished.close()
+
+    archive = WeatherArchive(str(tmp_path), segment_bytes=SEGMENT_BYTES, max_bytes=MAX_BYTES)
+    try:
+        fill(archive, "Paris", 2000)
+        assert directory_bytes(tmp_path) <= MAX_BYTES + SEGMENT_BYTES
+        if fcntl is not None:
+            assert archive.latest("Oslo") is None
+        assert archive.latest("Paris")[1] == PAYLOAD
+        times = [fetched_at for fetched_at, _ in archive.history("Paris", 0, 2000)]
+        assert times == sorted(times) and times[-1] == 1999.0
+    finally:
+        archive.close()
+
+
+def payload_at(fetched_at: float) -> bytes:
+    payload = StubWeatherProvider.weather_payload("Paris")
+    payload["dt"] = int(fetched_at)
+    return json.dumps(payload).encode()
+
+
+# Workers append to their own segments: a later segment number can hold older responses.
+def test_records_are_in_fetch_time_order_across_workers(tmp_path):
+    first = WeatherArchive(str(tmp_path))
+    second = WeatherArchive(str(tmp_path))
+    second.append("Paris", payload_at(100), fetched_at=100.0)
+    first.append("Paris", payload_at(200), fetched_at=200.0)
+    second.append("Oslo", payload_at(150), fetched_at=150.0)
+    first.close()
+    second.close()
+
+    archive = WeatherArchive(str(tmp_path))
+    try:
+        assert archive.latest("Paris") == (200.0, payload_at(200))
+        assert archive.history("Paris", 150, 250) == [(200.0, payload_at(200))]
+        assert [fetched_at for fetched_at, _ in archive.history("Paris", 0, 300)] == [100.0, 200.0]
+        assert [(city, fetched_at) for city, fetched_at, _ in archive.latest_responses(2)] == [
+            ("Paris", 200.0), ("Oslo", 150.0),
+        ]
+    finally:
+        archive.close()
+
+
+# Segments deleted by another worker are unmapped (their disk space is freed) and their records forgotten.
+def test_segments_deleted_by_another_worker_are_forgotten(tmp_path):
+    finished = WeatherArchive(str(tmp_path), segment_bytes=SEGMENT_BYTES, max_bytes=MAX_BYTES)
+    fill(finished, "Oslo", 100)
+    finished.close()
+
+    reader = WeatherArchive(str(tmp_path), segment_bytes=SEGMENT_BYTES, max_bytes=MAX_BYTES, check_interval=0)
+    writer = WeatherArchive(str(tmp_path), segment_bytes=SEGMENT_BYTES, max_bytes=MAX_BYTES)
+    try:
+        assert reader.latest("Oslo") is not None
+        fill(writer, "Paris", 2000)
+        reader.append("Bergen", PAYLOAD)
+
+        listed = {path.name for path in tmp_path.iterdir()}
+        assert all(os.path.basename(segment.path) in listed for segment in reader._segments)
+        assert reader.latest("Oslo") is None
+        assert reader.latest("Bergen")[1] == PAYLOAD
+    finally:
+        writer.close()
+        reader.close()
+
+
+# A deleted segment is dropped from the index lazily: lookups skip its records until the city is compacted.
+def test_dropped_records_are_skipped(tmp_path):
+    archive = WeatherArchive(str(tmp_path), segment_bytes=SEGMENT_BYTES, max_bytes=MAX_BYTES)
+    try:
+        for number in range(3000):
+            archive.append("Paris" if number % 2 else "Oslo", payload_at(number), fetched_at=float(number))
+            assert archive.latest("Paris" if number % 2 else "Oslo")[0] == float(number)
+        assert archive.stats()["dropped_segments"] > 0
+        for city, first in (("Paris", 1), ("Oslo", 0)):
+            history = archive.history(city, 0, 3000)
+            times = [fetched_at for fetched_at, _ in history]
+            assert times == list(range(int(times[0]), 3000, 2)) and int(times[0]) % 2 == first
+            assert all(payload == payload_at(fetched_at) for fetched_at, payload in history)
+            index = archive._index[normalize_city(city)]
+            assert index.dead * 2 <= len(index.times)
+    finally:
+        archive.close()
+
+
+# An archive that cannot be opened is turned off; the lookups go on without it.
+def test_unwritable_archive_directory(monkeypatch):
+    monkeypatch.setenv("WEATHER_ARCHIVE_DIR", "/proc/weather_archive")
+    monkeypatch.setattr(weather_archive, "_open_failed", False)
+    monkeypatch.setattr(weather_archive, "open_errors", 0)
+    assert weather_archive.get_weather_archive() is None
+    assert weather_archive.get_weather_archive() is None
+    assert weather_archive.weather_archive_stats() == {"open_errors": 1}
+    assert weather_archive.archive_in_background("Paris", PAYLOAD).result() is False
+
+    from weather_assistant import weather_assistant as wa
+
+    wa.weather_cache.clear()
+    assert asyncio.run(wa.fetch_weather("Paris")) is not None
+
+
+def test_nothing_is_archived_when_turned_off(monkeypatch):
+    monkeypatch.setenv("WEATHER_ARCHIVE_DIR", "")
+    monkeypatch.setattr(weather_archive, "_writer", None)
+    assert weather_archive.archive_in_background("Paris", PAYLOAD).result() is False
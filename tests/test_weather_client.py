@@ -0,0 +1,61 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from weather_assistant import weather_assistant as wa
+from weather_assistant.weather_client import WeatherClient
+
+
+async def open_client(weather_client: WeatherClient):
+    return await weather_client._get_client()
+
+
+def test_closed_on_shutdown():
+    with TestClient(wa.app.api) as client:
+        http_client = client.portal.call(open_client, wa.weather_client)
+        assert not http_client.is_closed
+    assert http_client.is_closed
+
+
+def test_one_client_per_event_loop():
+    weather_client = WeatherClient()
+
+    async def twice():
+        return await open_client(weather_client), await open_client(weather_client)
+
+    first, again = asyncio.run(twice())
+    assert first is again
+
+
+# The client of an event loop is closed when the loop shuts down, not left with its connection pool open.
+def test_client_closed_with_its_event_loop():
+    weather_client = WeatherClient()
+    first = asyncio.run(open_client(weather_client))
+    assert first.is_closed
+    second = asyncio.run(open_client(weather_client))
+    assert first is not second and second.is_closed
+
+
+def test_client_of_another_running_loop_is_closed_there():
+    weather_client = WeatherClient()
+    loop = asyncio.new_event_loop()
+    try:
+        first = loop.run_until_complete(open_client(weather_client))
+        second = asyncio.run(open_client(weather_client))
+        assert second.is_closed
+        # the closer of the first client was collected: the first loop closes it when it runs again
+        loop.run_until_complete(asyncio.sleep(0.01))
+        assert first.is_closed
+    finally:
+        loop.close()
+
+
+def test_aclose():
+    weather_client = WeatherClient()
+
+    async def open_and_close():
+        http_client = await open_client(weather_client)
+        await weather_client.aclose()
+        return http_client
+
+    assert asyncio.run(open_and_close()).is_closed
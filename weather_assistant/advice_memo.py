@@ -0,0 +1,66 @@
+import threading
+import time
+from collections import OrderedDict
+
+from weather_assistant.weather_cache import MISSING
+
+
+# Advice memo: the wardrobe advice of a wardrobe for a (temperature type, wet flag), keyed on the
+# wardrobe's version. Every change to a wardrobe bumps its version, so the memo never serves advice
+# for old contents and no entry has to be found and deleted; old versions age out of the LRU.
+# The versions are per process: changes made through other workers do not bump them, so entries also
+# expire `ttl` seconds after they were stored.
+class AdviceMemo:
+    def __init__(self, max_size: int = 10000, ttl: float = 30, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._versions: dict[str, int] = {}
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+        # counters
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, wardrobe_id: str) -> int:
+        return self._versions.get(wardrobe_id, 0)
+
+    # Call after every change to the wardrobe (add, edit, delete, import).
+    def bump(self, wardrobe_id: str):
+        with self._lock:
+            self._versions[wardrobe_id] = self._versions.get(wardrobe_id, 0) + 1
+
+    # The memoized advice, or MISSING.
+    def get(self, wardrobe_id: str, suitable_temperature: str, is_wet: bool, version: int):
+        with self._lock:
+            key = (wardrobe_id, suitable_temperature, is_wet, version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    # Store advice computed for `version` (read with version() before computing it): if the wardrobe
+    # changed in the meantime, the entry is stored under the old version and never served.
+    def put(self, wardrobe_id: str, suitable_temperature: str, is_wet: bool, version: int, value):
+        with self._lock:
+            key = (wardrobe_id, suitable_temperature, is_wet, version)
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
@@ -0,0 +1,108 @@
+import math
+
+# Temperature bands from cold to hot, and the thresholds (in °C) between them:
+# a temperature t is in the first band whose upper threshold satisfies t <= threshold.
+TEMPERATURE_BANDS: list[str] = ["Freeze", "Cold", "Cool", "Warm", "Hot"]
+TEMPERATURE_THRESHOLDS: list[int] = [0, 10, 20, 30]
+
+# Temperatures are classified in whole degrees, truncated like the displayed temperature (int()),
+# so that 20.7 °C shown as "20" gets the advice for 20. A missing temperature (NaN) is in the coldest band.
+def whole_degrees(temperature):
+    if math.isnan(temperature):
+        return -math.inf
+    return math.trunc(temperature) if math.isfinite(temperature) else temperature
+
+def get_temperature_type(temperature: float):
+    temperature = whole_degrees(temperature)
+    if temperature > 30:
+        return "Hot"
+    elif 20 < temperature <= 30:
+        return "Warm"
+    elif 10 < temperature <= 20:
+        return "Cool"
+    elif 0 < temperature <= 10:
+        return "Cold"
+    else:
+        return "Freeze"
+
+# Default clothing advice: Provides clothing advice based on the given temperature and weather condition.
+def get_default_clothing_advice(temperature, weather_condition):
+    temperature = whole_degrees(temperature)
+    if temperature > 30:
+        return "Whoa, it's sizzling out there! Time for shorts and a tank top!"
+    elif 20 < temperature <= 30:
+        if "rain" in weather_condition:
+            return "Warm but wet, eh? Go for a tee and don't forget that umbrella!"
+        return "It's T-shirt weather! Maybe grab some sunglasses too."
+    elif 10 < temperature <= 20:
+        if "rain" in weather_condition:
+            return "A bit chilly with a splash! A jacket and maybe an umbrella will serve you well."
+        return "Feeling the breeze? A sweater or a light jacket should do the trick."
+    else:
+        if "snow" in weather_condition:
+            return "Brrr! Snowball fight anyone? Bundle up with a thick coat, gloves, and a hat!"
+        return "Freezing cold! Time to rock that winter coat and maybe a scarf and gloves!"
+
+
+# Vectorized versions of get_temperature_type and get_default_clothing_advice for bulk data
+# (forecast grids, multi-city batches). They give the same results as the scalar functions and need numpy;
+# without numpy they fall back to calling the scalar functions.
+
+# The band (index into TEMPERATURE_BANDS) of every temperature in an array, as whole_degrees does.
+def _temperature_bands(np, temperatures):
+    temperatures = np.asarray(temperatures, dtype=float)
+    temperatures = np.trunc(np.where(np.isnan(temperatures), -np.inf, temperatures))
+    return np.searchsorted(TEMPERATURE_THRESHOLDS, temperatures, side="left")
+
+# Temperature type of every temperature in an array.
+def classify_temperatures(temperatures):
+    try:
+        import numpy as np
+    except ImportError:
+        return [get_temperature_type(temperature) for temperature in temperatures]
+    return np.asarray(TEMPERATURE_BANDS, dtype=object)[_temperature_bands(np, temperatures)]
+
+# Default clothing advice for arrays of temperatures and weather conditions.
+# The conditions are either strings, or integer codes into `condition_names` (e.g. from the forecast store).
+def default_clothing_advice(temperatures, weather_conditions, condition_names=None):
+    try:
+        import numpy as np
+    except ImportError:
+        if condition_names is not None:
+            weather_conditions = [condition_names[code] for code in weather_conditions]
+        return [get_default_clothing_advice(temperature, condition)
+                for temperature, condition in zip(temperatures, weather_conditions)]
+    bands = _temperature_bands(np, temperatures)
+    
+    if condition_names is None:
+        codes: dict[str, int] = {}
+        condition_codes = np.fromiter(
+            (codes.setdefault(condition, len(codes)) for condition in weather_conditions),
+            dtype=np.intp,
+            count=len(bands),
+        )
+        condition_names = list(codes)
+    else:
+        condition_codes = np.asarray(weather_conditions, dtype=np.intp)
+    
+    # the advice depends on rain for Cool/Warm and on snow for Freeze/Cold; check each distinct condition once
+    is_rain = np.array(["rain" in condition for condition in condition_names], dtype=bool)
+    is_snow = np.array(["snow" in condition for condition in condition_names], dtype=bool)
+    is_wet = np.where(bands <= 1, is_snow[condition_codes], is_rain[condition_codes])
+    
+    return _advice_table(np)[bands, is_wet.astype(np.intp)]
+
+# Advice lookup table [band, wet], built from the scalar function so the two always agree.
+_ADVICE_TABLE = None
+
+def _advice_table(np):
+    global _ADVICE_TABLE
+    if _ADVICE_TABLE is None:
+        band_temperatures = [0, 5, 15, 25, 35]
+        wet_conditions = ["snow", "snow", "rain", "rain", "rain"]
+        _ADVICE_TABLE = np.array(
+            [[get_default_clothing_advice(temperature, ""), get_default_clothing_advice(temperature, wet)]
+             for temperature, wet in zip(band_temperatures, wet_conditions)],
+            dtype=object,
+        )
+    return _ADVICE_TABLE
@@ -0,0 +1,82 @@
+import os
+import threading
+
+from reflex.config import get_config
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+
+# Database: one engine (and one connection pool) shared by every handler of the worker.
+# The engine is created on first use, so importing the app does not touch the database.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# prepared statements kept per SQLite connection (the driver's default is 128)
+DB_STATEMENT_CACHE = int(os.getenv("DB_STATEMENT_CACHE", "256"))
+# seconds a writer waits for the database lock before failing
+DB_BUSY_TIMEOUT = float(os.getenv("DB_BUSY_TIMEOUT", "5"))
+
+_engine = None
+_lock = threading.Lock()
+
+
+# The database URL of the app (db_url in rxconfig.py, or the DB_URL environment variable).
+def database_url() -> str:
+    return get_config().db_url or "sqlite:///reflex.db"
+
+
+# SQLite: write-ahead logging lets readers run while an item is being written,
+# and synchronous=NORMAL is safe with WAL while saving an fsync per transaction.
+def _configure_sqlite(connection, connection_record):
+    cursor = connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def create_database_engine(url: str):
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+
+    connect_args = {
+        "check_same_thread": False,
+        "cached_statements": DB_STATEMENT_CACHE,
+        "timeout": DB_BUSY_TIMEOUT,
+    }
+    if url in ("sqlite://", "sqlite:///:memory:"):
+        # an in-memory database only exists inside its connection: use the default single-connection pool
+        return create_engine(url, connect_args=connect_args)
+    engine = create_engine(
+        url,
+        connect_args=connect_args,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+    event.listen(engine, "connect", _configure_sqlite)
+    return engine
+
+
+# The shared engine; the first call creates it and the tables that do not exist yet.
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                engine = create_database_engine(database_url())
+                SQLModel.metadata.create_all(engine)
+                _engine = engine
+    return _engine
+
+
+# A session on the shared engine, in place of rx.session() (which creates a new engine on every call).
+def get_session() -> Session:
+    return Session(get_engine())
+
+
+# Close the pooled connections, e.g. when the worker shuts down.
+def dispose_engine():
+    global _engine
+    with _lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
@@ -0,0 +1,113 @@
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+
+
+# One forecast reading, as returned by range queries.
+@dataclass(frozen=True)
+class ForecastReading:
+    timestamp: int
+    temperature: float
+    humidity: float
+    wind_speed: float
+    weather_condition: str
+
+
+# The readings of one city, stored column by column in compact typed arrays sorted by timestamp.
+# The measurements are doubles: in single precision 12.9 would come back as 12.899999618530273.
+class _Series:
+    def __init__(self):
+        self.timestamps = array("q")
+        self.temperatures = array("d")
+        self.humidities = array("d")
+        self.wind_speeds = array("d")
+        self.conditions = array("B")
+        self.fetched_at = 0
+
+    def columns(self):
+        return (self.timestamps, self.temperatures, self.humidities, self.wind_speeds, self.conditions)
+
+    # Drop the readings in [start, end) of the arrays.
+    def delete(self, start: int, end: int):
+        for column in self.columns():
+            del column[start:end]
+
+    # Insert readings (sorted by timestamp) in place of any readings for the same time span.
+    def merge(self, rows: list[tuple]):
+        if not rows:
+            return
+        first = bisect_left(self.timestamps, rows[0][0])
+        last = bisect_right(self.timestamps, rows[-1][0])
+        new_columns = list(zip(*rows))
+        for column, values in zip(self.columns(), new_columns):
+            column[first:last] = array(column.typecode, values)
+
+
+# Forecast store: 5-day / 3-hour forecasts per city, kept in memory.
+# Cities are keyed by their normalized name, readings by their UTC timestamp.
+class ForecastStore:
+    def __init__(self, retention: int = 24 * 3600):
+        # readings older than `retention` seconds are pruned on every ingest
+        self.retention = retention
+        self._series: dict[str, _Series] = {}
+        self._condition_names: list[str] = []
+        self._condition_codes: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _condition_code(self, condition: str) -> int:
+        code = self._condition_codes.get(condition)
+        if code is None:
+            code = len(self._condition_names)
+            self._condition_names.append(condition)
+            self._condition_codes[condition] = code
+        return code
+
+    # Store the forecast readings of a city, replacing the stored readings of the same time span.
+    def ingest(self, city: str, readings: list[ForecastReading], now: int):
+        readings = sorted(readings, key=lambda reading: reading.timestamp)
+        with self._lock:
+            rows = [
+                (reading.timestamp, reading.temperature, reading.humidity, reading.wind_speed,
+                 self._condition_code(reading.weather_condition))
+                for reading in readings
+            ]
+            series = self._series.setdefault(city, _Series())
+            series.merge(rows)
+            series.fetched_at = now
+            self._prune(now - self.retention)
+
+    # The time of the last ingest for the city, or 0 if there is none.
+    def fetched_at(self, city: str) -> int:
+        series = self._series.get(city)
+        return series.fetched_at if series is not None else 0
+
+    # The readings of a city with start <= timestamp < end.
+    def range(self, city: str, start: int, end: int) -> list[ForecastReading]:
+        with self._lock:
+            series = self._series.get(city)
+            if series is None:
+                return []
+            first = bisect_left(series.timestamps, start)
+            last = bisect_left(series.timestamps, end)
+            return [
+                ForecastReading(timestamp, temperature, humidity, wind_speed, self._condition_names[condition])
+                for timestamp, temperature, humidity, wind_speed, condition in zip(
+                    *(column[first:last] for column in series.columns())
+                )
+            ]
+
+    # Drop all readings before the given timestamp.
+    def prune(self, before: int):
+        with self._lock:
+            self._prune(before)
+
+    def _prune(self, before: int):
+        for city in list(self._series):
+            series = self._series[city]
+            series.delete(0, bisect_left(series.timestamps, before))
+            if len(series.timestamps) == 0:
+                del self._series[city]
+
+    def __len__(self):
+        return sum(len(series.timestamps) for series in self._series.values())
@@ -0,0 +1,134 @@
+import bisect
+import csv
+import heapq
+import os
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import Optional
+
+# The bundled gazetteer: the large cities of the world. GAZETTEER_PATH points to another file in the
+# same format (for example a full city list); an empty GAZETTEER_PATH turns the gazetteer off.
+DEFAULT_GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), "data", "cities.csv")
+
+# Suggestions for prefixes up to this length are computed once at load time: their ranges in the
+# sorted name array are the largest.
+PRECOMPUTED_PREFIX_LENGTH = 2
+SUGGESTION_LIMIT = 8
+
+
+# A city of the gazetteer. The id ("Paris,FR") is the canonical name sent to the weather provider.
+@dataclass(frozen=True, slots=True)
+class City:
+    id: str
+    name: str
+    country: str
+    population: int
+
+    @property
+    def label(self) -> str:
+        return f"{self.name}, {self.country}"
+
+
+# Gazetteer key of a name: accents removed, case folded, punctuation as spaces ("São Paulo" -> "sao paulo").
+def normalize_name(name: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", name)
+    letters = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(re.split(r"[\W_]+", letters.casefold())).strip()
+
+
+# City gazetteer: resolves typed names to cities and suggests cities for a typed prefix.
+# Cities are numbered by population (0 is the largest), names and alternate names are kept in one
+# sorted array with the number of their city, so the cities of a prefix are a bisect range and the
+# largest of them are the smallest numbers in it.
+class Gazetteer:
+    def __init__(self, cities: list[City], alternate_names: Optional[dict[str, list[str]]] = None):
+        self.cities = sorted(cities, key=lambda city: -city.population)
+        alternate_names = alternate_names or {}
+
+        entries = set()
+        self._by_name: dict[str, int] = {}
+        self._by_name_country: dict[tuple[str, str], int] = {}
+        for number, city in enumerate(self.cities):
+            for name in [city.name] + alternate_names.get(city.id, []):
+                key = normalize_name(name)
+                if not key:
+                    continue
+                entries.add((key, number))
+                # the largest city of a name wins
+                self._by_name.setdefault(key, number)
+                self._by_name_country.setdefault((key, city.country.casefold()), number)
+        entries = sorted(entries)
+        self._keys = [key for key, _ in entries]
+        self._numbers = [number for _, number in entries]
+
+        self._precomputed: dict[str, list[int]] = {}
+        for key in set(key[:length] for key in self._keys for length in range(1, PRECOMPUTED_PREFIX_LENGTH + 1)):
+            self._precomputed[key] = self._largest(key, SUGGESTION_LIMIT)
+
+    def __len__(self) -> int:
+        return len(self.cities)
+
+    # The city of a typed name: "paris", "São Paulo", "Paris, US", or a city id ("Paris,FR").
+    # Returns None for unknown names.
+    def resolve(self, text: str) -> Optional[City]:
+        name, _, country = text.partition(",")
+        key = normalize_name(name)
+        if country.strip():
+            number = self._by_name_country.get((key, country.strip().casefold()))
+        else:
+            number = self._by_name.get(key)
+        return None if number is None else self.cities[number]
+
+    # The largest cities with a name (or alternate name) starting with the typed prefix.
+    def complete(self, prefix: str, limit: int = SUGGESTION_LIMIT) -> list[City]:
+        key = normalize_name(prefix)
+        if not key:
+            return []
+        if key in self._precomputed and limit <= SUGGESTION_LIMIT:
+            numbers = self._precomputed[key][:limit]
+        else:
+            numbers = self._largest(key, limit)
+        return [self.cities[number] for number in numbers]
+
+    def _largest(self, key: str, limit: int) -> list[int]:
+        start = bisect.bisect_left(self._keys, key)
+        end = bisect.bisect_left(self._keys, key + "\uffff", start)
+        return heapq.nsmallest(limit, set(self._numbers[start:end]))
+
+
+# Read a gazetteer file: CSV with the columns name, country, population and alternate_names
+# (separated by "|").
+def load_gazetteer(path: str) -> Gazetteer:
+    cities = []
+    alternate_names = {}
+    with open(path, newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            city = City(
+                id=f"{row['name']},{row['country']}",
+                name=row["name"],
+                country=row["country"],
+                population=int(row.get("population") or 0),
+            )
+            cities.append(city)
+            names = [name for name in (row.get("alternate_names") or "").split("|") if name.strip()]
+            if names:
+                alternate_names.setdefault(city.id, []).extend(names)
+    return Gazetteer(cities, alternate_names)
+
+
+_gazetteer: Optional[Gazetteer] = None
+_gazetteer_lock = threading.Lock()
+
+# The gazetteer of the process, loaded on first use. None if GAZETTEER_PATH is empty.
+def get_gazetteer() -> Optional[Gazetteer]:
+    global _gazetteer
+    path = os.getenv("GAZETTEER_PATH", DEFAULT_GAZETTEER_PATH)
+    if not path:
+        return None
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = load_gazetteer(path)
+    return _gazetteer
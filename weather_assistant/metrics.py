@@ -0,0 +1,115 @@
+import threading
+import time
+from bisect import bisect_left
+
+# Latency buckets in seconds, from a cache hit to a slow upstream call.
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Size buckets in bytes, for the state deltas sent to the browser.
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+# A timing span: observes the seconds spent inside the `with` block into a histogram.
+class _Span:
+    __slots__ = ("histogram", "label", "start")
+
+    def __init__(self, histogram, label: str):
+        self.histogram = histogram
+        self.label = label
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, self.label)
+        return False
+
+
+# Prometheus-style histogram with one optional label.
+# Only the bucket an observation falls in is counted; the counts are made cumulative when rendered.
+class Histogram:
+    def __init__(self, name: str, documentation: str, buckets=LATENCY_BUCKETS, label: str = ""):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.label = label
+        self.enabled = True
+        # label value -> [bucket counts..., +Inf count], sum
+        self._counts: dict[str, list[int]] = {}
+        self._sums: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, label: str = ""):
+        if not self.enabled:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(label)
+            if counts is None:
+                counts = self._counts[label] = [0] * (len(self.buckets) + 1)
+                self._sums[label] = 0.0
+            counts[index] += 1
+            self._sums[label] += value
+
+    # Time a `with` block: `with stage_seconds.time("upstream"): ...`
+    def time(self, label: str = "") -> _Span:
+        return _Span(self, label)
+
+    def count(self, label: str = "") -> int:
+        return sum(self._counts.get(label, ()))
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+            self._sums.clear()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(label, list(counts), self._sums[label]) for label, counts in sorted(self._counts.items())]
+        for label, counts, total in series:
+            labels = f'{self.label}="{label}",' if self.label else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels}le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{{{labels}le="+Inf"}} {cumulative}')
+            labels = "{" + labels.rstrip(",") + "}" if labels else ""
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+# The histograms of the lookup pipeline, shared by the whole process.
+stage_seconds = Histogram(
+    "weather_assistant_stage_seconds",
+    "Time spent in each stage of a weather lookup.",
+    LATENCY_BUCKETS,
+    label="stage",
+)
+state_delta_bytes = Histogram(
+    "weather_assistant_state_delta_bytes",
+    "Size of the state deltas sent to the browser.",
+    SIZE_BUCKETS,
+    label="event",
+)
+HISTOGRAMS = [stage_seconds, state_delta_bytes]
+
+
+# Turn the instrumentation on or off (the benchmark compares both).
+def set_enabled(enabled: bool):
+    for histogram in HISTOGRAMS:
+        histogram.enabled = enabled
+
+
+# Render the histograms and the given gauges ({name: value}) in the Prometheus text format.
+def render_metrics(gauges: dict) -> str:
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines += histogram.render()
+    for name, value in gauges.items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,81 @@
+import heapq
+from dataclasses import dataclass
+from itertools import islice
+
+# An outfit is Top + Bottom or a Dress, with Shoes and, if the wardrobe has one, an Accessory.
+OUTFIT_SHAPES: list[list[str]] = [
+    ["Top", "Bottom", "Shoes", "Accessory"],
+    ["Dress", "Shoes", "Accessory"],
+]
+OPTIONAL_TYPES = {"Accessory"}
+
+# How much it matters that an item of each type suits the weather (waterproof when wet, not when dry):
+# wet feet ruin the day more than a wet accessory. A dress counts for both a top and a bottom.
+WEATHER_WEIGHTS: dict[str, float] = {"Top": 2.0, "Bottom": 1.0, "Dress": 3.0, "Shoes": 3.0, "Accessory": 0.5}
+BASE_SCORES: dict[str, float] = {"Top": 1.0, "Bottom": 1.0, "Dress": 2.0, "Shoes": 1.0, "Accessory": 0.5}
+
+
+@dataclass(frozen=True, slots=True)
+class Outfit:
+    score: float
+    items: tuple
+
+    @property
+    def names(self) -> list[str]:
+        return [item["name"] for item in self.items]
+
+
+# The score of one item (see item_to_dict) for wet or dry weather.
+def item_score(item: dict, is_wet: bool) -> float:
+    item_type = item["type"]
+    suits_weather = (item["is_waterproof"] == "True") == is_wet
+    return BASE_SCORES.get(item_type, 0.0) + (WEATHER_WEIGHTS.get(item_type, 0.0) if suits_weather else 0.0)
+
+
+# Combinations of one entry per group in order of decreasing total score, where every group is a list of
+# (score, item) sorted by decreasing score. Best-first search: a combination is only looked at once a
+# better one has been taken, so taking the top K visits O(K * groups) combinations instead of the product.
+def best_combinations(groups: list[list[tuple]]):
+    if not groups or any(not group for group in groups):
+        return
+    start = (0,) * len(groups)
+    heap = [(-sum(group[0][0] for group in groups), start)]
+    seen = {start}
+    while heap:
+        negative_score, indexes = heapq.heappop(heap)
+        yield -negative_score, [group[index][1] for group, index in zip(groups, indexes)]
+        for position, index in enumerate(indexes):
+            group = groups[position]
+            if index + 1 < len(group):
+                following = indexes[:position] + (index + 1,) + indexes[position + 1:]
+                if following not in seen:
+                    seen.add(following)
+                    score = negative_score + group[index][0] - group[index + 1][0]
+                    heapq.heappush(heap, (score, following))
+
+
+# The k best outfits from the given items, best first. Ties go to the items added first.
+def top_outfits(items: list[dict], is_wet: bool, k: int = 3) -> list[Outfit]:
+    by_type: dict[str, list[tuple]] = {}
+    for item in items:
+        by_type.setdefault(item["type"], []).append((item_score(item, is_wet), item))
+    for scored in by_type.values():
+        scored.sort(key=lambda entry: (-entry[0], entry[1]["id"]))
+
+    searches = []
+    for shape in OUTFIT_SHAPES:
+        groups = []
+        for item_type in shape:
+            group = by_type.get(item_type, [])
+            if item_type in OPTIONAL_TYPES:
+                # leaving the optional item out scores nothing, so it comes after every real item
+                group = group + [(0.0, None)]
+            groups.append(group)
+        searches.append(best_combinations(groups))
+
+    # merge the shapes lazily, in order of decreasing score, and stop after k outfits
+    outfits = heapq.merge(*searches, key=lambda combination: -combination[0])
+    return [
+        Outfit(score, tuple(item for item in combination if item is not None))
+        for score, combination in islice(outfits, k)
+    ]
@@ -0,0 +1,124 @@
+import asyncio
+import heapq
+import time
+from collections import deque
+
+
+# Popularity tracker: counts the lookups per city, with exponential decay,
+# so the top cities follow what users are asking for right now.
+class PopularityTracker:
+    def __init__(self, decay: float = 0.9, max_size: int = 10000):
+        self.decay = decay
+        self.max_size = max_size
+        self._scores: dict = {}
+        self._cities: dict = {}
+
+    # Count one lookup; `city` is the name that is sent to the API when the key is refreshed.
+    def record(self, key, city: str):
+        self._scores[key] = self._scores.get(key, 0.0) + 1.0
+        self._cities[key] = city
+        if len(self._scores) > self.max_size:
+            self.age()
+
+    # Let older lookups count less and forget cities that are no longer asked for.
+    def age(self):
+        for key in list(self._scores):
+            score = self._scores[key] * self.decay
+            if score < 0.05:
+                del self._scores[key]
+                del self._cities[key]
+            else:
+                self._scores[key] = score
+
+    # The n most popular (key, city) pairs, most popular first.
+    def top(self, n: int) -> list[tuple]:
+        keys = heapq.nlargest(n, self._scores, key=self._scores.get)
+        return [(key, self._cities[key]) for key in keys]
+
+
+# Prefetch scheduler: a background task that refreshes the most popular cities
+# shortly before their cache entries expire, within a budget of API calls per minute.
+# Every worker runs its own scheduler for its own cache, so the budget is per worker:
+# N workers together make up to N times budget_per_minute calls.
+class PrefetchScheduler:
+    def __init__(
+        self,
+        tracker: PopularityTracker,
+        cache,
+        refresh,
+        top_n: int = 50,
+        budget_per_minute: int = 30,
+        interval: float = 30,
+        refresh_ahead: float = 90,
+    ):
+        self.tracker = tracker
+        self.cache = cache
+        # refresh(key, city) is a coroutine that fetches the city and stores it in the cache
+        self.refresh = refresh
+        self.top_n = top_n
+        self.budget_per_minute = budget_per_minute
+        self.interval = interval
+        # entries with less than `refresh_ahead` seconds to live are refreshed
+        self.refresh_ahead = refresh_ahead
+
+        self._calls: deque = deque()
+        self._task = None
+
+        # counters
+        self.refreshed = 0
+        self.skipped_for_budget = 0
+
+    # How many API calls are left in the budget of the last minute.
+    def _budget_left(self, now: float) -> int:
+        while self._calls and self._calls[0] <= now - 60:
+            self._calls.popleft()
+        return self.budget_per_minute - len(self._calls)
+
+    # Refresh the popular cities that are about to expire (or already have).
+    # Cities that were not found are left out: their negative entries are always about to expire,
+    # and a mistyped name would use up the budget of the popular cities.
+    async def run_once(self):
+        due = []
+        for key, city in self.tracker.top(self.top_n):
+            if self.cache.peek(key) is None:
+                continue
+            time_to_live = self.cache.time_to_live(key)
+            if time_to_live is None or time_to_live < self.refresh_ahead:
+                due.append((key, city))
+
+        budget = self._budget_left(time.monotonic())
+        if len(due) > budget:
+            self.skipped_for_budget += len(due) - max(budget, 0)
+            due = due[:max(budget, 0)]
+
+        now = time.monotonic()
+        self._calls.extend(now for _ in due)
+        await asyncio.gather(*(self.refresh(key, city) for key, city in due), return_exceptions=True)
+        self.refreshed += len(due)
+        self.tracker.age()
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_once()
+
+    # Start the background task (from inside the running event loop).
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "refreshed": self.refreshed,
+            "skipped_for_budget": self.skipped_for_budget,
+            "calls_last_minute": len(self._calls),
+        }
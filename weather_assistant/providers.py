@@ -0,0 +1,243 @@
+import asyncio
+import json
+import time
+import zlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Optional
+from urllib.parse import urlencode
+
+import httpx
+
+from weather_assistant.forecast_store import ForecastReading
+from weather_assistant.metrics import stage_seconds
+from weather_assistant.weather_client import WeatherClient
+
+
+# The current weather of a city, as returned by every provider.
+# Times are UTC timestamps, `timezone_offset` is the city's offset from UTC in seconds.
+@dataclass(frozen=True, slots=True)
+class WeatherReport:
+    city: str
+    country: str
+    weather_condition: str
+    temperature: float
+    temperature_min: float
+    temperature_max: float
+    humidity: float
+    wind_speed: float
+    sunrise: int
+    sunset: int
+    timezone_offset: int
+
+
+# Raised by providers when the weather service could not answer (timeouts, server errors).
+# Unlike "city not found", these answers are not cached.
+class WeatherProviderError(Exception):
+    pass
+
+
+# Weather provider: fetches the weather of a city and normalizes it.
+# fetch returns None and fetch_forecast returns None if the city is not found.
+class WeatherProvider(ABC):
+    name: str = ""
+    # Called with the city and the raw response of every current-weather answer (see weather_archive.py).
+    on_payload: Optional[Callable[[str, bytes], None]] = None
+
+    @abstractmethod
+    async def fetch(self, city: str) -> Optional[WeatherReport]:
+        ...
+
+    @abstractmethod
+    async def fetch_forecast(self, city: str) -> Optional[list[ForecastReading]]:
+        ...
+
+
+# Normalize an OpenWeatherMap current-weather response.
+def parse_openweathermap_weather(city: str, data: dict) -> WeatherReport:
+    return WeatherReport(
+        city=city,
+        country=data["sys"]["country"],
+        weather_condition=data["weather"][0]["main"].lower(),
+        temperature=float(data["main"]["temp"]),
+        temperature_min=float(data["main"]["temp_min"]),
+        temperature_max=float(data["main"]["temp_max"]),
+        humidity=float(data["main"]["humidity"]),
+        wind_speed=float(data["wind"]["speed"]),
+        sunrise=int(data["sys"]["sunrise"]),
+        sunset=int(data["sys"]["sunset"]),
+        timezone_offset=int(data["timezone"]),
+    )
+
+
+# Parse a raw response with one of the parse functions above (the arguments before the decoded JSON).
+# A response that is not the expected JSON is a service error, like a timeout: it is not cached, and the
+# lookup fails instead of the event handler.
+def parse_response(parse: Callable, content: bytes, *arguments):
+    try:
+        return parse(*arguments, json.loads(content))
+    except (ValueError, KeyError, IndexError, TypeError) as error:
+        raise WeatherProviderError(f"Malformed weather response: {error!r}") from error
+
+
+# Normalize an OpenWeatherMap 5-day / 3-hour forecast response.
+def parse_openweathermap_forecast(data: dict) -> list[ForecastReading]:
+    return [
+        ForecastReading(
+            timestamp=int(entry["dt"]),
+            temperature=float(entry["main"]["temp"]),
+            humidity=float(entry["main"]["humidity"]),
+            wind_speed=float(entry["wind"]["speed"]),
+            weather_condition=entry["weather"][0]["main"].lower(),
+        )
+        for entry in data["list"]
+    ]
+
+
+# OpenWeatherMap provider: the current weather and forecast APIs, through a shared pooled client.
+class OpenWeatherMapProvider(WeatherProvider):
+    name = "openweathermap"
+
+    def __init__(
+        self,
+        api_key: str,
+        client: WeatherClient,
+        weather_url: str = "https://api.openweathermap.org/data/2.5/weather",
+        forecast_url: str = "https://api.openweathermap.org/data/2.5/forecast",
+        units: str = "metric",
+    ):
+        self.api_key = api_key
+        self.client = client
+        self.weather_url = weather_url
+        self.forecast_url = forecast_url
+        self.units = units
+
+    def weather_request(self, city: str) -> str:
+        return f"{self.weather_url}?{urlencode({'q': city, 'appid': self.api_key, 'units': self.units})}"
+
+    def forecast_request(self, city: str) -> str:
+        return f"{self.forecast_url}?{urlencode({'q': city, 'appid': self.api_key, 'units': self.units})}"
+
+    # Get a URL; returns the response, or None for "city not found".
+    async def _get(self, url: str):
+        try:
+            with stage_seconds.time("upstream"):
+                response = await self.client.get(url)
+        except httpx.HTTPError as error:
+            raise WeatherProviderError(str(error)) from error
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise WeatherProviderError(f"OpenWeatherMap answered with status {response.status_code}")
+        return response
+
+    async def fetch(self, city: str) -> Optional[WeatherReport]:
+        response = await self._get(self.weather_request(city))
+        if response is None:
+            return None
+        with stage_seconds.time("parse"):
+            report = parse_response(parse_openweathermap_weather, response.content, city)
+        # only well-formed responses are archived
+        if self.on_payload is not None:
+            self.on_payload(city, response.content)
+        return report
+
+    async def fetch_forecast(self, city: str) -> Optional[list[ForecastReading]]:
+        response = await self._get(self.forecast_request(city))
+        if response is None:
+            return None
+        with stage_seconds.time("parse"):
+            return parse_response(parse_openweathermap_forecast, response.content)
+
+
+# Stub provider: deterministic weather for load tests and offline development, without any network.
+# Every city gets the same weather on every call; cities starting with "unknown" are not found.
+# The payloads have the OpenWeatherMap format, so they can also be served over HTTP (benchmarks/stub_server.py).
+class StubWeatherProvider(WeatherProvider):
+    name = "stub"
+    CONDITIONS = ["Clear", "Clouds", "Rain", "Snow", "Drizzle", "Mist"]
+
+    def __init__(self, latency: float = 0.0):
+        # simulated upstream latency in seconds
+        self.latency = latency
+
+    @staticmethod
+    def is_known(city: str) -> bool:
+        return not city.casefold().startswith("unknown")
+
+    # A current-weather payload in the OpenWeatherMap format.
+    @classmethod
+    def weather_payload(cls, city: str) -> dict:
+        seed = zlib.crc32(city.casefold().encode())
+        temp = seed % 50 - 10
+        return {
+            "weather": [{"main": cls.CONDITIONS[seed % len(cls.CONDITIONS)]}],
+            "main": {
+                "temp": temp,
+                "temp_min": temp - 3,
+                "temp_max": temp + 3,
+                "humidity": seed % 100,
+            },
+            "wind": {"speed": seed % 20},
+            "sys": {"country": "XX", "sunrise": 1700000000 + seed % 3600, "sunset": 1700040000 + seed % 3600},
+            "timezone": 3600,
+            "name": city,
+        }
+
+    # A 5-day / 3-hour forecast payload in the OpenWeatherMap format, starting at the next 3-hour mark.
+    @classmethod
+    def forecast_payload(cls, city: str, now: int) -> dict:
+        seed = zlib.crc32(city.casefold().encode())
+        start = now - now % 10800 + 10800
+        entries = []
+        for step in range(40):
+            entries.append({
+                "dt": start + step * 10800,
+                "main": {"temp": (seed + step * 7) % 50 - 10, "humidity": (seed + step) % 100},
+                "wind": {"speed": (seed + step) % 20},
+                "weather": [{"main": cls.CONDITIONS[(seed + step) % len(cls.CONDITIONS)]}],
+            })
+        return {"cod": "200", "cnt": len(entries), "list": entries, "city": {"name": city, "country": "XX"}}
+
+    async def _wait(self):
+        if self.latency:
+            with stage_seconds.time("upstream"):
+                await asyncio.sleep(self.latency)
+
+    async def fetch(self, city: str) -> Optional[WeatherReport]:
+        await self._wait()
+        if not self.is_known(city):
+            return None
+        payload = self.weather_payload(city)
+        if self.on_payload is not None:
+            self.on_payload(city, json.dumps(payload).encode())
+        with stage_seconds.time("parse"):
+            return parse_openweathermap_weather(city, payload)
+
+    async def fetch_forecast(self, city: str) -> Optional[list[ForecastReading]]:
+        await self._wait()
+        if not self.is_known(city):
+            return None
+        with stage_seconds.time("parse"):
+            return parse_openweathermap_forecast(self.forecast_payload(city, int(time.time())))
+
+
+# Replay provider: answers with the latest archived response of each city (see weather_archive.py),
+# for offline benchmarks and development with recorded weather. Cities that were never archived are not found.
+class ReplayWeatherProvider(WeatherProvider):
+    name = "replay"
+
+    def __init__(self, get_archive: Callable):
+        # called on every lookup, so that the archive is only opened once it is used
+        self.get_archive = get_archive
+
+    async def fetch(self, city: str) -> Optional[WeatherReport]:
+        archive = self.get_archive()
+        found = archive.latest(city) if archive is not None else None
+        if found is None:
+            return None
+        with stage_seconds.time("parse"):
+            return parse_response(parse_openweathermap_weather, found[1], city)
+
+    async def fetch_forecast(self, city: str) -> Optional[list[ForecastReading]]:
+        raise WeatherProviderError("The weather archive has no forecasts")
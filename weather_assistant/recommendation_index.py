@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+# The items of one wardrobe, grouped by (temperature type, waterproof flag).
+class _Wardrobe:
+    def __init__(self, loaded_at: float = 0.0):
+        self.items: dict[tuple[str, bool], dict[int, dict]] = {}
+        self.keys: dict[int, tuple[str, bool]] = {}
+        self.loaded_at = loaded_at
+
+    def add(self, item: dict):
+        key = (item["suitable_temperature"], item["is_waterproof"] == "True")
+        self.items.setdefault(key, {})[item["id"]] = item
+        self.keys[item["id"]] = key
+
+    def remove(self, item_id: int):
+        key = self.keys.pop(item_id, None)
+        if key is not None:
+            bucket = self.items[key]
+            del bucket[item_id]
+            if not bucket:
+                del self.items[key]
+
+    # All items for a temperature type and waterproof flag, in id order.
+    def get(self, suitable_temperature: str, is_waterproof: bool) -> list[dict]:
+        bucket = self.items.get((suitable_temperature, is_waterproof), {})
+        return [bucket[item_id] for item_id in sorted(bucket)]
+
+
+# Recommendation index: the items of each wardrobe grouped by (temperature type, waterproof flag).
+# A wardrobe is loaded from the Items table on its first lookup and then kept up to date by the
+# wardrobe handlers, so a recommendation is a dictionary lookup instead of a database query.
+# At most `max_wardrobes` wardrobes are kept; the least recently used one is dropped and reloaded when needed.
+#
+# The index is per process: the handlers of this worker update it at once, changes made through other
+# workers show up when the wardrobe is reloaded, at most `ttl` seconds after it was loaded.
+# A load reads the database without holding the lock, so it is stamped: if the wardrobe changed while it
+# was being read (e.g. an item added by a concurrent event), the load is used once but not kept.
+class RecommendationIndex:
+    def __init__(self, max_wardrobes: int = 10000, ttl: float = 30, clock=time.monotonic):
+        self.max_wardrobes = max_wardrobes
+        self.ttl = ttl
+        self.clock = clock
+        self._wardrobes: OrderedDict[str, _Wardrobe] = OrderedDict()
+        self._lock = threading.Lock()
+        # change counter, and the value it had at the last change of each recently changed wardrobe;
+        # wardrobes whose entry was dropped count as changed at `_forgotten_changes`
+        self._changes = 0
+        self._changed_at: OrderedDict[str, int] = OrderedDict()
+        self._forgotten_changes = 0
+
+    def _fresh(self, wardrobe_id: str) -> Optional[_Wardrobe]:
+        wardrobe = self._wardrobes.get(wardrobe_id)
+        if wardrobe is not None and wardrobe.loaded_at + self.ttl <= self.clock():
+            del self._wardrobes[wardrobe_id]
+            return None
+        return wardrobe
+
+    def loaded(self, wardrobe_id: str) -> bool:
+        with self._lock:
+            return self._fresh(wardrobe_id) is not None
+
+    # Take a stamp before reading the items of a wardrobe from the database, and pass it to load().
+    def stamp(self) -> int:
+        with self._lock:
+            return self._changes
+
+    # Record a change to a wardrobe (under the lock): loads that started before it are not kept.
+    def _changed(self, wardrobe_id: str):
+        self._changes += 1
+        self._changed_at[wardrobe_id] = self._changes
+        self._changed_at.move_to_end(wardrobe_id)
+        while len(self._changed_at) > self.max_wardrobes:
+            _, changed_at = self._changed_at.popitem(last=False)
+            self._forgotten_changes = max(self._forgotten_changes, changed_at)
+
+    # Build the index of a wardrobe from item dictionaries (see item_to_dict) read after `stamp` was taken.
+    # Keeps it unless the wardrobe changed since then; returns it either way.
+    def load(self, wardrobe_id: str, items, stamp: int) -> _Wardrobe:
+        wardrobe = _Wardrobe(loaded_at=self.clock())
+        for item in items:
+            wardrobe.add(item)
+        with self._lock:
+            if self._changed_at.get(wardrobe_id, self._forgotten_changes) <= stamp:
+                self._wardrobes[wardrobe_id] = wardrobe
+                self._wardrobes.move_to_end(wardrobe_id)
+                while len(self._wardrobes) > self.max_wardrobes:
+                    self._wardrobes.popitem(last=False)
+        return wardrobe
+
+    # Reload a wardrobe (or every wardrobe) on its next lookup, e.g. after a bulk import.
+    def invalidate(self, wardrobe_id: str = None):
+        with self._lock:
+            if wardrobe_id is None:
+                self._wardrobes.clear()
+                self._changes += 1
+                self._changed_at.clear()
+                self._forgotten_changes = self._changes
+            else:
+                self._wardrobes.pop(wardrobe_id, None)
+                self._changed(wardrobe_id)
+
+    # Add a new item, or move an edited item to its new bucket.
+    # Wardrobes that are not loaded are left alone, they are read from the database when needed.
+    def upsert(self, wardrobe_id: str, item: dict):
+        with self._lock:
+            self._changed(wardrobe_id)
+            wardrobe = self._wardrobes.get(wardrobe_id)
+            if wardrobe is not None:
+                wardrobe.remove(item["id"])
+                wardrobe.add(item)
+
+    def remove(self, wardrobe_id: str, item_id: int):
+        with self._lock:
+            self._changed(wardrobe_id)
+            wardrobe = self._wardrobes.get(wardrobe_id)
+            if wardrobe is not None:
+                wardrobe.remove(item_id)
+
+    # All items of a wardrobe for a temperature type and waterproof flag, in id order;
+    # None if the wardrobe is not loaded (or its load expired).
+    def get(self, wardrobe_id: str, suitable_temperature: str, is_waterproof: bool) -> Optional[list[dict]]:
+        with self._lock:
+            wardrobe = self._fresh(wardrobe_id)
+            if wardrobe is None:
+                return None
+            self._wardrobes.move_to_end(wardrobe_id)
+            return wardrobe.get(suitable_temperature, is_waterproof)
+
+    def __len__(self):
+        return sum(len(wardrobe.keys) for wardrobe in self._wardrobes.values())
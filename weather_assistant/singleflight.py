@@ -0,0 +1,27 @@
+import asyncio
+
+# Single-flight: concurrent calls for the same key share a single execution.
+# The first caller runs the coroutine, every other caller awaits it and gets the same result.
+class SingleFlight:
+    def __init__(self):
+        self._calls: dict[object, asyncio.Future] = {}
+
+        # counters
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key, fn):
+        call = self._calls.get(key)
+        if call is not None:
+            self.shared += 1
+            # shield the shared call, so one cancelled waiter does not cancel it for everyone
+            return await asyncio.shield(call)
+
+        self.calls += 1
+        call = asyncio.ensure_future(fn())
+        self._calls[key] = call
+        call.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(call)
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._calls)}
@@ -0,0 +1,237 @@
+import codecs
+import csv
+import io
+import json
+from collections import deque
+
+from sqlalchemy import insert, select
+
+# The columns of a wardrobe file, in export order.
+WARDROBE_COLUMNS: list[str] = ["id", "type", "name", "suitable_temperature", "is_waterproof"]
+
+# Supported file formats and their content types.
+CONTENT_TYPES: dict[str, str] = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+TRUE_VALUES = {"true", "1", "yes"}
+FALSE_VALUES = {"false", "0", "no", ""}
+
+# At most this many errors are listed in the import result (the others are only counted).
+MAX_ERRORS = 100
+# A CSV record (a quoted field can span lines) longer than this is reported as an unterminated quote.
+MAX_RECORD_LINES = 100
+
+
+# Parse one row of a wardrobe file into the values of an Items row.
+# Raises ValueError with a readable message if the row is invalid.
+def validate_row(row: dict, clothing_types: list[str], temperature_types: list[str]) -> dict:
+    item_type = str(row.get("type") or "").strip()
+    if item_type not in clothing_types:
+        raise ValueError(f"type must be one of {', '.join(clothing_types)}, got {item_type!r}")
+
+    name = str(row.get("name") or "").strip()
+    if not name:
+        raise ValueError("name is required")
+
+    suitable_temperature = str(row.get("suitable_temperature") or "").strip()
+    if suitable_temperature not in temperature_types:
+        raise ValueError(
+            f"suitable_temperature must be one of {', '.join(temperature_types)}, got {suitable_temperature!r}"
+        )
+
+    is_waterproof = row.get("is_waterproof")
+    if not isinstance(is_waterproof, bool):
+        value = str(is_waterproof or "").strip().lower()
+        if value in TRUE_VALUES:
+            is_waterproof = True
+        elif value in FALSE_VALUES:
+            is_waterproof = False
+        else:
+            raise ValueError(f"is_waterproof must be True or False, got {is_waterproof!r}")
+
+    return {
+        "type": item_type,
+        "name": name,
+        "suitable_temperature": suitable_temperature,
+        "is_waterproof": is_waterproof,
+    }
+
+
+# The lines a CSV reader reads from: fed one complete record at a time, so that one reader parses the whole file.
+class _RecordLines:
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+# Wardrobe importer: parses a CSV or JSON Lines file line by line, validates the rows
+# and collects them into chunks that are inserted into one wardrobe with one executemany per transaction.
+# A quoted CSV field can span lines (as item names with line breaks are exported): the lines of a record
+# are collected until its quotes are balanced, then the record is read by the CSV reader of the file.
+class WardrobeImporter:
+    def __init__(
+        self,
+        file_format: str,
+        clothing_types: list[str],
+        temperature_types: list[str],
+        chunk_size: int = 1000,
+        wardrobe_id: str = "",
+    ):
+        if file_format not in CONTENT_TYPES:
+            raise ValueError(f"Unsupported format {file_format!r}, use one of {', '.join(CONTENT_TYPES)}")
+        self.file_format = file_format
+        self.clothing_types = clothing_types
+        self.temperature_types = temperature_types
+        self.chunk_size = chunk_size
+        self.wardrobe_id = wardrobe_id
+
+        self.header = None
+        self.line_number = 0
+        self.pending: list[dict] = []
+        self.inserted = 0
+        self.errors: list[str] = []
+        self.error_count = 0
+
+        # the CSV record being read: its lines, first line number and number of quote characters
+        self._record: list[str] = []
+        self._record_line = 0
+        self._quotes = 0
+        self._lines = _RecordLines()
+        self._reader = csv.reader(self._lines)
+
+    def _error(self, line_number: int, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"line {line_number}: {message}")
+
+    # Collect a line of a CSV record. Returns the values of the record once it is complete, or None.
+    def _csv_record(self, line: str):
+        if not self._record:
+            self._record_line = self.line_number
+        self._record.append(line if line.endswith("\n") else line + "\n")
+        # escaped quotes come in pairs: the record goes on while a quoted field is open
+        self._quotes += line.count('"')
+        if self._quotes % 2:
+            if len(self._record) < MAX_RECORD_LINES:
+                return None
+            self._record, self._quotes = [], 0
+            raise ValueError(f"unterminated quoted field (more than {MAX_RECORD_LINES} lines)")
+        self._lines.lines.extend(self._record)
+        self._record, self._quotes = [], 0
+        return next(self._reader)
+
+    def _parse(self, line: str):
+        if self.file_format == "jsonl":
+            return json.loads(line)
+        values = self._csv_record(line)
+        if values is None:
+            return None
+        if self.header is None:
+            self.header = [value.strip() for value in values]
+            return None
+        return dict(zip(self.header, values))
+
+    # Feed one line of the file. Returns a chunk of rows when it is ready to be inserted.
+    def feed(self, line: str):
+        self.line_number += 1
+        if not self._record and not line.strip():
+            return None
+        try:
+            row = self._parse(line)
+            if row is None:
+                return None
+            values = validate_row(row, self.clothing_types, self.temperature_types)
+            values["wardrobe_id"] = self.wardrobe_id
+            self.pending.append(values)
+        except (ValueError, TypeError, AttributeError, csv.Error) as error:
+            self._error(self._record_line if self.file_format == "csv" else self.line_number, error)
+            return None
+        if len(self.pending) >= self.chunk_size:
+            return self.flush()
+        return None
+
+    # Take the rows that are waiting to be inserted.
+    def flush(self) -> list[dict]:
+        chunk, self.pending = self.pending, []
+        return chunk
+
+    # The end of the file: a CSV record that is still open has an unterminated quote.
+    def finish(self) -> list[dict]:
+        if self._record:
+            self._error(self._record_line, "unterminated quoted field")
+            self._record, self._quotes = [], 0
+        return self.flush()
+
+    # Insert a chunk of rows in one transaction.
+    def insert(self, engine, table, chunk: list[dict]):
+        if not chunk:
+            return
+        with engine.begin() as connection:
+            connection.execute(insert(table), chunk)
+        self.inserted += len(chunk)
+
+    # Import a whole file (an iterable of lines).
+    def run(self, engine, table, lines):
+        for line in lines:
+            chunk = self.feed(line)
+            if chunk:
+                self.insert(engine, table, chunk)
+        self.insert(engine, table, self.finish())
+        return self.result()
+
+    def result(self) -> dict:
+        return {"inserted": self.inserted, "errors": self.errors, "error_count": self.error_count}
+
+
+# Split a stream of UTF-8 byte chunks (e.g. a request body) into lines, with their line endings
+# (a line break inside a quoted CSV field is part of the value).
+async def iter_lines(chunks):
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        lines = buffer.split("\n")
+        buffer = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+# Stream a wardrobe as CSV or JSON Lines, reading `batch_size` items at a time (keyset paging on id).
+def export_lines(engine, table, file_format: str, batch_size: int = 1000, wardrobe_id: str = ""):
+    if file_format not in CONTENT_TYPES:
+        raise ValueError(f"Unsupported format {file_format!r}, use one of {', '.join(CONTENT_TYPES)}")
+
+    columns = [table.__table__.c[name] for name in WARDROBE_COLUMNS]
+    if file_format == "csv":
+        yield ",".join(WARDROBE_COLUMNS) + "\n"
+
+    last_id = 0
+    while True:
+        statement = select(*columns) \
+            .where(table.wardrobe_id == wardrobe_id, table.id > last_id) \
+            .order_by(table.id) \
+            .limit(batch_size)
+        with engine.connect() as connection:
+            rows = connection.execute(statement).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        if file_format == "jsonl":
+            yield "".join(json.dumps(dict(zip(WARDROBE_COLUMNS, row))) + "\n" for row in rows)
+        else:
+            output = io.StringIO()
+            csv.writer(output, lineterminator="\n").writerows(rows)
+            yield output.getvalue()
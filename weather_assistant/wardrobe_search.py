@@ -0,0 +1,35 @@
+import re
+
+# Wardrobe search index: an SQLite FTS5 table over the name and type of the items, kept in sync with
+# the items table by triggers. The wardrobe id is indexed too, so a search only reads the postings of
+# one wardrobe. Prefix indexes make the incremental "search as you type" queries cheap.
+SEARCH_TABLE = "items_fts"
+
+SEARCH_INDEX_DDL: list[str] = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "wardrobe_id, name, type, content='items', content_rowid='id', prefix='2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert AFTER INSERT ON items BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}(rowid, wardrobe_id, name, type) VALUES (new.id, new.wardrobe_id, new.name, new.type); "
+    "END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete AFTER DELETE ON items BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, wardrobe_id, name, type) "
+    "VALUES ('delete', old.id, old.wardrobe_id, old.name, old.type); "
+    "END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update AFTER UPDATE OF wardrobe_id, name, type ON items BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, wardrobe_id, name, type) "
+    "VALUES ('delete', old.id, old.wardrobe_id, old.name, old.type); "
+    f"INSERT INTO {SEARCH_TABLE}(rowid, wardrobe_id, name, type) VALUES (new.id, new.wardrobe_id, new.name, new.type); "
+    "END",
+]
+
+# Shorter terms are not looked up in the search index (see wardrobe_conditions).
+MIN_INDEX_TERM_LENGTH = 2
+
+# The words of a search box query.
+def search_terms(query: str) -> list[str]:
+    return re.findall(r"\w+", query)
+
+# FTS5 query: the items of the wardrobe whose name or type has a word starting with every term.
+def fts_query(wardrobe_id: str, terms: list[str]) -> str:
+    wardrobe = '"' + wardrobe_id.replace('"', '""') + '"'
+    return " AND ".join([f"wardrobe_id:{wardrobe}"] + [f'{{name type}}:"{term}"*' for term in terms])
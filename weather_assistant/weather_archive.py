@@ -0,0 +1,490 @@
+import contextlib
+import heapq
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator, Optional
+
+from weather_assistant.weather_cache import normalize_city
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Weather archive: every raw weather response, appended to compressed segment files.
+# A segment starts with SEGMENT_MAGIC, followed by records: a RECORD_HEADER (fetch time, length of the city
+# name, length and CRC-32 of the compressed payload), the city name and the payload, compressed on its own
+# with a preset dictionary of the OpenWeatherMap format (a response is too small to compress well alone).
+# Segments are memory-mapped for reading. The index (fetch times and record positions per city) is kept in
+# memory and rebuilt from the record headers when the archive is opened.
+# Old segments are listed and deleted without holding the archive lock; dropping a segment from the index
+# costs O(records in the segment). Segments deleted by another process are unmapped (so their disk space is
+# freed) when this process rotates, or on the first append check_interval seconds after the last check.
+# Every process appends to segments it created itself (workers can share the directory), starting a new one
+# when it opens the archive; the segments of other processes are indexed as they were at that time.
+# The size bound is for the whole directory. A process holds a lock on the segment it appends to, and rotation
+# never deletes a locked segment, so the directory can exceed max_bytes by the open segments of the live
+# processes (at most segment_bytes each). Without file locks (Windows) a process only deletes its own segments.
+# Appends are not fsynced: after a crash the incomplete last record is detected by its length or CRC and ignored.
+SEGMENT_MAGIC = b"WXARCH1\n"
+SEGMENT_SUFFIX = ".archive"
+RECORD_HEADER = struct.Struct("<dHII")
+
+ZDICT = (
+    b'"Thunderstorm","Drizzle","Snow","Mist","Smoke","Haze","Fog","Clouds","Clear","Rain",'
+    b'"description":"light rain","description":"moderate rain","description":"few clouds",'
+    b'"description":"scattered clouds","description":"broken clouds","description":"overcast clouds",'
+    b'{"coord":{"lon":2.3488,"lat":48.8534},"weather":[{"id":800,"main":"Clear","description":"clear sky",'
+    b'"icon":"01d"}],"base":"stations","main":{"temp":15.2,"feels_like":14.5,"temp_min":13.9,"temp_max":16.1,'
+    b'"pressure":1021,"humidity":72,"sea_level":1021,"grnd_level":1011},"visibility":10000,'
+    b'"wind":{"speed":3.6,"deg":240,"gust":5.1},"rain":{"1h":0.2},"clouds":{"all":0},"dt":1700000000,'
+    b'"sys":{"type":2,"id":2041230,"country":"FR","sunrise":1699950000,"sunset":1699990000},'
+    b'"timezone":3600,"id":2988507,"name":"Paris","cod":200}'
+)
+
+
+def compress_payload(payload: bytes) -> bytes:
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15, zdict=ZDICT)
+    return compressor.compress(payload) + compressor.flush()
+
+
+def decompress_payload(data: bytes) -> bytes:
+    return zlib.decompressobj(-15, zdict=ZDICT).decompress(data)
+
+
+# The records of one city, in fetch time order: fetch times and (segment number, offset) of each record.
+# (Workers sharing the directory append to their own segments, so segment order is not time order.)
+# The records of deleted segments are removed from the front; the others (`dead`) stay until they are
+# half of the records.
+class _CityIndex:
+    __slots__ = ("city", "times", "segments", "offsets", "dead")
+
+    def __init__(self, city: str):
+        self.city = city
+        self.times = array("d")
+        self.segments = array("I")
+        self.offsets = array("Q")
+        self.dead = 0
+
+    def add(self, fetched_at: float, segment: int, offset: int):
+        if not self.times or fetched_at >= self.times[-1]:
+            self.times.append(fetched_at)
+            self.segments.append(segment)
+            self.offsets.append(offset)
+        else:
+            position = bisect_right(self.times, fetched_at)
+            self.times.insert(position, fetched_at)
+            self.segments.insert(position, segment)
+            self.offsets.insert(position, offset)
+
+    # The position of the latest record that is not in a deleted segment, or None.
+    def latest(self, dropped: set) -> Optional[int]:
+        for position in range(len(self.times) - 1, -1, -1):
+            if self.segments[position] not in dropped:
+                return position
+        return None
+
+    # Remove the leading records of deleted segments (the oldest records usually are). Returns their number.
+    def drop_oldest(self, dropped: set) -> int:
+        count = 0
+        while count < len(self.segments) and self.segments[count] in dropped:
+            count += 1
+        if count:
+            del self.times[:count]
+            del self.segments[:count]
+            del self.offsets[:count]
+        return count
+
+    # Remove the records of the deleted segments.
+    def compact(self, dropped: set):
+        kept = [position for position, number in enumerate(self.segments) if number not in dropped]
+        self.times = array("d", (self.times[position] for position in kept))
+        self.segments = array("I", (self.segments[position] for position in kept))
+        self.offsets = array("Q", (self.offsets[position] for position in kept))
+        self.dead = 0
+
+
+class _Segment:
+    def __init__(self, number: int, path: str, size: int):
+        self.number = number
+        self.path = path
+        self.size = size
+        self.view: Optional[mmap.mmap] = None
+        # number of records per city key
+        self.cities: dict[str, int] = {}
+
+    # The segment mapped into memory, mapped again if records were appended since.
+    def mapped(self) -> mmap.mmap:
+        if self.view is None or len(self.view) < self.size:
+            self.close()
+            with open(self.path, "rb") as file:
+                self.view = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.view
+
+    def close(self):
+        if self.view is not None:
+            self.view.close()
+            self.view = None
+
+
+class WeatherArchive:
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 16 << 20,
+        max_bytes: int = 256 << 20,
+        check_interval: float = 60,
+        clock=time.time,
+    ):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self.clock = clock
+        self._segments: list[_Segment] = []
+        self._by_number: dict[int, _Segment] = {}
+        self._index: dict[str, _CityIndex] = {}
+        self._lock = threading.Lock()
+        self._fd = None
+        # numbers of the segments created by this process, and of the deleted segments
+        self._own: set[int] = set()
+        self._dropped: set[int] = set()
+        self._next_check = time.monotonic() + check_interval
+
+        # counters
+        self.appended = 0
+        self.appended_payload_bytes = 0
+        self.appended_bytes = 0
+        self.write_errors = 0
+        self.dropped_segments = 0
+
+        os.makedirs(directory, exist_ok=True)
+        names = sorted(name for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+        for name in names:
+            path = os.path.join(directory, name)
+            segment = _Segment(int(name[:-len(SEGMENT_SUFFIX)]), path, os.path.getsize(path))
+            self._scan(segment)
+            self._add_segment(segment)
+        self._new_segment()
+
+    # Index the records of a segment, up to an incomplete or corrupt record.
+    def _scan(self, segment: _Segment):
+        if segment.size <= len(SEGMENT_MAGIC):
+            return
+        view = segment.mapped()
+        if view[:len(SEGMENT_MAGIC)] != SEGMENT_MAGIC:
+            raise ValueError(f"{segment.path} is not a weather archive segment")
+        offset = len(SEGMENT_MAGIC)
+        while offset + RECORD_HEADER.size <= segment.size:
+            fetched_at, city_length, payload_length, crc = RECORD_HEADER.unpack_from(view, offset)
+            start = offset + RECORD_HEADER.size + city_length
+            end = start + payload_length
+            if end > segment.size or zlib.crc32(view[start:end]) != crc:
+                break
+            city = bytes(view[offset + RECORD_HEADER.size:start]).decode()
+            self._index_record(city, fetched_at, segment, offset)
+            offset = end
+        if offset < segment.size:
+            segment.close()
+            segment.size = offset
+
+    def _index_record(self, city: str, fetched_at: float, segment: _Segment, offset: int):
+        key = normalize_city(city)
+        index = self._index.get(key)
+        if index is None:
+            index = self._index[key] = _CityIndex(city)
+        index.add(fetched_at, segment.number, offset)
+        segment.cities[key] = segment.cities.get(key, 0) + 1
+
+    def _add_segment(self, segment: _Segment):
+        self._segments.append(segment)
+        self._by_number[segment.number] = segment
+
+    # Create the segment to append to, with the next free number.
+    def _new_segment(self):
+        number = self._segments[-1].number + 1 if self._segments else 0
+        while True:
+            path = os.path.join(self.directory, f"{number:08d}{SEGMENT_SUFFIX}")
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND)
+            except FileExistsError:
+                # created by another process
+                number += 1
+                continue
+            break
+        # locked before the magic is written: a segment shorter than that is still being created
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        os.write(fd, SEGMENT_MAGIC)
+        if self._fd is not None:
+            os.close(self._fd)  # releases the lock of the previous segment
+        self._fd = fd
+        self._own.add(number)
+        self._add_segment(_Segment(number, path, len(SEGMENT_MAGIC)))
+
+    # The segment files in the directory, oldest first: (number, path, size).
+    def _listing(self) -> list[tuple[int, str, int]]:
+        segments = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(SEGMENT_SUFFIX):
+                    with contextlib.suppress(FileNotFoundError):
+                        segments.append((int(entry.name[:-len(SEGMENT_SUFFIX)]), entry.path, entry.stat().st_size))
+        return sorted(segments)
+
+    # Delete the oldest closed segments of the directory while it is above max_bytes (after a new segment
+    # was started), and forget the segments deleted by other processes. Runs without the archive lock:
+    # lookups only wait while a deleted segment is dropped from the index.
+    def _delete_oldest(self):
+        with self._lock:
+            active = self._segments[-1].number
+        segments = self._listing()
+        listed = {number for number, _, _ in segments}
+        with self._lock:
+            for number in [number for number in self._by_number if number not in listed]:
+                self._drop(number)
+        total = sum(size for _, _, size in segments)
+        for number, path, size in segments:
+            if total <= self.max_bytes:
+                break
+            if number != active and size >= len(SEGMENT_MAGIC) and self._remove_closed(number, path):
+                total -= size
+        self._next_check = time.monotonic() + self.check_interval
+
+    # Delete a segment no process appends to any more. Returns False if it is still open.
+    def _remove_closed(self, number: int, path: str) -> bool:
+        if fcntl is None:
+            if number not in self._own:
+                return False
+            with self._lock:
+                self._drop(number)
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            return True
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            # deleted by another process
+            with self._lock:
+                self._drop(number)
+            return True
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        else:
+            with self._lock:
+                self._drop(number)
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            return True
+        finally:
+            os.close(fd)
+
+    # Forget a deleted segment: unmap it and remove its records from their cities, in O(records in the segment)
+    # (records that are not the oldest of their city are removed once half of the city's records are dead).
+    def _drop(self, number: int):
+        segment = self._by_number.pop(number, None)
+        if segment is None:
+            return
+        self._segments.remove(segment)
+        segment.close()
+        self._dropped.add(number)
+        for key, count in segment.cities.items():
+            index = self._index[key]
+            index.dead += count
+            index.dead -= index.drop_oldest(self._dropped)
+            if index.dead == len(index.times):
+                del self._index[key]
+            elif index.dead * 2 > len(index.times):
+                index.compact(self._dropped)
+        self.dropped_segments += 1
+
+    # Append a raw response. Returns False if it could not be written (the lookup goes on without it).
+    def append(self, city: str, payload: bytes, fetched_at: Optional[float] = None) -> bool:
+        fetched_at = self.clock() if fetched_at is None else fetched_at
+        city_bytes = city.encode()
+        compressed = compress_payload(payload)
+        record = RECORD_HEADER.pack(fetched_at, len(city_bytes), len(compressed), zlib.crc32(compressed)) \
+            + city_bytes + compressed
+        rotated = False
+        with self._lock:
+            try:
+                segment = self._segments[-1]
+                if segment.size > len(SEGMENT_MAGIC) and segment.size + len(record) > self.segment_bytes:
+                    self._new_segment()
+                    rotated = True
+                    segment = self._segments[-1]
+                os.write(self._fd, record)
+            except OSError:
+                self.write_errors += 1
+                return False
+            self._index_record(city, fetched_at, segment, segment.size)
+            segment.size += len(record)
+            self.appended += 1
+            self.appended_payload_bytes += len(payload)
+            self.appended_bytes += len(record)
+        if rotated or time.monotonic() >= self._next_check:
+            try:
+                self._delete_oldest()
+            except OSError:
+                self.write_errors += 1
+        return True
+
+    def _read(self, segment_number: int, offset: int) -> bytes:
+        view = self._by_number[segment_number].mapped()
+        _, city_length, payload_length, _ = RECORD_HEADER.unpack_from(view, offset)
+        start = offset + RECORD_HEADER.size + city_length
+        return decompress_payload(view[start:start + payload_length])
+
+    # The latest response of a city: (fetch time, payload), or None.
+    def latest(self, city: str) -> Optional[tuple[float, bytes]]:
+        with self._lock:
+            index = self._index.get(normalize_city(city))
+            if index is None:
+                return None
+            position = index.latest(self._dropped)
+            return index.times[position], self._read(index.segments[position], index.offsets[position])
+
+    # The responses of a city fetched between start and end, in fetch time order.
+    def history(self, city: str, start: float, end: float) -> list[tuple[float, bytes]]:
+        with self._lock:
+            index = self._index.get(normalize_city(city))
+            if index is None:
+                return []
+            first = bisect_left(index.times, start)
+            last = bisect_right(index.times, end)
+            return [
+                (index.times[position], self._read(index.segments[position], index.offsets[position]))
+                for position in range(first, last)
+                if index.segments[position] not in self._dropped
+            ]
+
+    # The latest response of the most recently fetched cities: (city, fetch time, payload), newest first.
+    def latest_responses(self, limit: int) -> list[tuple[str, float, bytes]]:
+        with self._lock:
+            latest = [(index, index.latest(self._dropped)) for index in self._index.values()]
+            latest = heapq.nlargest(limit, latest, key=lambda found: found[0].times[found[1]])
+            return [
+                (index.city, index.times[position], self._read(index.segments[position], index.offsets[position]))
+                for index, position in latest
+            ]
+
+    # Every archived response in append order: (fetch time, city, payload). For offline benchmarks and analytics.
+    def replay(self, start: float = float("-inf"), end: float = float("inf")) -> Iterator[tuple[float, str, bytes]]:
+        with self._lock:
+            segments = [(segment.number, segment.size) for segment in self._segments]
+        for number, size in segments:
+            offset = len(SEGMENT_MAGIC)
+            while offset < size:
+                with self._lock:
+                    segment = self._by_number.get(number)
+                    if segment is None:
+                        break  # deleted by rotation in the meantime
+                    view = segment.mapped()
+                    fetched_at, city_length, payload_length, _ = RECORD_HEADER.unpack_from(view, offset)
+                    city_start = offset + RECORD_HEADER.size
+                    city = bytes(view[city_start:city_start + city_length]).decode()
+                    payload = view[city_start + city_length:city_start + city_length + payload_length]
+                    offset = city_start + city_length + payload_length
+                if start <= fetched_at <= end:
+                    yield fetched_at, city, decompress_payload(payload)
+
+    def cities(self) -> list[str]:
+        with self._lock:
+            return [index.city for index in self._index.values()]
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+                # nothing was appended to the segment of this process
+                if self._segments[-1].size == len(SEGMENT_MAGIC):
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(self._segments[-1].path)
+            for segment in self._segments:
+                segment.close()
+
+    def stats(self) -> dict:
+        return {
+            "segments": len(self._segments),
+            "bytes": sum(segment.size for segment in self._segments),
+            "cities": len(self._index),
+            "appended": self.appended,
+            "appended_payload_bytes": self.appended_payload_bytes,
+            "appended_bytes": self.appended_bytes,
+            "write_errors": self.write_errors,
+            "dropped_segments": self.dropped_segments,
+        }
+
+
+_archive: Optional[WeatherArchive] = None
+_archive_lock = threading.Lock()
+# The archive could not be opened (e.g. the directory is not writable): it stays off in this process.
+_open_failed = False
+open_errors = 0
+
+# The weather archive of the process, opened on first use.
+# None if WEATHER_ARCHIVE_DIR is empty or the archive could not be opened: lookups go on without it.
+def get_weather_archive() -> Optional[WeatherArchive]:
+    global _archive, _open_failed, open_errors
+    directory = os.getenv("WEATHER_ARCHIVE_DIR", "weather_archive")
+    if not directory or _open_failed:
+        return None
+    if _archive is None:
+        with _archive_lock:
+            if _archive is None and not _open_failed:
+                try:
+                    _archive = WeatherArchive(
+                        directory,
+                        segment_bytes=int(os.getenv("WEATHER_ARCHIVE_SEGMENT_BYTES", str(16 << 20))),
+                        max_bytes=int(os.getenv("WEATHER_ARCHIVE_MAX_BYTES", str(256 << 20))),
+                    )
+                except (OSError, ValueError):
+                    _open_failed = True
+                    open_errors += 1
+    return _archive
+
+
+# Appends run on one background thread, in order: opening the archive, writing and deleting old segments
+# stay off the event loop. (The thread is started by the first append.)
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="weather-archive")
+
+def _append(city: str, payload: bytes, fetched_at: float) -> bool:
+    archive = get_weather_archive()
+    return archive is not None and archive.append(city, payload, fetched_at)
+
+# Append a raw response to the archive of the process in the background; the future tells if it was written.
+# Nothing is handed to the thread while the archive is turned off.
+def archive_in_background(city: str, payload: bytes, fetched_at: Optional[float] = None) -> Future:
+    if _open_failed or not os.getenv("WEATHER_ARCHIVE_DIR", "weather_archive"):
+        skipped = Future()
+        skipped.set_result(False)
+        return skipped
+    return _writer.submit(_append, city, payload, time.time() if fetched_at is None else fetched_at)
+
+
+def _close():
+    global _archive
+    with _archive_lock:
+        if _archive is not None:
+            _archive.close()
+            _archive = None
+
+# Close the archive, e.g. when the worker shuts down, after the pending appends.
+def close_weather_archive():
+    _writer.submit(_close).result()
+
+
+# The counters of the archive, if it is open, and the failed attempts to open it.
+def weather_archive_stats() -> dict:
+    archive = _archive
+    return {**(archive.stats() if archive is not None else {}), "open_errors": open_errors}
@@ -1,11 +1,37 @@
 import reflex as rx
-import pandas as pd
-import requests
+import asyncio
+import dataclasses
 import datetime
 import os
-from sqlmodel import SQLModel, Field, create_engine, select
-from dotenv import load_dotenv
-from urllib.parse import urlencode
+import secrets
+import json
+import math
+import time
+from typing import Optional
+from sqlalchemy import DDL, Column, Index, SmallInteger, column, event, or_, text, update
+from sqlalchemy.types import TypeDecorator
+from sqlmodel import SQLModel, Field, select, func
+from fastapi import HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from reflex.middleware import Middleware
+from reflex.utils.format import json_dumps
+from weather_assistant.weather_cache import MISSING, WeatherCache, normalize_city, weather_cache_key
+from weather_assistant.singleflight import SingleFlight
+from weather_assistant.weather_client import WeatherClient
+from weather_assistant.providers import OpenWeatherMapProvider, ReplayWeatherProvider, StubWeatherProvider, WeatherProvider, WeatherProviderError, WeatherReport, parse_openweathermap_weather, parse_response
+from weather_assistant.weather_archive import archive_in_background, close_weather_archive, get_weather_archive, weather_archive_stats
+from weather_assistant.recommendation_index import RecommendationIndex
+from weather_assistant.forecast_store import ForecastStore
+from weather_assistant.prefetch import PopularityTracker, PrefetchScheduler
+from weather_assistant.clothing import get_temperature_type, get_default_clothing_advice, classify_temperatures
+from weather_assistant.database import dispose_engine, get_engine, get_session
+from weather_assistant.advice_memo import AdviceMemo
+from weather_assistant.outfits import Outfit, top_outfits
+from weather_assistant.wardrobe_search import MIN_INDEX_TERM_LENGTH, SEARCH_INDEX_DDL, SEARCH_TABLE, fts_query, search_terms
+from weather_assistant.metrics import render_metrics, stage_seconds, state_delta_bytes
+from weather_assistant.gazetteer import City, get_gazetteer
+from weather_assistant.wardrobe_io import CONTENT_TYPES, WardrobeImporter, export_lines, iter_lines
 
 # CSS Stylesheet
 css: dict = {
@@ -34,6 +60,11 @@ css: dict = {
         "font size": "32px",
         "color": "#3e8be7",
     },
+    "suggestions":{
+        "width": "55%",
+        "border_radius": "10px",
+        "box_shadow": "0px 10px 20px 0px rgba(0,0,0,0.15)",
+    },
     "single_stack":{
         "width": "100%",
         "align_items": "center",
@@ -78,22 +109,165 @@ css: dict = {
     },
 }
 
-# Get the API key from the environment variables.
-load_dotenv()
+# Get the API key from the environment variables (rxconfig.py reads the .env file).
 API_KEY: str = os.getenv("KEY")
 
-# API request: construct the URL based on the given city name.
-def get_weather_request(city: str):
-    base_url = "https://api.openweathermap.org/data/2.5/weather"
-    query_parameters = {
-        "q": city,
-        "appid": API_KEY,
-        "units": "metric"
-    }
-    encoded_parameters = urlencode(query_parameters)
-    full_url = f"{base_url}?{encoded_parameters}"
+# Weather cache: responses are shared by all sessions for WEATHER_CACHE_TTL seconds,
+# "City not found" answers for WEATHER_CACHE_NEGATIVE_TTL seconds.
+weather_cache = WeatherCache(
+    ttl=float(os.getenv("WEATHER_CACHE_TTL", "600")),
+    max_size=int(os.getenv("WEATHER_CACHE_SIZE", "1024")),
+    negative_ttl=float(os.getenv("WEATHER_CACHE_NEGATIVE_TTL", "60")),
+)
+
+# Concurrent lookups of the same city share one upstream request.
+weather_flight = SingleFlight()
+
+# All weather requests go through one pooled HTTP client with timeouts and bounded concurrency.
+weather_client = WeatherClient(
+    max_connections=int(os.getenv("WEATHER_MAX_CONNECTIONS", "100")),
+    max_concurrency=int(os.getenv("WEATHER_MAX_CONCURRENCY", "100")),
+    connect_timeout=float(os.getenv("WEATHER_CONNECT_TIMEOUT", "3")),
+    read_timeout=float(os.getenv("WEATHER_READ_TIMEOUT", "5")),
+)
+
+# Weather provider: OpenWeatherMap by default, WEATHER_PROVIDER=stub for offline development and load tests,
+# WEATHER_PROVIDER=replay to answer with the responses recorded in the weather archive.
+def create_weather_provider() -> WeatherProvider:
+    provider_name = os.getenv("WEATHER_PROVIDER", "openweathermap")
+    if provider_name == "stub":
+        return StubWeatherProvider(latency=float(os.getenv("STUB_WEATHER_LATENCY", "0")))
+    if provider_name == "replay":
+        return ReplayWeatherProvider(get_weather_archive)
+    if provider_name == "openweathermap":
+        return OpenWeatherMapProvider(
+            API_KEY,
+            weather_client,
+            weather_url=os.getenv("WEATHER_API_URL", "https://api.openweathermap.org/data/2.5/weather"),
+            forecast_url=os.getenv("FORECAST_API_URL", "https://api.openweathermap.org/data/2.5/forecast"),
+        )
+    raise ValueError(f"Unknown WEATHER_PROVIDER {provider_name!r}, use 'openweathermap', 'stub' or 'replay'")
+
+weather_provider = create_weather_provider()
+
+# Weather archive: every raw weather response is appended to a compressed archive on disk
+# (WEATHER_ARCHIVE_DIR, see weather_archive.py), to warm the cache after a restart and to replay.
+# The append runs in the background, the lookup does not wait for the disk.
+def archive_weather_payload(city: str, payload: bytes):
+    archive_in_background(city, payload)
+
+weather_provider.on_payload = archive_weather_payload
+
+# Warm start: fill the weather cache with the archived responses that are still fresh,
+# so that a restarted worker does not request the weather of the recent cities again.
+def warm_weather_cache() -> int:
+    archive = get_weather_archive()
+    if archive is None:
+        return 0
+    now = time.time()
+    warmed = 0
+    for city, fetched_at, payload in archive.latest_responses(weather_cache.max_size):
+        age = now - fetched_at
+        if age >= weather_cache.ttl:
+            # newest first, the others are older
+            break
+        try:
+            report = parse_response(parse_openweathermap_weather, payload, city)
+        except WeatherProviderError:
+            continue
+        weather_cache.put(weather_cache_key(city), report, ttl=weather_cache.ttl - age)
+        warmed += 1
+    return warmed
+
+# City names are resolved in the local gazetteer (see weather_assistant/gazetteer.py) before any API call:
+# every spelling of a known city shares one cache entry.
+# Returns the city of the gazetteer, or None if it is unknown or the gazetteer is turned off.
+def find_city(city: str) -> Optional[City]:
+    gazetteer = get_gazetteer()
+    return gazetteer.resolve(city) if gazetteer is not None else None
+
+# Names that are not in the gazetteer are sent to the weather provider as typed (the bundled gazetteer only
+# lists the large cities). With a complete city list in GAZETTEER_PATH, GAZETTEER_REJECT_UNKNOWN=true
+# rejects them without a request.
+GAZETTEER_REJECT_UNKNOWN: bool = os.getenv("GAZETTEER_REJECT_UNKNOWN", "false").lower() in ("1", "true", "yes")
+
+# The name to send to the weather provider: the city id of the gazetteer, or the name as typed if the
+# gazetteer does not know it. None if unknown names are rejected.
+def canonical_city(city: str) -> Optional[str]:
+    found = find_city(city)
+    if found is not None:
+        return found.id
+    if GAZETTEER_REJECT_UNKNOWN and get_gazetteer() is not None:
+        return None
+    return city
+
+# Get the weather report for the given city, from the cache if possible.
+# Returns None if the city was not found.
+async def fetch_weather(city: str):
+    city = canonical_city(city)
+    if city is None:
+        return None
+    key = weather_cache_key(city)
+    popular_cities.record(key, city)
+    report = weather_cache.get(key)
+    if report is not MISSING:
+        return report
+    return await weather_flight.do(key, lambda: request_weather(city, key))
+
+# Request the weather report from the provider and store the answer in the cache.
+async def request_weather(city: str, key):
+    try:
+        report = await weather_provider.fetch(city)
+    except WeatherProviderError:
+        # timeouts and server errors are not cached, the next lookup tries again
+        return None
+    # "City not found" (None) is cached too
+    weather_cache.put(key, report)
+    return report
+
+# Prefetching: the most popular cities are refreshed in the background before their cache entries expire,
+# with at most PREFETCH_BUDGET_PER_MINUTE API calls per minute in each worker (the caches are per worker too).
+popular_cities = PopularityTracker()
+
+async def prefetch_weather(key, city: str):
+    await weather_flight.do(key, lambda: request_weather(city, key))
 
-    return full_url
+prefetch_scheduler = PrefetchScheduler(
+    popular_cities,
+    weather_cache,
+    prefetch_weather,
+    top_n=int(os.getenv("PREFETCH_TOP_N", "50")),
+    budget_per_minute=int(os.getenv("PREFETCH_BUDGET_PER_MINUTE", "30")),
+    interval=float(os.getenv("PREFETCH_INTERVAL", "30")),
+    refresh_ahead=float(os.getenv("PREFETCH_REFRESH_AHEAD", "90")),
+)
+
+# Forecast store: forecasts are kept per city and refreshed after FORECAST_TTL seconds.
+FORECAST_TTL: int = int(os.getenv("FORECAST_TTL", "3600"))
+forecast_store = ForecastStore(retention=int(os.getenv("FORECAST_RETENTION", str(24 * 3600))))
+
+# Make sure the forecast for the given city is in the forecast store.
+# Returns the store key of the city, or None if the city was not found.
+async def fetch_forecast(city: str):
+    city = canonical_city(city)
+    if city is None:
+        return None
+    key = normalize_city(city)
+    if forecast_store.fetched_at(key) + FORECAST_TTL > time.time():
+        return key
+    found = await weather_flight.do(("forecast", key), lambda: request_forecast(city, key))
+    return key if found else None
+
+# Request the forecast from the provider and store its readings.
+async def request_forecast(city: str, key: str) -> bool:
+    try:
+        readings = await weather_provider.fetch_forecast(city)
+    except WeatherProviderError:
+        return False
+    if readings is None:
+        return False
+    forecast_store.ingest(key, readings, now=int(time.time()))
+    return True
 
 # Weather images: map the weather condition to the corresponding image.
 WEATHER_IMAGE_MAP = {
@@ -114,86 +288,340 @@ WEATHER_IMAGE_MAP = {
     "tornado": "/mist.png",
 }
 
+# The display strings of a weather report; all empty before the first lookup.
+WEATHER_DISPLAY_FIELDS = [
+    "weather_condition", "image_src", "location", "temperature", "humidity", "speed",
+    "max_temp", "min_temp", "sunrise_time", "sunset_time",
+]
+
+def format_weather(report: Optional[WeatherReport], city: str) -> dict[str, str]:
+    if report is None:
+        return dict.fromkeys(WEATHER_DISPLAY_FIELDS, "")
+    
+    with stage_seconds.time("format"):
+        return _format_report(report, city)
+
+def _format_report(report: WeatherReport, city: str) -> dict[str, str]:
+    # Assume the timestamp is in local time
+    local_tz = datetime.timezone(datetime.timedelta(seconds=report.timezone_offset))
+    return {
+        "weather_condition": report.weather_condition,
+        "image_src": WEATHER_IMAGE_MAP.get(report.weather_condition, "/sunny.png"),
+        "location": f"{city}, {report.country}",
+        "temperature": f"{int(report.temperature)}",
+        "humidity": f"{int(report.humidity)}",
+        "speed": f"{int(report.wind_speed)}",
+        "max_temp": f"{int(report.temperature_max)}°C",
+        "min_temp": f"{int(report.temperature_min)}°C",
+        "sunrise_time": datetime.datetime.fromtimestamp(report.sunrise, tz=local_tz).strftime('%H:%M'),
+        "sunset_time": datetime.datetime.fromtimestamp(report.sunset, tz=local_tz).strftime('%H:%M'),
+    }
+
+
+# Clothing types: the types of clothing that can be added to the wardrobe.
+clothing_types: list[str] = ["Top", "Bottom", "Dress", "Shoes", "Accessory"]
+
+# Temperature types:
+temperature_types: list[str] = ["Hot", "Warm", "Cool", "Cold", "Freeze"]
+
+# Temperature band column: stores a temperature type as a small integer (its position in temperature_types).
+class TemperatureBand(TypeDecorator):
+    impl = SmallInteger
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value in temperature_types:
+            return temperature_types.index(value)
+        return None
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return temperature_types[value]
+
+# Wardrobes: every browser gets its own wardrobe, identified by a random id kept in the wardrobe_id cookie.
+WARDROBE_COOKIE = "wardrobe_id"
+# Items from before wardrobes were per user belong to this wardrobe (see alembic 0002).
+# With LEGACY_WARDROBE_CLAIM=true, the first browser that gets a new wardrobe takes them over.
+LEGACY_WARDROBE_ID = "default"
+LEGACY_WARDROBE_CLAIM: bool = os.getenv("LEGACY_WARDROBE_CLAIM", "false").lower() in ("1", "true", "yes")
 
-# Wardorbe Database: create a database to store the wardrobe items.
-DATABASE_URL = "sqlite:///reflex.db"
-engine = create_engine(DATABASE_URL)
+def new_wardrobe_id() -> str:
+    return secrets.token_urlsafe(16)
+
+# The wardrobe of an API request, from its wardrobe_id cookie ("" if there is none: an empty wardrobe).
+def request_wardrobe_id(request: Request) -> str:
+    return request.cookies.get(WARDROBE_COOKIE, "")
 
 # Items table: define the table schema.
+# Every query is scoped to one wardrobe, so the indexes lead with wardrobe_id: the recommendation query
+# filters on (wardrobe_id, suitable_temperature, is_waterproof), the wardrobe table pages on (wardrobe_id, id).
 class Items(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_items_wardrobe_temperature_waterproof", "wardrobe_id", "suitable_temperature", "is_waterproof"),
+        Index("ix_items_wardrobe_id", "wardrobe_id", "id"),
+        Index("ix_items_wardrobe_name", "wardrobe_id", "name"),
+        Index("ix_items_wardrobe_type", "wardrobe_id", "type"),
+    )
+    
     id: int = Field(primary_key=True)
+    wardrobe_id: str = ""
     type: str
     name: str
-    suitable_temperature: str
-    is_waterproof: str
+    suitable_temperature: Optional[str] = Field(default=None, sa_column=Column(TemperatureBand))
+    is_waterproof: bool = False
 
-# Create the table in the database.
-SQLModel.metadata.create_all(engine)
+# Wardrobe search: the FTS5 search index is created with the items table (see wardrobe_search.py).
+for statement in SEARCH_INDEX_DDL:
+    event.listen(Items.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
 
-# Clothing types: the types of clothing that can be added to the wardrobe.
-clothing_types: list[str] = ["Top", "Bottom", "Dress", "Shoes", "Accessory"]
+# Convert an Items row into a plain dictionary for the state.
+def item_to_dict(item: Items) -> dict:
+    return {"id": item.id, 
+            "name": item.name, 
+            "type": item.type, 
+            "suitable_temperature": item.suitable_temperature,
+            "is_waterproof": "True" if item.is_waterproof else "False",
+            }
 
-# Temperature types:
-temperature_types: list[str] = ["Hot", "Warm", "Cool", "Cold", "Freeze"]
+# The columns of the wardrobe table.
+wardrobe_columns: list[str] = ["id", "name", "type", "suitable_temperature", "is_waterproof"]
 
-def get_temperature_type(temperature: int):
-    if temperature > 30:
-        return "Hot"
-    elif 20 < temperature <= 30:
-        return "Warm"
-    elif 10 < temperature <= 20:
-        return "Cool"
-    elif 0 < temperature <= 10:
-        return "Cold"
-    else:
-        return "Freeze"
-
-# Default clothing advice: Provides clothing advice based on the given temperature and weather condition.
-def get_default_clothing_advice(temperature, weather_condition):
-    if temperature > 30:
-        return "Whoa, it's sizzling out there! Time for shorts and a tank top!"
-    elif 20 < temperature <= 30:
-        if "rain" in weather_condition:
-            return "Warm but wet, eh? Go for a tee and don't forget that umbrella!"
-        return "It's T-shirt weather! Maybe grab some sunglasses too."
-    elif 10 < temperature <= 20:
-        if "rain" in weather_condition:
-            return "A bit chilly with a splash! A jacket and maybe an umbrella will serve you well."
-        return "Feeling the breeze? A sweater or a light jacket should do the trick."
+# The recommendation query: all items of a wardrobe for a temperature type and waterproof flag.
+def recommendations_statement(wardrobe_id: str, suitable_temperature: str, is_waterproof: bool):
+    return select(Items) \
+        .where(Items.wardrobe_id == wardrobe_id) \
+        .where(Items.suitable_temperature == suitable_temperature) \
+        .where(Items.is_waterproof == is_waterproof)
+
+# Wardrobe table: the columns it can be sorted by (each has a per-wardrobe index).
+WARDROBE_SORT_COLUMNS: dict = {
+    "id": Items.id,
+    "name": Items.name,
+    "type": Items.type,
+    "suitable_temperature": Items.suitable_temperature,
+}
+
+# The items of a wardrobe that match the search box query and the filters ("" or "All" means any).
+def wardrobe_conditions(wardrobe_id: str, query: str = "", item_type: str = "",
+                        suitable_temperature: str = "", is_waterproof: str = "") -> list:
+    conditions = [Items.wardrobe_id == wardrobe_id]
+    terms = search_terms(query)
+    if get_engine().dialect.name == "sqlite":
+        # one-letter terms match a large part of every wardrobe: they are checked on the rows of the wardrobe
+        # instead of reading their long posting lists from the search index
+        index_terms = [term for term in terms if len(term) >= MIN_INDEX_TERM_LENGTH]
+        if index_terms:
+            matches = text(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match") \
+                .bindparams(match=fts_query(wardrobe_id, index_terms)) \
+                .columns(column("rowid"))
+            conditions.append(Items.id.in_(matches))
+        terms = [term for term in terms if len(term) < MIN_INDEX_TERM_LENGTH]
+    # a word of the name or the type starts with the term
+    for term in terms:
+        conditions.append(or_(
+            Items.name.ilike(f"{term}%"), Items.name.ilike(f"% {term}%"), Items.type.ilike(f"{term}%"),
+        ))
+    if item_type in clothing_types:
+        conditions.append(Items.type == item_type)
+    if suitable_temperature in temperature_types:
+        conditions.append(Items.suitable_temperature == suitable_temperature)
+    if is_waterproof in ("True", "False"):
+        conditions.append(Items.is_waterproof == (is_waterproof == "True"))
+    return conditions
+
+# Recommendation index: each wardrobe grouped by temperature type and waterproof flag, kept in memory.
+# Each worker process loads a wardrobe from the Items table on its first lookup, and loads it again
+# RECOMMENDATION_INDEX_TTL seconds later to pick up changes made through other workers.
+recommendation_index = RecommendationIndex(
+    max_wardrobes=int(os.getenv("RECOMMENDATION_INDEX_WARDROBES", "10000")),
+    ttl=float(os.getenv("RECOMMENDATION_INDEX_TTL", "30")),
+)
+
+# Load a wardrobe into the recommendation index; returns the loaded wardrobe.
+def load_recommendation_index(wardrobe_id: str):
+    stamp = recommendation_index.stamp()
+    with get_session() as session:
+        statement = select(Items).where(Items.wardrobe_id == wardrobe_id)
+        return recommendation_index.load(wardrobe_id, [item_to_dict(item) for item in session.exec(statement).all()], stamp)
+
+# Async handlers load the wardrobe in a worker thread before asking for advice, so that they do not
+# block the event loop on the database.
+async def preload_recommendation_index(wardrobe_id: str):
+    if not recommendation_index.loaded(wardrobe_id):
+        await run_in_threadpool(load_recommendation_index, wardrobe_id)
+
+
+# Recommendations: the items of a wardrobe for a temperature type and waterproof flag.
+def get_recommendations(wardrobe_id: str, suitable_temperature: str, is_waterproof: bool) -> list[dict]:
+    with stage_seconds.time("recommendations"):
+        recommendations = recommendation_index.get(wardrobe_id, suitable_temperature, is_waterproof)
+        if recommendations is None:
+            recommendations = load_recommendation_index(wardrobe_id).get(suitable_temperature, is_waterproof)
+        return recommendations
+
+# Wet weather: rain or snow calls for waterproof clothing.
+def is_wet_condition(weather_condition: str) -> bool:
+    condition = weather_condition.lower()
+    return "rain" in condition or "snow" in condition
+
+# Outfits: the best complete outfits from the wardrobe items of a temperature type.
+# On wet days only waterproof items are candidates; on dry days every item is, and the ones that are not
+# waterproof score higher (see weather_assistant/outfits.py).
+OUTFIT_COUNT = 3
+
+def get_outfits(wardrobe_id: str, suitable_temperature: str, is_wet: bool, k: int = OUTFIT_COUNT) -> list[Outfit]:
+    items = get_recommendations(wardrobe_id, suitable_temperature, True)
+    if not is_wet:
+        items = items + get_recommendations(wardrobe_id, suitable_temperature, False)
+    return top_outfits(items, is_wet, k)
+
+# Wardrobe advice: the best complete outfit first, then the alternatives; without a complete outfit,
+# the matching items are listed. None if no item of the wardrobe suits the weather.
+def get_wardrobe_advice(wardrobe_id: str, temperature_type: str, is_wet: bool) -> Optional[str]:
+    outfits = get_outfits(wardrobe_id, temperature_type, is_wet)
+    if outfits:
+        advice = "You can wear " + ', '.join(outfits[0].names) + " today."
+        if len(outfits) > 1:
+            advice += " Or try: " + "; ".join(', '.join(outfit.names) for outfit in outfits[1:]) + "."
+        return advice
+    
+    recommendations = get_recommendations(wardrobe_id, temperature_type, is_wet)
+    if len(recommendations) > 0:
+        return "You can wear " + ', '.join([recommendation["name"] for recommendation in recommendations]) + " today."
+    return None
+
+# Advice memo: the wardrobe advice only depends on the temperature type, the wet flag and the wardrobe,
+# so it is computed once per wardrobe version. The wardrobe handlers bump the version on every change;
+# changes made through other workers show up once the entry expires (ADVICE_MEMO_TTL).
+advice_memo = AdviceMemo(
+    max_size=int(os.getenv("ADVICE_MEMO_SIZE", "10000")),
+    ttl=float(os.getenv("ADVICE_MEMO_TTL", "30")),
+)
+
+# Clothing advice: Provides clothing advice based on the weather and the wardrobe items.
+def get_clothing_advice(wardrobe_id: str, temperature: int, weather_condition: str) -> str:
+    condition = weather_condition.lower()
+    temperature_type = get_temperature_type(temperature)
+    is_wet = is_wet_condition(condition)
+    
+    version = advice_memo.version(wardrobe_id)
+    advice = advice_memo.get(wardrobe_id, temperature_type, is_wet, version)
+    if advice is MISSING:
+        advice = get_wardrobe_advice(wardrobe_id, temperature_type, is_wet)
+        advice_memo.put(wardrobe_id, temperature_type, is_wet, version, advice)
+    
+    if advice is not None:
+        return advice
+    return "We didn't find any suitable clothing in your wardrobe. Here is a general advice: \n" \
+        + get_default_clothing_advice(temperature, condition)
+
+
+# Batch weather and advice: look up one city for the batch API.
+async def get_city_advice(wardrobe_id: str, index: int, city: str) -> dict:
+    report = await fetch_weather(city)
+    if report is None:
+        return {"index": index, "city": city, "found": False}
+    
+    temperature = int(report.temperature)
+    condition = report.weather_condition
+    temperature_type = get_temperature_type(temperature)
+    await preload_recommendation_index(wardrobe_id)
+    recommendations = get_recommendations(wardrobe_id, temperature_type, is_wet_condition(condition))
+    return {
+        "index": index,
+        "city": city,
+        "found": True,
+        "country": report.country,
+        "temperature": temperature,
+        "weather_condition": condition,
+        "temperature_type": temperature_type,
+        "clothing_advice": get_clothing_advice(wardrobe_id, temperature, condition),
+        "recommendations": [recommendation["name"] for recommendation in recommendations],
+        "outfits": [outfit.names for outfit in get_outfits(wardrobe_id, temperature_type, is_wet_condition(condition))],
+    }
+
+
+# Day-ahead advice: clothing advice for the forecast readings of a time window.
+# The window is summarized by its average temperature and its wettest weather condition.
+def get_forecast_advice(wardrobe_id: str, readings) -> str:
+    temperature = int(sum(reading.temperature for reading in readings) / len(readings))
+    conditions = [reading.weather_condition for reading in readings]
+    if any("snow" in condition for condition in conditions):
+        condition = "snow"
+    elif any("rain" in condition for condition in conditions):
+        condition = "rain"
     else:
-        if "snow" in weather_condition:
-            return "Brrr! Snowball fight anyone? Bundle up with a thick coat, gloves, and a hat!"
-        return "Freezing cold! Time to rock that winter coat and maybe a scarf and gloves!"
+        condition = max(set(conditions), key=conditions.count)
+    return get_clothing_advice(wardrobe_id, temperature, condition)
+
+
+# Move the items of the legacy wardrobe to the given new wardrobe. One UPDATE moves them all, so only one
+# wardrobe gets them, also with several workers. Returns the number of moved items.
+_legacy_wardrobe_empty = False
+
+def claim_legacy_wardrobe(wardrobe_id: str) -> int:
+    global _legacy_wardrobe_empty
+    if _legacy_wardrobe_empty:
+        return 0
+    with get_engine().begin() as connection:
+        moved = connection.execute(
+            update(Items).where(Items.wardrobe_id == LEGACY_WARDROBE_ID).values(wardrobe_id=wardrobe_id)
+        ).rowcount
+    # nothing is added to the legacy wardrobe any more: once it is empty, it stays empty
+    _legacy_wardrobe_empty = True
+    if moved:
+        recommendation_index.invalidate(wardrobe_id)
+        advice_memo.bump(wardrobe_id)
+    return moved
 
 
 # The State class defines all the variables that can change, as well as the event handlers that change them.
 class State(rx.State):
-    # Weather attributes
-    weather_condition: str = ""
-    image_src: str = ""
-    location: str = ""
-    city: str = ""
-    country: str = ""
-    temperature: str = ""
-    speed: str = ""
-    humidity: str = ""
-    max_temp: str = ""
-    min_temp: str = ""
-    sunrise_time: str = ""
-    sunset_time: str = ""
+    # Weather attributes: the report of the last lookup (numeric fields, backend only) and the city name.
+    # The display strings are formatted from it in one cached var: only after a lookup changes them, not on every event.
+    _weather: Optional[WeatherReport] = None
+    _city: str = ""
+    
+    @rx.cached_var
+    def weather(self) -> dict[str, str]:
+        return format_weather(self._weather, self._city)
+    
+    # The wardrobe of this browser (see WARDROBE_COOKIE), created on the first visit.
+    wardrobe_id: str = rx.Cookie("", name=WARDROBE_COOKIE, max_age=365 * 24 * 3600)
+    
+    def current_wardrobe_id(self) -> str:
+        if not self.wardrobe_id:
+            self.wardrobe_id = new_wardrobe_id()
+            if LEGACY_WARDROBE_CLAIM:
+                claim_legacy_wardrobe(self.wardrobe_id)
+        return self.wardrobe_id
     
     # Input attributes
     cityname_input: str = ""
     weather_error_message: str = ""
     
+    # Autocomplete: the largest cities of the gazetteer starting with the input ("Paris, FR").
+    city_suggestions: list[str] = []
+    
     # Get the city name entered by the user.
     def get_input_value(self, cityname_input):
         self.cityname_input = cityname_input
+        gazetteer = get_gazetteer()
+        if gazetteer is not None:
+            self.city_suggestions = [city.label for city in gazetteer.complete(cityname_input)]
     
     # When the user presses the Enter key, update the content style and get the weather data.
-    def handle_key_press(self, key):
+    async def handle_key_press(self, key):
         if key == "Enter" and self.cityname_input != "":
-            self.get_weather_data()
+            with stage_seconds.time("lookup"):
+                await self.get_weather_data()
+    
+    # When the user picks a suggestion, get the weather data for that city.
+    async def choose_city(self, label: str):
+        self.cityname_input = label
+        with stage_seconds.time("lookup"):
+            await self.get_weather_data()
     
     # Display the content area.
     content_height: str = "0px"
@@ -205,83 +633,110 @@ class State(rx.State):
             self.content_bg = "#fafafa"
     
     # Get the weather data for the given city.
-    def get_weather_data(self):
+    async def get_weather_data(self):
         city_name = self.cityname_input
+        self.city_suggestions = []
         
-        # get the weather data from the API
-        response = requests.get(get_weather_request(city_name))
+        # get the weather report from the cache or the provider, without blocking other events
+        report = await fetch_weather(city_name)
         
         # If the city name is found, display the weather data.
-        if response.status_code == 200:
-            data = response.json()
-            
+        if report is not None:
             # display the content area
             self.update_content_style()
             
-            # set the image source based on the weather condition
-            weather_main = data["weather"][0]["main"].lower()
-            self.image_src = WEATHER_IMAGE_MAP.get(weather_main, "/sunny.png")
-            
-            # set the weather data
-            self.city = self.cityname_input
-            self.country = data["sys"]["country"]
-            self.temperature = f"{int(data['main']['temp'])}"
-            self.humidity = f"{int(data['main']['humidity'])}"
-            self.speed = f"{int(data['wind']['speed'])}"
-            self.location = f"{self.city.capitalize()}, {self.country}"
-            self.weather_condition = data["weather"][0]["main"].lower()
+            # keep the weather report, it is formatted for display by the weather var
+            self._weather = report
+            city = find_city(city_name)
+            self._city = city.name if city is not None else city_name.capitalize()
             self.weather_error_message = ""
             
-            self.max_temp = f"{int(data['main']['temp_max'])}°C"
-            self.min_temp = f"{int(data['main']['temp_min'])}°C"
-            
-            sunrise_timestamp = int(data['sys']['sunrise'])
-            sunset_timestamp = int(data['sys']['sunset'])
-            
-            # Assume the timestamp is in local time
-            local_tz = datetime.timezone(datetime.timedelta(seconds=data['timezone']))
-
-            # Convert the timestamp to a datetime object and format it
-            self.sunrise_time = datetime.datetime.fromtimestamp(sunrise_timestamp, tz=local_tz).strftime('%H:%M')
-            self.sunset_time = datetime.datetime.fromtimestamp(sunset_timestamp, tz=local_tz).strftime('%H:%M')
-            
             # Clear the input field
             self.cityname_input = ""
             
             # Set the clothing advice
+            await preload_recommendation_index(self.current_wardrobe_id())
             self.set_clothing_advice()
         
         # If the city name is not found, display an error message.
-        elif response.status_code != 200:
+        else:
             self.weather_error_message = "City not found. Please enter a valid city name."
             self.cityname_input = ""
 
     # Clothing advice: Provides clothing advice based on the weather condition and wardrobe items.
     clothing_advice: str = ""
     def set_clothing_advice(self):
-        temp = int(self.temperature)
-        condition = self.weather_condition.lower()
-        temperature_situation = get_temperature_type(temp)
-        is_wet_condition = "True" if "rain" in condition or "snow" in condition else "False"
-        
-        recommendations = self.fetch_recommendations(temperature_situation, is_wet_condition)
-        
-        if len(recommendations) > 0:
-            self.clothing_advice = "You can wear "
-            self.clothing_advice += ', '.join([recommendation["name"] for recommendation in recommendations])
-            self.clothing_advice += " today."
-        else:
-            self.clothing_advice = "We didn't find any suitable clothing in your wardrobe. Here is a general advice: \n"
-            self.clothing_advice += get_default_clothing_advice(temp, condition)
+        self.clothing_advice = get_clothing_advice(
+            self.current_wardrobe_id(), int(self._weather.temperature), self._weather.weather_condition
+        )
     
     
     # Wardrobe attributes
     all_items: list[Items] = [] 
     data: list[dict] = [] 
-    def __init__(self):
-        super().__init__()
-        self.all_items = []
-        self.data = []
+    
+    # Wardrobe pagination: only the visible page of items is loaded from the database.
+    page_size: int = 20
+    page_number: int = 1
+    item_count: int = 0
+    latest_item_id: int = 0
+    
+    # Wardrobe search, filters and sort order: applied by the database, not in the browser.
+    search_query: str = ""
+    filter_type: str = ""
+    filter_suitable_temperature: str = ""
+    filter_is_waterproof: str = ""
+    sort_column: str = "id"
+    sort_descending: bool = False
+    
+    # Any change to the search, the filters or the sort order starts again from the first page.
+    def set_search_query(self, value):
+        self.search_query = value
+        self.page_number = 1
+        self.fetch_data()
+    
+    def set_filter_type(self, value):
+        self.filter_type = value
+        self.page_number = 1
+        self.fetch_data()
+    
+    def set_filter_suitable_temperature(self, value):
+        self.filter_suitable_temperature = value
+        self.page_number = 1
+        self.fetch_data()
+    
+    def set_filter_is_waterproof(self, value):
+        self.filter_is_waterproof = value
+        self.page_number = 1
+        self.fetch_data()
+    
+    def set_sort_column(self, value):
+        self.sort_column = value if value in WARDROBE_SORT_COLUMNS else "id"
+        self.page_number = 1
+        self.fetch_data()
+    
+    def toggle_sort_order(self):
+        self.sort_descending = not self.sort_descending
+        self.page_number = 1
+        self.fetch_data()
+    
+    # The conditions of the items shown in the wardrobe table.
+    def wardrobe_conditions(self) -> list:
+        return wardrobe_conditions(
+            self.current_wardrobe_id(),
+            self.search_query,
+            self.filter_type,
+            self.filter_suitable_temperature,
+            self.filter_is_waterproof,
+        )
+    
+    # The sort order of the wardrobe table; the id breaks ties.
+    def wardrobe_order(self, reverse: bool = False) -> list:
+        descending = self.sort_descending != reverse
+        columns = [WARDROBE_SORT_COLUMNS.get(self.sort_column, Items.id)]
+        if self.sort_column != "id":
+            columns.append(Items.id)
+        return [column.desc() if descending else column.asc() for column in columns]
     
     # Set the selected type and reselected type
     selected_type: str = ""
@@ -309,47 +764,111 @@ class State(rx.State):
     def set_reselected_suitable_temperature(self, value):
         self.reselected_suitable_temperature = value
         
-    # Fetch the recommendations from the database.
+    # Fetch the recommendations of this wardrobe from the in-memory recommendation index.
     def fetch_recommendations(self, suitable_temperature, is_waterproof):
-        with rx.session() as session:
-            statement = select(Items) \
-                .where(Items.suitable_temperature == suitable_temperature) \
-                .where(Items.is_waterproof == is_waterproof)
-            recommendations = session.exec(statement).all()
-            return [{"id": item.id, 
-                      "name": item.name, 
-                      "type": item.type, 
-                      "suitable_temperature": item.suitable_temperature,
-                      "is_waterproof": item.is_waterproof,
-                      }
-                     for item in recommendations]
-    
-    # Fetch the data from the database.
+        return get_recommendations(self.current_wardrobe_id(), suitable_temperature, is_waterproof)
+    
+    # Fetch the current page of the wardrobe from the database (LIMIT/OFFSET).
+    # This runs when the wardrobe page is loaded and after each change to the wardrobe, search, filters or sort order.
     def fetch_data(self):
-        with rx.session() as session:
-            statement = select(Items)
+        wardrobe_id = self.current_wardrobe_id()
+        conditions = self.wardrobe_conditions()
+        with get_session() as session:
+            self.item_count = session.exec(select(func.count(Items.id)).where(*conditions)).one()
+            self.latest_item_id = session.exec(
+                select(func.max(Items.id)).where(Items.wardrobe_id == wardrobe_id)
+            ).one() or 0
+            
+            # stay on the current page, unless it no longer exists
+            last_page = max(1, math.ceil(self.item_count / self.page_size))
+            self.page_number = min(self.page_number, last_page)
+            
+            statement = select(Items) \
+                .where(*conditions) \
+                .order_by(*self.wardrobe_order()) \
+                .offset((self.page_number - 1) * self.page_size) \
+                .limit(self.page_size)
+            self.data = [item_to_dict(item) for item in session.exec(statement).all()]
+    
+    # Go to the next page: in id order, keyset paging on Items.id, starting after the last visible item;
+    # in any other order, the next LIMIT/OFFSET page.
+    def next_page(self):
+        if len(self.data) == 0:
+            return
+        if self.sort_column != "id":
+            if self.page_number < self.page_count:
+                self.page_number += 1
+                self.fetch_data()
+            return
+        last_id = self.data[-1]["id"]
+        with get_session() as session:
+            statement = select(Items) \
+                .where(*self.wardrobe_conditions()) \
+                .where(Items.id < last_id if self.sort_descending else Items.id > last_id) \
+                .order_by(*self.wardrobe_order()) \
+                .limit(self.page_size)
+            items_list = session.exec(statement).all()
+            if items_list:
+                self.data = [item_to_dict(item) for item in items_list]
+                self.page_number += 1
+    
+    # Go to the previous page: in id order, keyset paging on Items.id, ending before the first visible item;
+    # in any other order, the previous LIMIT/OFFSET page.
+    def previous_page(self):
+        if len(self.data) == 0 or self.page_number <= 1:
+            return
+        if self.sort_column != "id":
+            self.page_number -= 1
+            self.fetch_data()
+            return
+        first_id = self.data[0]["id"]
+        with get_session() as session:
+            statement = select(Items) \
+                .where(*self.wardrobe_conditions()) \
+                .where(Items.id > first_id if self.sort_descending else Items.id < first_id) \
+                .order_by(*self.wardrobe_order(reverse=True)) \
+                .limit(self.page_size)
             items_list = session.exec(statement).all()
-            self.data = [{"id": item.id, 
-                          "name": item.name, 
-                          "type": item.type, 
-                          "suitable_temperature": item.suitable_temperature,
-                          "is_waterproof": item.is_waterproof,
-                          }
-                         for item in items_list]
+            if items_list:
+                self.data = [item_to_dict(item) for item in reversed(items_list)]
+                self.page_number -= 1
+    
+    # The total number of wardrobe pages (cached: recomputed only when the item count or the page size change).
+    @rx.cached_var
+    def page_count(self) -> int:
+        return max(1, math.ceil(self.item_count / self.page_size))
+    
+    # The wardrobe table is derived from state.data, so it re-renders whenever the data changes (and only then:
+    # a cached var is left out of the updates of events that do not change the data).
+    # Each row is a plain list of values in the order of wardrobe_columns.
+    @rx.cached_var
+    def wardrobe_rows(self) -> list[list]:
+        return [[item[column] for column in wardrobe_columns] for item in self.data]
+    
+    # The latest item text shown next to the "Delete Latest Item" button (cached: it changes with latest_item_id only).
+    @rx.cached_var
+    def latest_item_id_text(self) -> str:
+        if self.latest_item_id > 0:
+            return "The latest Item ID is " + str(self.latest_item_id)
+        return "There are no items"
     
     # Add a new item to the database.
     def handle_add_submit(self, form_data:dict):
-        with rx.session() as session:
+        wardrobe_id = self.current_wardrobe_id()
+        with get_session() as session:
             data = Items(
+                wardrobe_id=wardrobe_id,
                 type=self.selected_type,
                 name=form_data.get("name"),
                 suitable_temperature=self.selected_suitable_temperature,
-                is_waterproof=self.selected_is_waterproof,
+                is_waterproof=self.selected_is_waterproof == "True",
             )
             session.add(data)
             session.commit()
-        app = rx.App()
-        app.compile()
+            session.refresh(data)
+            recommendation_index.upsert(wardrobe_id, item_to_dict(data))
+            advice_memo.bump(wardrobe_id)
+        self.fetch_data()
     
     # Edit an existing item in the database.
     def handle_edit_submit(self, form_data: dict):
@@ -357,10 +876,12 @@ class State(rx.State):
         new_type = self.reselected_type
         new_name = form_data.get("edit_name")
         new_suitable_temperature = self.reselected_suitable_temperature
-        new_is_waterproof = self.reselected_is_waterproof
-        with rx.session() as session:
-            # search for the item to edit
-            item_to_edit = session.query(Items).filter(Items.id == int(item_id)).first()
+        new_is_waterproof = self.reselected_is_waterproof == "True"
+        wardrobe_id = self.current_wardrobe_id()
+        with get_session() as session:
+            # search for the item to edit, in this wardrobe only
+            item_to_edit = session.query(Items) \
+                .filter(Items.wardrobe_id == wardrobe_id, Items.id == int(item_id)).first()
             if item_to_edit:
                 # update the item
                 item_to_edit.type = new_type
@@ -368,41 +889,43 @@ class State(rx.State):
                 item_to_edit.suitable_temperature = new_suitable_temperature
                 item_to_edit.is_waterproof = new_is_waterproof
                 session.commit()
-        app = rx.App()
-        app.compile()
+                recommendation_index.upsert(wardrobe_id, item_to_dict(item_to_edit))
+                advice_memo.bump(wardrobe_id)
+        self.fetch_data()
 
     # Delete the latest item from the database.
     def delete_latest_item(self):
-        with rx.session() as session:
-            statement = select(Items).order_by(Items.id.desc())
+        wardrobe_id = self.current_wardrobe_id()
+        with get_session() as session:
+            statement = select(Items).where(Items.wardrobe_id == wardrobe_id).order_by(Items.id.desc())
             latest_item = session.exec(statement).first()
             if latest_item:
+                item_id = latest_item.id
                 session.delete(latest_item)
                 session.commit()
-        app = rx.App()
-        app.compile()
+                recommendation_index.remove(wardrobe_id, item_id)
+                advice_memo.bump(wardrobe_id)
+        self.fetch_data()
         
     # Delete the selected item from the database.
     delete_item_id: str = ""
     def delete_selected_item(self):
-        with rx.session() as session:
+        wardrobe_id = self.current_wardrobe_id()
+        with get_session() as session:
             item_id = int(self.delete_item_id)
-            item_to_delete = session.query(Items).filter(Items.id == item_id).first()
+            item_to_delete = session.query(Items).filter(Items.wardrobe_id == wardrobe_id, Items.id == item_id).first()
             if item_to_delete:
                 session.delete(item_to_delete)
                 session.commit()
+                recommendation_index.remove(wardrobe_id, item_id)
+                advice_memo.bump(wardrobe_id)
         self.delete_item_id = ""
-        app = rx.App()
-        app.compile()
+        self.fetch_data()
     
     def handle_delete_item_id_change(self, value):
         self.delete_item_id = value
         
 
-# Instantiate the State class
-state = State()
-
-
 # Header style: including the title and the breadcrumb navigation
 # Pass the title as a parameter to the Header class.
 class Header(rx.Hstack):
@@ -445,6 +968,17 @@ def index() -> rx.Component :
                 placeholder="Enter a city name to get the weather",
                 style=css.get("input"),
                 ),
+            rx.cond(
+                State.city_suggestions,
+                rx.vstack(
+                    rx.foreach(
+                        State.city_suggestions,
+                        lambda label: rx.button(label, on_click=State.choose_city(label), variant="ghost", width="100%"),
+                    ),
+                    style=css.get("suggestions"),
+                ),
+                None
+            ),
             rx.cond(
                 State.weather_error_message, 
                 rx.text(State.weather_error_message, style=css.get("errormessage")),
@@ -462,12 +996,12 @@ def index() -> rx.Component :
             rx.container(
                 rx.vstack(
                     rx.image(
-                        src=State.image_src,
+                        src=State.weather["image_src"],
                         html_height="100px",
                         html_width="100px",
                         ),
-                        rx.heading(State.weather_condition.upper(), size="lg"),
-                        rx.heading(State.location, size="md", opacity="0.8"),
+                        rx.heading(State.weather["weather_condition"].upper(), size="lg"),
+                        rx.heading(State.weather["location"], size="md", opacity="0.8"),
                         style=css.get("weather_image"),
                     ),
                 width=["35%"],
@@ -482,7 +1016,7 @@ def index() -> rx.Component :
                     rx.hstack(
                         rx.vstack(
                             rx.hstack(
-                                rx.heading(State.temperature, style=css.get("weather_data_big_numbers")),
+                                rx.heading(State.weather["temperature"], style=css.get("weather_data_big_numbers")),
                                 rx.heading("°C", style=css.get("weather_data_measurement"),),
                                     vertical_align="bottom",
                                       ),
@@ -491,7 +1025,7 @@ def index() -> rx.Component :
                             ), 
                         rx.vstack(
                             rx.hstack(
-                                rx.heading(State.humidity, style=css.get("weather_data_big_numbers")),
+                                rx.heading(State.weather["humidity"], style=css.get("weather_data_big_numbers")),
                                 rx.heading("%", style=css.get("weather_data_measurement"),),
                                       ),
                             rx.text("HUMIDITY", style=css.get("weather_data_attributes"),),
@@ -499,7 +1033,7 @@ def index() -> rx.Component :
                             ),
                         rx.vstack(
                             rx.hstack(
-                                rx.heading(State.speed, style=css.get("weather_data_big_numbers")),
+                                rx.heading(State.weather["speed"], style=css.get("weather_data_big_numbers")),
                                 rx.heading("km/h", style=css.get("weather_data_measurement"),),
                                       ),
                             rx.text("WIND SPEED", style=css.get("weather_data_attributes"),),
@@ -513,7 +1047,7 @@ def index() -> rx.Component :
                     rx.hstack(
                         rx.vstack(
                             rx.heading(
-                                State.min_temp + " ~ " + State.max_temp, 
+                                State.weather["min_temp"] + " ~ " + State.weather["max_temp"], 
                                 style=css.get("weather_data_small_numbers"),
                                 ),
                             rx.text("LOW ~ HIGH", style=css.get("weather_data_attributes"),),
@@ -521,7 +1055,7 @@ def index() -> rx.Component :
                             ),   
                         rx.vstack(
                             rx.heading(
-                                State.sunrise_time + " ~ " + State.sunset_time, 
+                                State.weather["sunrise_time"] + " ~ " + State.weather["sunset_time"], 
                                 style=css.get("weather_data_small_numbers"),
                                 ),
                             rx.text("SUNRISE ~ SUNSET", style=css.get("weather_data_attributes"),),
@@ -548,23 +1082,12 @@ def index() -> rx.Component :
 
 
 # Wardrobe page: users can manage items in their wardrobe.
-@rx.page(title='My Wardrobe', route="/wardrobe")
+# The wardrobe is loaded into the state when the page is opened and refreshed after each change.
+@rx.page(title='My Wardrobe', route="/wardrobe", on_load=State.fetch_data)
 def wardrobe_page() -> rx.Component:
     
     # Create the header
     wardrobe_header: rx.Hstack = Header("My Wardrobe")
-
-    # Use the state instance to call fetch_data
-    state.fetch_data()
-    
-    # Convert state.data into a pandas dataframe
-    df = pd.DataFrame(state.data)
-    
-    # Check if the dataframe is empty, and if it is, display a message.
-    if "id" in df.columns and not df.empty:
-        latest_item_id_text = "The latest Item ID is " + str(df["id"].iloc[-1])
-    else:
-        latest_item_id_text = "There are no items"
     
     return rx.vstack(
         wardrobe_header,
@@ -655,7 +1178,7 @@ def wardrobe_page() -> rx.Component:
                 rx.form(
                     rx.stack(
                         rx.spacer(height="1rem"),
-                        rx.text(latest_item_id_text, color="gray",),
+                        rx.text(State.latest_item_id_text, color="gray",),
                         rx.spacer(height="1rem"),
                         rx.button(
                             "Delete Latest Item", 
@@ -672,22 +1195,188 @@ def wardrobe_page() -> rx.Component:
             padding="2rem",
         ),
         
-        # Display the wardrobe items in a data table
+        # Search, filter and sort the wardrobe; the database does the work and returns one page.
+        # The search box sends its query 300 ms after the user stops typing.
+        rx.hstack(
+            rx.debounce_input(
+                rx.input(
+                    value=State.search_query,
+                    on_change=State.set_search_query,
+                    placeholder="Search by name or type",
+                ),
+                debounce_timeout=300,
+            ),
+            rx.select(
+                ["All"] + clothing_types,
+                placeholder="All types",
+                on_change=State.set_filter_type,
+                value=State.filter_type,
+            ),
+            rx.select(
+                ["All"] + temperature_types,
+                placeholder="All temperatures",
+                on_change=State.set_filter_suitable_temperature,
+                value=State.filter_suitable_temperature,
+            ),
+            rx.select(
+                ["All", "True", "False"],
+                placeholder="Waterproof or not",
+                on_change=State.set_filter_is_waterproof,
+                value=State.filter_is_waterproof,
+            ),
+            rx.select(
+                list(WARDROBE_SORT_COLUMNS),
+                placeholder="Sort by",
+                on_change=State.set_sort_column,
+                value=State.sort_column,
+            ),
+            rx.button(
+                rx.cond(State.sort_descending, "Descending", "Ascending"),
+                on_click=State.toggle_sort_order,
+            ),
+            width="85%",
+            padding_x="2rem",
+        ),
+        
+        # Display the current page of wardrobe items in a data table
         rx.hstack(
             rx.data_table(
-                data=df,
-                pagination=True,
-                search=True,
-                sort=True
+                data=State.wardrobe_rows,
+                columns=wardrobe_columns,
             ),
             width="85%",
             padding="2rem",
         ),
+        
+        # Page through the wardrobe
+        rx.hstack(
+            rx.button("Previous", on_click=State.previous_page, is_disabled=State.page_number <= 1),
+            rx.text("Page " + State.page_number.to_string() + " of " + State.page_count.to_string(), color="gray"),
+            rx.button("Next", on_click=State.next_page, is_disabled=State.page_number >= State.page_count),
+        ),
     )
 
 
-# Initialize and configure the application
+# Bulk wardrobe import: POST a CSV or JSON Lines file as the request body.
+# The body is read line by line and inserted in chunks, invalid rows are reported with their line number.
+# The items go to the wardrobe of the wardrobe_id cookie.
+async def import_wardrobe(request: Request, format: str = "csv"):
+    wardrobe_id = request_wardrobe_id(request)
+    if not wardrobe_id:
+        raise HTTPException(status_code=400, detail=f"No wardrobe: send the {WARDROBE_COOKIE} cookie of the app")
+    try:
+        importer = WardrobeImporter(format, clothing_types, temperature_types, wardrobe_id=wardrobe_id)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    
+    async for line in iter_lines(request.stream()):
+        chunk = importer.feed(line)
+        if chunk:
+            await run_in_threadpool(importer.insert, get_engine(), Items, chunk)
+    await run_in_threadpool(importer.insert, get_engine(), Items, importer.finish())
+    
+    recommendation_index.invalidate(wardrobe_id)
+    advice_memo.bump(wardrobe_id)
+    return importer.result()
+
+# Bulk wardrobe export: stream the wardrobe of the wardrobe_id cookie as CSV or JSON Lines.
+def export_wardrobe(request: Request, format: str = "csv"):
+    if format not in CONTENT_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported format {format!r}, use one of {', '.join(CONTENT_TYPES)}")
+    return StreamingResponse(
+        export_lines(get_engine(), Items, format, wardrobe_id=request_wardrobe_id(request)),
+        media_type=CONTENT_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=wardrobe.{format}"},
+    )
+
+
+# Multi-city weather and advice: POST {"cities": [...]} and receive one JSON line per city.
+# All cities are fetched concurrently and each line is sent as soon as its lookup finishes,
+# so the response takes about as long as the slowest city. "index" is the city's position in the request.
+MAX_BATCH_CITIES = 50
+
+async def batch_weather(request: Request):
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail='Expected a JSON body like {"cities": ["Paris", "Oslo"]}')
+    cities = body.get("cities") if isinstance(body, dict) else None
+    if not isinstance(cities, list) or not all(isinstance(city, str) and city.strip() for city in cities):
+        raise HTTPException(status_code=422, detail='"cities" must be a list of city names, like {"cities": ["Paris", "Oslo"]}')
+    if len(cities) > MAX_BATCH_CITIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_CITIES} cities per request")
+    
+    async def results():
+        wardrobe_id = request_wardrobe_id(request)
+        lookups = [get_city_advice(wardrobe_id, index, city) for index, city in enumerate(cities)]
+        for lookup in asyncio.as_completed(lookups):
+            yield json.dumps(await lookup) + "\n"
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+# Forecast: GET /api/forecast?city=Paris&hours=24 returns the forecast readings of the next hours
+# and the clothing advice for them.
+async def forecast(request: Request, city: str, hours: int = 24):
+    key = await fetch_forecast(city)
+    if key is None:
+        raise HTTPException(status_code=404, detail="City not found. Please enter a valid city name.")
+    
+    now = int(time.time())
+    readings = forecast_store.range(key, now - 3 * 3600, now + hours * 3600)
+    reading_types = classify_temperatures([reading.temperature for reading in readings])
+    wardrobe_id = request_wardrobe_id(request)
+    await preload_recommendation_index(wardrobe_id)
+    return {
+        "city": city,
+        "readings": [
+            {**dataclasses.asdict(reading), "temperature_type": temperature_type}
+            for reading, temperature_type in zip(readings, reading_types)
+        ],
+        "clothing_advice": get_forecast_advice(wardrobe_id, readings) if readings else "",
+    }
+
+
+# Metrics: GET /metrics returns the latency histograms of the lookup pipeline and the cache,
+# single-flight and prefetch counters in the Prometheus text format.
+def metrics():
+    gauges = {}
+    for prefix, stats in [
+        ("weather_cache", weather_cache.stats()),
+        ("weather_singleflight", weather_flight.stats()),
+        ("weather_prefetch", prefetch_scheduler.stats()),
+        ("advice_memo", advice_memo.stats()),
+        ("weather_archive", weather_archive_stats()),
+    ]:
+        for name, value in stats.items():
+            gauges[f"weather_assistant_{prefix}_{name}"] = value
+    return PlainTextResponse(render_metrics(gauges), media_type="text/plain; version=0.0.4")
+
+# Measure the size of the state delta sent to the browser, for one event in every `sample_every`
+# (serializing the delta is the expensive part of the instrumentation).
+class StateDeltaMetrics(Middleware):
+    sample_every: int = 10
+    events: int = 0
+    
+    async def postprocess(self, app, state, event, update):
+        self.events += 1
+        if state_delta_bytes.enabled and self.events % self.sample_every == 0:
+            state_delta_bytes.observe(len(json_dumps(update.delta)), event.name.rpartition(".")[2])
+        return update
+
+
+# Initialize and configure the application.
+# The pages are registered by @rx.page and rendered when Reflex compiles the app, not on import.
 app = rx.App()
-app.add_page(index)
-app.add_page(wardrobe_page, route="/wardrobe")
-app.compile()
\ No newline at end of file
+app.add_middleware(StateDeltaMetrics())
+app.api.add_api_route("/api/wardrobe/import", import_wardrobe, methods=["POST"])
+app.api.add_api_route("/api/wardrobe/export", export_wardrobe, methods=["GET"])
+app.api.add_api_route("/api/weather/batch", batch_weather, methods=["POST"])
+app.api.add_api_route("/api/forecast", forecast, methods=["GET"])
+app.api.add_api_route("/metrics", metrics, methods=["GET"])
+app.api.add_event_handler("startup", warm_weather_cache)
+app.api.add_event_handler("startup", prefetch_scheduler.start)
+app.api.add_event_handler("shutdown", prefetch_scheduler.stop)
+app.api.add_event_handler("shutdown", weather_client.aclose)
+app.api.add_event_handler("shutdown", dispose_engine)
+app.api.add_event_handler("shutdown", close_weather_archive)
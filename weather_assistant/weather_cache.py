@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# Returned by WeatherCache.get when there is no fresh entry for a key.
+MISSING = object()
+
+# Normalize a city name so that "paris", " Paris " and "PARIS" share one cache entry.
+def normalize_city(city: str) -> str:
+    return " ".join(city.split()).casefold()
+
+# Cache key: the normalized city name and the units of the request.
+def weather_cache_key(city: str, units: str = "metric") -> tuple[str, str]:
+    return (normalize_city(city), units)
+
+
+# Weather cache: a process-wide TTL + LRU cache for OpenWeatherMap responses.
+# A value of None is a negative entry ("City not found") and has its own, shorter TTL.
+class WeatherCache:
+    def __init__(self, ttl: float = 600, max_size: int = 1024, negative_ttl: float = 60, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+        # counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # Get the cached value for the key, or MISSING if there is no fresh entry.
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    # Store a value; None marks the key as not found. `ttl` overrides the lifetime of the entry.
+    def put(self, key, value, ttl: Optional[float] = None):
+        if ttl is None:
+            ttl = self.ttl if value is not None else self.negative_ttl
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, value)
+            self._entries.move_to_end(key)
+            # evict the least recently used entries
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # The cached value for the key, also if it has expired, or MISSING; without counting a hit or a miss.
+    def peek(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return MISSING if entry is None else entry[1]
+
+    # The remaining lifetime of an entry in seconds, or None if it is not cached.
+    def time_to_live(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            return max(0.0, entry[0] - self.clock())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "size": len(self._entries),
+        }
+
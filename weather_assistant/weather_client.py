@@ -0,0 +1,61 @@
+import asyncio
+
+import httpx
+
+
+# Weather client: one shared, pooled keep-alive HTTP client for all weather requests.
+# Requests have connect/read timeouts and at most `max_concurrency` of them run at the same time,
+# so a slow upstream cannot stall other users' events or exhaust the connection pool.
+class WeatherClient:
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 50,
+        max_concurrency: int = 50,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 5.0,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.max_concurrency = max_concurrency
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+        self._closer = None
+
+    # The HTTP client is created on first use, inside the running event loop
+    # (and again if it is used from another event loop, e.g. in tests and benchmarks).
+    async def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            closer = self._close_with_loop(client)
+            await closer.__anext__()
+            # the client of the previous event loop was closed when that loop shut down
+            # (or is closed in it when its closer is collected)
+            self._client, self._closer, self._loop = client, closer, loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    # Closes the client inside its own event loop, at the latest when the loop shuts down:
+    # asyncio.run() and the event loop's shutdown_asyncgens() finalize its suspended async generators.
+    # (Its connections cannot be closed from another event loop.)
+    @staticmethod
+    async def _close_with_loop(client: httpx.AsyncClient):
+        try:
+            yield
+        finally:
+            await client.aclose()
+
+    async def get(self, url: str) -> httpx.Response:
+        client = await self._get_client()
+        async with self._semaphore:
+            return await client.get(url)
+
+    async def aclose(self):
+        if self._closer is not None:
+            await self._closer.aclose()
+            self._client = self._closer = self._loop = None